@@ -1,19 +1,40 @@
 # agent.py
 from . import config
-from .steam_tools import SteamToolbelt
+from . import events
+from .steam_tools import SteamToolbelt, ToolError
+from .single_flight import SingleFlight
+from .llm_scheduler import DEFAULT_QUEUE_TIMEOUTS, LLMUnavailable, current_priority
+from .resilience import BackendUnavailable
+from ..telemetry import TOOL_REQUESTS, register_stats, traced
+import re
+import unicodedata
+
+
+def normalize_query(query: str) -> str:
+    """동일 질문 판별용 정규화: 유니코드 정규화(NFKC), 소문자, 공백 정리, 끝의 문장부호 제거."""
+    normalized = unicodedata.normalize("NFKC", query).lower()
+    normalized = " ".join(normalized.split())
+    return re.sub(r"[\s?!.~]+$", "", normalized)
+
 
 class SteamGameAgent:
     """
     사용자의 질문에 포함된 키워드를 기반으로 적절한 도구를 호출하는 에이전트입니다.
     """
+    # 요청마다 에이전트를 새로 만들 수 있으므로 진행 중인 작업 목록은 프로세스 전체에서 공유합니다.
+    _in_flight = SingleFlight()
+
     def __init__(self):
         self.tools = SteamToolbelt()
         print("키워드 기반 SteamGameAgent가 초기화되었습니다.")
 
-    def route_query(self, query: str) -> tuple[str, str]:
+    @traced("route_query")
+    def route_query(self, query: str, raise_unavailable: bool = False) -> tuple[str, str]:
         """
         사용자 쿼리에 '계산' 또는 '설명' 키워드가 있는지 확인하여
         Text-to-SQL 또는 RAG 도구를 직접 실행합니다.
+        raise_unavailable이면 LLM 호출 한도/대기 마감(LLMUnavailable)이나 백엔드 장애(BackendUnavailable)를
+        안내 문구로 바꾸지 않고 그대로 발생시켜, 호출자(배치 작업)가 나중에 다시 시도할 수 있게 합니다.
         """
         query_lower = query.lower()
 
@@ -24,7 +45,8 @@ class SteamGameAgent:
                 tool_name = "structured (Text-to-SQL)"
                 # "계산" 키워드 자체는 LLM에게 불필요하므로 제거 후 전달
                 clean_query = query.replace('계산', '').strip()
-                result = self.tools.query_structured_data(clean_query)
+                events.status("route", "Text-to-SQL 실행 중")
+                result = self._run_coalesced(tool_name, clean_query, self.tools.query_structured_data)
                 return result, tool_name
 
             elif '설명' in query_lower:
@@ -32,7 +54,8 @@ class SteamGameAgent:
                 tool_name = "unstructured (RAG)"
                 # "설명" 키워드 자체는 LLM에게 불필요하므로 제거 후 전달
                 clean_query = query.replace('설명', '').strip()
-                result = self.tools.query_unstructured_data(clean_query)
+                events.status("route", "RAG 검색 실행 중")
+                result = self._run_coalesced(tool_name, clean_query, self.tools.query_unstructured_data)
                 return result, tool_name
             
             else:
@@ -48,11 +71,54 @@ class SteamGameAgent:
                 )
                 return guide_message, tool_name
 
+        except ToolError as e:
+            return str(e), tool_name
+        except LLMUnavailable as e:
+            if raise_unavailable:
+                raise
+            return str(e), tool_name
+        except BackendUnavailable as e:
+            if raise_unavailable:
+                raise
+            print(f"{e.backend} 호출 실패: {e}")
+            return "정형 데이터베이스를 일시적으로 사용할 수 없습니다. 잠시 후 다시 시도해주세요.", tool_name
         except Exception as e:
             error_message = f"에이전트 처리 중 오류 발생: {e}"
             return error_message, "Error"
 
+    def _run_coalesced(self, tool_name: str, query: str, tool_fn) -> str:
+        """
+        같은 도구로 같은(정규화 기준) 질문이 이미 처리 중이면 새로 실행하지 않고 그 결과를 기다려 공유합니다.
+        - 성공한 답변만 공유합니다. 처리 중인 요청이 실패하면(사용자별 호출 한도, 대기 마감, 백엔드 장애 등)
+          합류한 요청은 각자의 사용자/우선순위로 다시 실행합니다.
+        - 처리 중인 요청의 status/token 이벤트는 합류한 요청(WebSocket)에도 전달됩니다.
+        - 우선순위가 같은 요청끼리만 합류하고, 합류한 요청도 자기 우선순위의 대기 마감 시간까지만 기다린 뒤
+          직접 실행합니다 (대화형 요청이 배치 작업 뒤에서 오래 기다리지 않도록).
+        """
+        TOOL_REQUESTS.labels(tool_name).inc()
+        priority = current_priority()
+        key = (tool_name, priority, normalize_query(query))
+
+        def run(publish):
+            with events.forward_to(publish):
+                return tool_fn(query)
+
+        return self._in_flight.do(
+            key, run, listener=events.current_sink(), share_errors=False, timeout=DEFAULT_QUEUE_TIMEOUTS[priority],
+        )
+
+    @classmethod
+    def coalescing_stats(cls) -> dict:
+        """route_query 호출 중 진행 중인 작업에 합류한 비율 등 single-flight 통계를 반환합니다."""
+        return cls._in_flight.stats()
+
     def close_connections(self):
         """Toolbelt의 DB 연결을 종료합니다."""
         self.tools.close()
 
+
+# /metrics: steam_agent_single_flight_{calls,executions,coalesced,retried,timed_out}_total, _in_flight, _coalescing_ratio
+register_stats(
+    "steam_agent_single_flight", "동일 질문 합류(single-flight) 통계", SteamGameAgent.coalescing_stats,
+    counters=("calls", "executions", "coalesced", "retried", "timed_out"), gauges=("in_flight", "coalescing_ratio"),
+)
@@ -0,0 +1,140 @@
+# aggregate_tables.py
+# 자주 묻는 정형 질문(플랫폼별 게임 수, 상위 N개, 평균 점수)을 위한 요약 테이블 정의와 쿼리 재작성
+#
+# 요약 테이블은 적재 시점에 만들어집니다.
+# - MySQL: data_etl/LLM_RAG_DB_생성_RAG_테스트/load_mysql.py (같은 이름/스키마로 생성)
+# - DuckDB: DuckDBBackend 초기화 시 build_statements()로 생성
+
+from . import config
+import re
+
+T = config.STRUCTURED_TABLE_NAME
+
+PLATFORMS = ["windows", "mac", "linux"]
+# 상위 N개 요약 테이블을 만들 지표 (내림차순)
+TOP_METRICS = ["price", "peak_ccu", "positive", "recommendations"]
+# 평균/최솟값/최댓값 요약을 만들 지표
+STAT_METRICS = ["metacritic_score"]
+
+PLATFORM_COUNTS_TABLE = "steam_platform_counts"
+SCORE_STATS_TABLE = "steam_score_stats"
+
+
+def top_table(metric: str) -> str:
+    return f"steam_top_by_{metric}"
+
+
+def table_names() -> list[str]:
+    """요약 테이블 이름 목록 (SQL 가드의 조회 허용 테이블에 포함됩니다)"""
+    return [PLATFORM_COUNTS_TABLE, SCORE_STATS_TABLE] + [top_table(metric) for metric in TOP_METRICS]
+
+
+def top_n_query() -> str:
+    """
+    지표별로 실제 적재된 상위 N(MAX(rank_no))을 조회하는 SQL입니다.
+    적재 스크립트와 백엔드의 AGGREGATE_TOP_N 설정이 달라도 DB에 만들어진 테이블 기준으로 재작성 여부를 판단합니다.
+    """
+    return " UNION ALL ".join(
+        f"SELECT '{metric}' AS metric, MAX(rank_no) AS top_n FROM {top_table(metric)}" for metric in TOP_METRICS
+    )
+
+
+def build_statements(source_table: str = T, top_n: int = config.AGGREGATE_TOP_N) -> list[str]:
+    """source_table에서 요약 테이블을 (재)생성하는 SQL 목록입니다. MySQL 8과 DuckDB에서 모두 동작합니다."""
+    statements = []
+
+    platform_selects = " UNION ALL ".join(
+        f"SELECT '{p}' AS platform, COUNT(*) AS game_count FROM {source_table} WHERE {p} = TRUE"
+        for p in PLATFORMS
+    )
+    statements += [
+        f"DROP TABLE IF EXISTS {PLATFORM_COUNTS_TABLE}",
+        f"CREATE TABLE {PLATFORM_COUNTS_TABLE} AS {platform_selects}",
+    ]
+
+    for metric in TOP_METRICS:
+        statements += [
+            f"DROP TABLE IF EXISTS {top_table(metric)}",
+            f"CREATE TABLE {top_table(metric)} AS "
+            f"SELECT rank_no, appid, name, {metric} FROM ("
+            f"SELECT ROW_NUMBER() OVER (ORDER BY {metric} DESC) AS rank_no, appid, name, {metric} "
+            f"FROM {source_table} WHERE {metric} IS NOT NULL) ranked WHERE rank_no <= {int(top_n)}",
+        ]
+
+    stat_selects = " UNION ALL ".join(
+        f"SELECT '{m}' AS metric, '{flt}' AS filter, AVG({m}) AS avg_value, MIN({m}) AS min_value, "
+        f"MAX({m}) AS max_value, COUNT({m}) AS game_count FROM {source_table}{where}"
+        for m in STAT_METRICS
+        for flt, where in (("all", ""), ("nonzero", f" WHERE {m} > 0"))
+    )
+    statements += [
+        f"DROP TABLE IF EXISTS {SCORE_STATS_TABLE}",
+        f"CREATE TABLE {SCORE_STATS_TABLE} AS {stat_selects}",
+    ]
+    return statements
+
+
+# --- 쿼리 재작성 ---
+
+_IDENT = r"[a-z_][a-z0-9_]*"
+_ALIAS = rf"(?:\s+as\s+({_IDENT}))?"
+_PLATFORM = "|".join(PLATFORMS)
+_TOP = "|".join(TOP_METRICS)
+_STAT = "|".join(STAT_METRICS)
+
+_PLATFORM_COUNT = re.compile(
+    rf"^select\s+count\(\s*(?:\*|1|appid)\s*\){_ALIAS}\s+from\s+{T}\s+where\s+({_PLATFORM})\s*=\s*(?:1|true)$"
+)
+_PLATFORM_SUM = re.compile(rf"^select\s+sum\(\s*({_PLATFORM})\s*\){_ALIAS}\s+from\s+{T}$")
+_TOP_N = re.compile(
+    rf"^select\s+(?P<cols>{_IDENT}(?:\s*,\s*{_IDENT})*)\s+from\s+{T}\s+"
+    rf"order\s+by\s+(?P<metric>{_TOP})\s+desc\s+limit\s+(?P<n>\d+)$"
+)
+_SCORE_STAT = re.compile(
+    rf"^select\s+(?P<func>avg|min|max)\(\s*(?P<metric>{_STAT})\s*\){_ALIAS}\s+from\s+{T}"
+    rf"(?P<nonzero>\s+where\s+(?P=metric)\s*>\s*0)?$"
+)
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.replace("`", "").strip().rstrip(";").split()).lower()
+
+
+def rewrite(sql: str, top_n=None):
+    """
+    SQL이 요약 테이블로 답할 수 있는 형태이면 요약 테이블을 읽는 SQL을 반환하고, 아니면 None을 반환합니다.
+    결과 컬럼 이름은 원래 쿼리와 최대한 같게 유지합니다.
+    top_n은 지표별로 실제 적재된 상위 N({metric: N}, top_n_query() 결과)이며,
+    없는 지표나 N보다 큰 LIMIT는 상위 N개 테이블로 바꾸지 않습니다.
+    """
+    normalized = _normalize(sql)
+
+    match = _PLATFORM_COUNT.match(normalized)
+    if match:
+        alias, platform = match.group(1), match.group(2)
+        return (f"SELECT game_count AS {alias or 'game_count'} FROM {PLATFORM_COUNTS_TABLE} "
+                f"WHERE platform = '{platform}'")
+
+    match = _PLATFORM_SUM.match(normalized)
+    if match:
+        platform, alias = match.group(1), match.group(2)
+        return (f"SELECT game_count AS {alias or 'game_count'} FROM {PLATFORM_COUNTS_TABLE} "
+                f"WHERE platform = '{platform}'")
+
+    match = _TOP_N.match(normalized)
+    if match and int(match.group("n")) <= (top_n or {}).get(match.group("metric"), 0):
+        metric = match.group("metric")
+        columns = [c.strip() for c in match.group("cols").split(",")]
+        if all(c in ("appid", "name", metric) for c in columns):
+            return (f"SELECT {', '.join(columns)} FROM {top_table(metric)} "
+                    f"WHERE rank_no <= {int(match.group('n'))} ORDER BY rank_no")
+
+    match = _SCORE_STAT.match(normalized)
+    if match:
+        value_column = f"{match.group('func')}_value"
+        alias = match.group(3) or value_column
+        flt = "nonzero" if match.group("nonzero") else "all"
+        return (f"SELECT {value_column} AS {alias} FROM {SCORE_STATS_TABLE} "
+                f"WHERE metric = '{match.group('metric')}' AND filter = '{flt}'")
+
+    return None
@@ -0,0 +1,135 @@
+# answer_templates.py
+# 단순한 Text-to-SQL 결과(값 하나, 한 행, 몇 행짜리 표)를 LLM 호출 없이 템플릿으로 답변 문장으로 만듭니다.
+# 템플릿으로 표현하기 어려운 결과나 해석이 필요한 질문이면 None을 반환하고, 호출자는 LLM으로 답변을 만듭니다.
+
+from . import config
+import numbers
+import re
+
+# 컬럼별 (한국어 이름, 단위). 단위가 "달러"/"분"이면 숫자 뒤에 붙이고, "bool"이면 지원 여부로 표시합니다.
+COLUMN_LABELS = {
+    "appid": ("AppID", None),
+    "name": ("게임명", None),
+    "price": ("가격", "달러"),
+    "peak_ccu": ("최대 동시 접속자 수", "명"),
+    "required_age": ("이용 가능 연령", "세"),
+    "windows": ("Windows", "bool"),
+    "mac": ("Mac", "bool"),
+    "linux": ("Linux", "bool"),
+    "metacritic_score": ("메타크리틱 점수", "점"),
+    "positive": ("긍정 평가 수", "개"),
+    "negative": ("부정 평가 수", "개"),
+    "achievements": ("도전 과제 수", "개"),
+    "recommendations": ("추천 수", "개"),
+    "average_playtime_forever": ("평균 플레이 시간", "분"),
+    # 요약 테이블(aggregate_tables)과 흔한 별칭
+    "game_count": ("게임 수", "개"),
+    "count": ("게임 수", "개"),
+    "cnt": ("게임 수", "개"),
+    "avg_value": ("평균값", None),
+    "min_value": ("최솟값", None),
+    "max_value": ("최댓값", None),
+}
+_AGGREGATE = re.compile(r"^(count|avg|sum|min|max)\s*\(\s*(?:distinct\s+)?([\w*]+)\s*\)$", re.IGNORECASE)
+_AGGREGATE_PREFIX = {"avg": "평균 ", "sum": "전체 ", "min": "최저 ", "max": "최고 "}
+
+# 비교/이유/추천처럼 결과를 해석해야 하는 질문은 LLM이 답변합니다.
+NEEDS_PHRASING = ("비교", "차이", "왜", "이유", "추천", "분석", "설명", "요약", "어떤 점")
+
+
+def column_label(column: str) -> tuple:
+    """컬럼 이름(또는 COUNT(*), AVG(price) 같은 집계식)의 (한국어 이름, 단위)"""
+    key = column.strip().strip('`"').lower()
+    if key in COLUMN_LABELS:
+        return COLUMN_LABELS[key]
+
+    match = _AGGREGATE.match(key)
+    if match:
+        func, inner = match.group(1).lower(), match.group(2).lower()
+        if func == "count":
+            return ("게임 수", "개")
+        label, unit = COLUMN_LABELS.get(inner, (inner, None))
+        # bool 컬럼의 SUM/AVG는 지원 게임 수/비율이므로 일반 숫자로 표시합니다.
+        if unit == "bool":
+            return (f"{label} 지원 게임 수", "개") if func == "sum" else (f"{label} 지원 비율", None)
+        return (_AGGREGATE_PREFIX[func] + label, unit)
+
+    if key.endswith("_count") or key.startswith("num_"):
+        return (column, "개")
+    return (column, None)
+
+
+def _has_final_consonant(word: str) -> bool:
+    last = word.rstrip()[-1:] if word.strip() else ""
+    if "가" <= last <= "힣":
+        return (ord(last) - ord("가")) % 28 != 0
+    # 숫자/영문은 읽는 소리 기준으로 대략 판단합니다.
+    return last in "013678LMNRlmnr"
+
+
+def _topic(word: str) -> str:
+    """'가격은', '게임 수는' 처럼 주제 조사를 붙입니다."""
+    return f"{word}{'은' if _has_final_consonant(word) else '는'}"
+
+
+def format_value(value, unit=None) -> str:
+    if value is None:
+        return "정보 없음"
+    if unit == "bool":
+        return "지원" if value in (True, 1) else "미지원"
+    if isinstance(value, bool):
+        return "예" if value else "아니오"
+    if isinstance(value, numbers.Number):
+        number = float(value)
+        if unit == "달러":
+            return f"{number:,.2f}달러"
+        text = f"{number:,.0f}" if number.is_integer() else f"{number:,.2f}"
+        return f"{text}{unit}" if unit else text
+    return str(value)
+
+
+def format_answer(question: str, columns: list, rows: list, truncated: bool = False):
+    """
+    결과가 템플릿으로 표현할 수 있는 형태이면 답변 문장을, 아니면 None을 반환합니다.
+    - 값 하나: "Linux 지원 게임 수는 13,686개입니다."처럼 한 문장
+    - 한 행: 게임명이 있으면 "'게임명'입니다 (가격: ...)", 없으면 컬럼별 값 나열
+    - SQL_TEMPLATE_MAX_ROWS행 이하, SQL_TEMPLATE_MAX_COLUMNS열 이하: 번호 목록
+    """
+    if not config.SQL_TEMPLATE_ANSWER_ENABLED or truncated or not rows or not columns:
+        return None
+    if any(keyword in question for keyword in NEEDS_PHRASING):
+        return None
+    if len(rows) > config.SQL_TEMPLATE_MAX_ROWS or len(columns) > config.SQL_TEMPLATE_MAX_COLUMNS:
+        return None
+
+    labels = [column_label(c) for c in columns]
+    name_index = next((i for i, c in enumerate(columns) if c.strip('`"').lower() == "name"), None)
+
+    def describe(row, skip=None):
+        # "가격 19.99달러", "Linux 지원"처럼 이름과 값을 붙여 나열합니다.
+        return ", ".join(
+            f"{label} {format_value(value, unit)}"
+            for i, ((label, unit), value) in enumerate(zip(labels, row)) if i != skip
+        )
+
+    if len(rows) == 1 and len(columns) == 1:
+        label, unit = labels[0]
+        if unit == "bool":
+            return f"{describe(rows[0])}입니다."
+        return f"{_topic(label)} {format_value(rows[0][0], unit)}입니다."
+
+    if len(rows) == 1:
+        row = rows[0]
+        if name_index is not None:
+            details = describe(row, skip=name_index)
+            return f"'{row[name_index]}'입니다 ({details})." if details else f"'{row[name_index]}'입니다."
+        return f"조회 결과는 {describe(row)}입니다."
+
+    lines = [f"조회 결과 {len(rows)}건입니다."]
+    for rank, row in enumerate(rows, 1):
+        if name_index is not None:
+            details = describe(row, skip=name_index)
+            lines.append(f"{rank}. {row[name_index]}" + (f" ({details})" if details else ""))
+        else:
+            lines.append(f"{rank}. {describe(row)}")
+    return "\n".join(lines)
@@ -12,12 +12,25 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 if not GOOGLE_API_KEY:
     raise ValueError("'.env' 파일에 GOOGLE_API_KEY가 설정되지 않았습니다.")
 
+# True이면 서버 시작 시 백그라운드에서 Steam 에이전트(임베딩 모델, DB 연결)를 미리 준비합니다.
+AGENT_WARMUP_ENABLED = os.getenv("AGENT_WARMUP_ENABLED", "true").lower() == "true"
+# 요청이 warm-up 완료를 기다리는 최대 시간 (초)
+AGENT_READY_TIMEOUT_S = float(os.getenv("AGENT_READY_TIMEOUT_S", 60))
+
 # LLM 모델 (에이전트 라우팅, RAG 답변 생성, Text-to-SQL 변환 등 모든 작업에 사용)
 GEMINI_MODEL_NAME = "gemini-2.0-flash"
 
 # 로컬 임베딩 모델 (Qdrant 벡터 생성을 위해 사용)
 #EMBEDDING_MODEL_NAME = "Qwen/Qwen3-Embedding-0.6B"
 EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# 임베딩 실행 위치: "local" (프로세스마다 모델 로드) 또는 "server" (embedding_service 서버 하나를 호스트의 모든 워커가 공유)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "local")
+EMBEDDING_SOCKET_PATH = os.getenv("EMBEDDING_SOCKET_PATH", "/tmp/steam_embedding.sock")
+# 임베딩 서버 요청 한 건의 응답 대기 시간 (초)
+EMBEDDING_TIMEOUT_S = float(os.getenv("EMBEDDING_TIMEOUT_S", 5))
+# 임베딩 서버 동적 배칭: 첫 요청 후 최대 대기 시간(ms)과 한 번에 처리할 최대 문장 수
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 64))
 
 # --- MySQL 데이터베이스 설정 (Text-to-SQL용) ---
 DB_USER = os.getenv("DB_USER", "test1")
@@ -28,11 +41,91 @@ DB_NAME = os.getenv("DB_NAME", "steam_structured_db")
 # Text-to-SQL 쿼리의 대상이 될 테이블 이름
 STRUCTURED_TABLE_NAME = "steam_structured_data"
 
+# Text-to-SQL 쿼리를 실행할 백엔드: "mysql" (MySQL 서버) 또는 "duckdb" (정형 Parquet 파일을 프로세스 내에서 조회)
+STRUCTURED_BACKEND = os.getenv("STRUCTURED_BACKEND", "mysql")
+# duckdb 백엔드가 읽을 정형 데이터 Parquet 파일 (data_etl/raw_data_split_mysql/split_to_parquet.py 출력)
+STRUCTURED_PARQUET_PATH = os.getenv("STRUCTURED_PARQUET_PATH", "steam_games_structured_data.parquet")
+# True이면 시작 시 Parquet를 DuckDB 메모리 테이블로 적재하고, False이면 쿼리마다 파일을 직접 스캔합니다.
+DUCKDB_LOAD_IN_MEMORY = os.getenv("DUCKDB_LOAD_IN_MEMORY", "true").lower() == "true"
+# Text-to-SQL 결과에서 가져올 최대 행 수 (이를 넘는 결과는 잘린 것으로 표시됩니다)
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", 1000))
+# 최종 답변 프롬프트에 그대로 넣을 최대 행 수 (초과하면 컬럼 통계와 상위 행만 전달)
+SQL_PROMPT_MAX_ROWS = int(os.getenv("SQL_PROMPT_MAX_ROWS", 20))
+# True이면 값 하나/한 행/작은 표 결과는 LLM 대신 템플릿으로 답변합니다 (두 번째 Gemini 호출 생략).
+SQL_TEMPLATE_ANSWER_ENABLED = os.getenv("SQL_TEMPLATE_ANSWER_ENABLED", "true").lower() == "true"
+# 템플릿으로 답변할 결과의 최대 행/열 수
+SQL_TEMPLATE_MAX_ROWS = int(os.getenv("SQL_TEMPLATE_MAX_ROWS", 10))
+SQL_TEMPLATE_MAX_COLUMNS = int(os.getenv("SQL_TEMPLATE_MAX_COLUMNS", 4))
+
+# --- LLM 생성 SQL 실행 가드 ---
+# Text-to-SQL 전용 읽기 전용 계정 (SELECT 권한만 부여하는 것을 권장합니다)
+SQL_READONLY_DB_USER = os.getenv("SQL_READONLY_DB_USER", DB_USER)
+SQL_READONLY_DB_PASSWORD = os.getenv("SQL_READONLY_DB_PASSWORD", DB_PASSWORD)
+# Text-to-SQL 전용 커넥션 풀 크기
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", 5))
+# 문장별 최대 실행 시간 (밀리초)
+SQL_STATEMENT_TIMEOUT_MS = int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", 5000))
+# EXPLAIN 결과가 이 값을 넘으면 실행하지 않고 거부합니다.
+SQL_GUARD_MAX_ROWS = int(os.getenv("SQL_GUARD_MAX_ROWS", 5_000_000))
+SQL_GUARD_MAX_COST = float(os.getenv("SQL_GUARD_MAX_COST", 1_000_000))
+
+# --- 요약(집계) 테이블 ---
+# True이면 플랫폼별 게임 수, 상위 N개, 평균 점수 질문을 적재 시 만들어 둔 요약 테이블에서 조회합니다.
+AGGREGATE_REWRITE_ENABLED = os.getenv("AGGREGATE_REWRITE_ENABLED", "true").lower() == "true"
+# 지표별 상위 N개 요약 테이블에 저장하는 행 수 (DuckDB 백엔드가 요약 테이블을 만들 때 사용)
+AGGREGATE_TOP_N = int(os.getenv("AGGREGATE_TOP_N", 100))
+# 실제로 적재된 N(요약 테이블의 MAX(rank_no))을 다시 조회하는 주기 (초). LIMIT가 이보다 큰 쿼리는 원본 테이블을 조회합니다.
+AGGREGATE_TOP_N_REFRESH_S = float(os.getenv("AGGREGATE_TOP_N_REFRESH_S", 60))
+
+# --- LLM 호출 스케줄러 ---
+# 프로세스 전체의 Gemini 동시 호출 수와 초당 호출 수 상한
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_QPS = float(os.getenv("LLM_MAX_QPS", 10))
+# 사용자별 토큰 버킷 (초당 충전량, 최대 누적량)
+LLM_USER_QPS = float(os.getenv("LLM_USER_QPS", 1))
+LLM_USER_BURST = float(os.getenv("LLM_USER_BURST", 5))
+# 실행을 기다릴 수 있는 최대 시간 (초). 이 안에 실행될 수 없는 요청은 바로 실패합니다.
+LLM_INTERACTIVE_QUEUE_TIMEOUT_S = float(os.getenv("LLM_INTERACTIVE_QUEUE_TIMEOUT_S", 10))
+LLM_BATCH_QUEUE_TIMEOUT_S = float(os.getenv("LLM_BATCH_QUEUE_TIMEOUT_S", 300))
+
+# Gemini 호출 한 번의 응답 대기 시간 (초)
+GEMINI_TIMEOUT_S = float(os.getenv("GEMINI_TIMEOUT_S", 30))
+
+
+# --- 외부 백엔드 호출 보호 (마감 시간 / 서킷 브레이커 / 헤지 재시도) ---
+# 백엔드별 호출 마감 시간 (초). 넘기면 대체 경로(fallback)로 넘어갑니다.
+QDRANT_TIMEOUT_S = float(os.getenv("QDRANT_TIMEOUT_S", 3))
+NEO4J_TIMEOUT_S = float(os.getenv("NEO4J_TIMEOUT_S", 3))
+# 이 시간 안에 응답이 없으면 같은 읽기 요청을 한 번 더 보내 먼저 온 결과를 사용합니다. 0이면 사용하지 않습니다.
+QDRANT_HEDGE_AFTER_S = float(os.getenv("QDRANT_HEDGE_AFTER_S", 0))
+NEO4J_HEDGE_AFTER_S = float(os.getenv("NEO4J_HEDGE_AFTER_S", 0))
+# 연속 실패가 이 횟수에 도달하면 BREAKER_RESET_TIMEOUT_S초 동안 해당 백엔드를 호출하지 않습니다.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT_S = float(os.getenv("BREAKER_RESET_TIMEOUT_S", 30))
+# 마감 시간을 적용한 백엔드 호출을 실행하는 스레드 수
+BACKEND_CALL_WORKERS = int(os.getenv("BACKEND_CALL_WORKERS", 16))
+
 
 # --- Qdrant 벡터 데이터베이스 설정 (RAG - 의미 검색용) ---
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
 QDRANT_COLLECTION_NAME = "steam_games"
+# RAG에서 Qdrant로 가져올 초기 후보군 수 (Neo4j 필터링/컨텍스트 강화 전)
+RAG_CANDIDATE_LIMIT = int(os.getenv("RAG_CANDIDATE_LIMIT", 20))
+# True이면 후보군을 로컬 cross-encoder로 질문과의 관련도 순으로 다시 정렬합니다. (False이면 Qdrant 유사도 순서)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+# 다국어(한국어 질문) cross-encoder
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+# cross-encoder 입력 최대 토큰 수와 입력에 넣을 게임 설명 길이 (문자)
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", 256))
+RERANK_ABOUT_CHARS = int(os.getenv("RERANK_ABOUT_CHARS", 500))
+# 최종 답변 프롬프트에 넣을 검색 컨텍스트의 토큰 예산과 최대 게임 수
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 1200))
+RAG_CONTEXT_MAX_GAMES = int(os.getenv("RAG_CONTEXT_MAX_GAMES", 8))
+# 게임 하나의 설명에 쓸 최대 문자 수
+RAG_SNIPPET_MAX_CHARS = int(os.getenv("RAG_SNIPPET_MAX_CHARS", 600))
+# 토큰 수 근사에 사용하는 토큰당 평균 문자 수
+RAG_CHARS_PER_TOKEN = float(os.getenv("RAG_CHARS_PER_TOKEN", 3))
 
 
 # --- Neo4j 그래프 데이터베이스 설정 (RAG - 관계 검색용) ---
@@ -0,0 +1,249 @@
+# embedding_service.py
+# 호스트당 하나의 임베딩 모델을 여러 uvicorn 워커 프로세스가 공유하기 위한 로컬 임베딩 서버와 클라이언트입니다.
+#
+# 서버 실행: cd backend && python -m app.ai_chat.embedding_service
+#   - 모델을 한 번만 로드하고 EMBEDDING_SOCKET_PATH의 Unix 소켓에서 요청을 받습니다.
+#   - 여러 연결에서 동시에 들어온 요청을 EMBEDDING_BATCH_WAIT_MS 동안(또는 EMBEDDING_BATCH_MAX_SIZE개가 찰 때까지)
+#     모아 한 번의 encode 호출로 처리합니다 (동적 배칭).
+# 워커 설정: EMBEDDING_BACKEND=server 이면 SteamToolbelt가 모델을 로드하지 않고 EmbeddingClient를 사용합니다.
+#
+# 프로토콜 (모든 길이는 4바이트 big-endian)
+#   요청: [길이][JSON {"texts": [...]}]
+#   응답: [길이][JSON {"count": n, "dim": d} 또는 {"error": "..."}][n * d개의 float32 (little-endian)]
+from . import config
+import asyncio
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# 잘못된 요청이 서버 메모리를 과도하게 쓰지 않도록 요청 한 건의 크기를 제한합니다.
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def load_local_model():
+    """이 프로세스에 SentenceTransformer 모델을 로드합니다."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return SentenceTransformer(config.EMBEDDING_MODEL_NAME, device=device)
+
+
+def create_embedding_model():
+    """config.EMBEDDING_BACKEND 설정에 맞는 임베딩 모델(또는 같은 encode()를 제공하는 클라이언트)을 생성합니다."""
+    backend = config.EMBEDDING_BACKEND.lower()
+    if backend == "local":
+        return load_local_model()
+    if backend == "server":
+        return EmbeddingClient(config.EMBEDDING_SOCKET_PATH, timeout=config.EMBEDDING_TIMEOUT_S)
+    raise ValueError(f"지원하지 않는 EMBEDDING_BACKEND 값입니다: {config.EMBEDDING_BACKEND}")
+
+
+def _frame(data: bytes) -> bytes:
+    return len(data).to_bytes(4, "big") + data
+
+
+# --- 클라이언트 ---
+
+class EmbeddingClient:
+    """
+    임베딩 서버에 요청하는 SentenceTransformer 대역입니다. encode()는 SentenceTransformer와 같이
+    문자열 하나면 1차원, 목록이면 2차원 numpy 배열을 반환합니다.
+    연결은 스레드별로 하나씩 유지하며, 서버가 재시작되어 끊긴 연결은 한 번 다시 연결해 재시도합니다.
+    시간 초과는 서버가 느린 것이므로 같은 요청을 다시 보내지 않고 바로 실패합니다.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._dimension = None
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    @staticmethod
+    def _recv_exact(sock, size: int) -> bytes:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = sock.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("임베딩 서버 연결이 끊어졌습니다.")
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    def _request(self, texts: list) -> np.ndarray:
+        sock = self._connection()
+        sock.sendall(_frame(json.dumps({"texts": texts}, ensure_ascii=False).encode("utf-8")))
+        header = json.loads(self._recv_exact(sock, int.from_bytes(self._recv_exact(sock, 4), "big")))
+        if "error" in header:
+            raise RuntimeError(f"임베딩 서버 오류: {header['error']}")
+        count, dim = header["count"], header["dim"]
+        body = self._recv_exact(sock, count * dim * 4)
+        return np.frombuffer(body, dtype="<f4").reshape(count, dim)
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        for attempt in range(2):
+            try:
+                vectors = self._request(texts)
+                break
+            except ConnectionError:
+                # 끊긴 연결(reset, broken pipe, 서버 재시작)은 버리고, 첫 실패면 새 연결로 한 번 더 시도합니다.
+                self._disconnect()
+                if attempt:
+                    raise
+            except OSError:
+                # 시간 초과 등: 늦은 응답이 남아 있을 수 있는 연결은 버리고, 느린 서버에 같은 요청을 다시 보내지 않습니다.
+                self._disconnect()
+                raise
+
+        self._dimension = vectors.shape[1]
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self):
+        if self._dimension is None:
+            self.encode("")
+        return self._dimension
+
+
+# --- 서버 ---
+
+class EmbeddingServer:
+    """Unix 소켓으로 받은 요청을 모아(동적 배칭) 하나의 모델로 임베딩합니다."""
+
+    def __init__(self, model, socket_path: str = config.EMBEDDING_SOCKET_PATH,
+                 max_batch_size: int = config.EMBEDDING_BATCH_MAX_SIZE, batch_wait_ms: float = config.EMBEDDING_BATCH_WAIT_MS):
+        self.model = model
+        self.dimension = model.get_sentence_embedding_dimension()
+        self.socket_path = socket_path
+        self.max_batch_size = max_batch_size
+        self.batch_wait_s = batch_wait_ms / 1000
+        self._queue = None
+        # 모델 호출은 한 번에 하나씩 실행합니다 (GPU/CPU를 배치 하나가 모두 사용).
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self.stats = {"requests": 0, "texts": 0, "batches": 0}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                size = int.from_bytes(await reader.readexactly(4), "big")
+                if size > MAX_REQUEST_BYTES:
+                    writer.write(_frame(json.dumps({"error": "request too large"}).encode("utf-8")))
+                    await writer.drain()
+                    break
+                texts = json.loads(await reader.readexactly(size))["texts"]
+                if not texts:
+                    # 빈 요청은 모델을 거치지 않고 0개짜리 결과로 응답합니다.
+                    writer.write(_frame(json.dumps({"count": 0, "dim": self.dimension}).encode("utf-8")))
+                    await writer.drain()
+                    continue
+
+                future = asyncio.get_running_loop().create_future()
+                await self._queue.put((texts, future))
+                try:
+                    vectors = await future
+                except Exception as e:
+                    writer.write(_frame(json.dumps({"error": str(e)}).encode("utf-8")))
+                else:
+                    header = json.dumps({"count": vectors.shape[0], "dim": vectors.shape[1]}).encode("utf-8")
+                    writer.write(_frame(header) + vectors.astype("<f4", copy=False).tobytes())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, KeyError) as e:
+            print(f"잘못된 임베딩 요청: {e}")
+        finally:
+            writer.close()
+
+    async def _next_batch(self) -> list:
+        """첫 요청이 도착한 뒤 batch_wait_s 동안 또는 max_batch_size개가 찰 때까지 요청을 모읍니다."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.batch_wait_s
+        while size < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for texts, _ in batch for text in texts]
+            try:
+                vectors = await loop.run_in_executor(
+                    self._executor,
+                    lambda: np.asarray(self.model.encode(texts, batch_size=self.max_batch_size), dtype=np.float32),
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(batch)
+            self.stats["texts"] += len(texts)
+            self.stats["batches"] += 1
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    async def serve(self):
+        self._queue = asyncio.Queue()
+        # 이전 실행에서 남은 소켓 파일을 지웁니다.
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        batcher = asyncio.create_task(self._batch_loop())
+        print(f"임베딩 서버 시작: {self.socket_path} (모델: {config.EMBEDDING_MODEL_NAME})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._executor.shutdown(wait=False)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            batches = self.stats["batches"] or 1
+            print(f"임베딩 서버 종료: 요청 {self.stats['requests']}건, 평균 배치 크기 {self.stats['texts'] / batches:.1f}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(EmbeddingServer(load_local_model()).serve())
+    except KeyboardInterrupt:
+        pass
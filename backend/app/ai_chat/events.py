@@ -0,0 +1,60 @@
+# events.py
+# 응답을 만드는 동안 발생하는 진행 상황(도구 실행 상태, 스트리밍 토큰)을 현재 요청의 수신자에게 전달합니다.
+# 수신자는 WebSocket 채널처럼 실시간 전달이 필요한 호출자만 event_sink()로 등록하며,
+# 등록되지 않은 요청(일반 HTTP)에서는 emit()이 아무 일도 하지 않습니다.
+
+from contextlib import contextmanager
+import contextvars
+
+# 현재 요청의 이벤트 수신자 (dict 하나를 인자로 받는 함수)
+_sink = contextvars.ContextVar("chat_event_sink", default=None)
+
+
+@contextmanager
+def event_sink(callback):
+    """with 블록 안에서 emit()된 이벤트를 callback(event)으로 전달합니다."""
+    token = _sink.set(callback)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def current_sink():
+    """현재 요청의 이벤트 수신자 (없으면 None)"""
+    return _sink.get()
+
+
+@contextmanager
+def forward_to(callback):
+    """with 블록 안에서 emit()된 이벤트를 현재 수신자와 callback 모두에게 전달합니다."""
+    own = _sink.get()
+
+    def tee(event):
+        if own is not None:
+            own(event)
+        callback(event)
+
+    with event_sink(tee):
+        yield
+
+
+def streaming() -> bool:
+    """현재 요청에 이벤트 수신자가 있는지 (LLM 응답을 스트리밍할지) 여부"""
+    return _sink.get() is not None
+
+
+def emit(event_type: str, **data):
+    """현재 요청의 수신자에게 {"type": event_type, ...} 이벤트를 보냅니다. 수신자 오류는 응답 생성을 막지 않습니다."""
+    callback = _sink.get()
+    if callback is None:
+        return
+    try:
+        callback({"type": event_type, **data})
+    except Exception as e:
+        print(f"이벤트 전달 실패 ({event_type}): {e}")
+
+
+def status(stage: str, message: str):
+    """도구 실행 상태 이벤트 (예: stage="sql_generation", message="SQL 생성 중")"""
+    emit("status", stage=stage, message=message)
@@ -0,0 +1,267 @@
+# llm_scheduler.py
+# 모든 Gemini 호출이 거쳐 가는 중앙 스케줄러
+# - 전역 동시 실행 수 / 초당 호출 수(QPS) 예산
+# - 사용자별 토큰 버킷
+# - 우선순위 (대화형 요청이 배치 작업보다 먼저 실행)
+# - 대기 마감 시간: 시간 안에 실행될 수 없는 요청은 기다리지 않고 바로 실패시킵니다.
+
+from . import config
+from . import events
+from ..telemetry import record_llm_usage
+from contextlib import contextmanager
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+# 우선순위 (숫자가 작을수록 먼저 실행)
+INTERACTIVE = 0
+BATCH = 1
+
+DEFAULT_QUEUE_TIMEOUTS = {
+    INTERACTIVE: config.LLM_INTERACTIVE_QUEUE_TIMEOUT_S,
+    BATCH: config.LLM_BATCH_QUEUE_TIMEOUT_S,
+}
+
+# 현재 요청의 (사용자 ID, 우선순위). 요청 핸들러에서 llm_context()로 설정합니다.
+_current = contextvars.ContextVar("llm_request_context", default=(None, INTERACTIVE))
+
+
+@contextmanager
+def llm_context(user_id=None, priority: int = INTERACTIVE):
+    """이 블록 안에서 실행되는 LLM 호출을 user_id 사용자의 priority 요청으로 스케줄링합니다."""
+    token = _current.set((user_id, priority))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_priority() -> int:
+    """현재 요청의 우선순위를 반환합니다 (llm_context 밖에서는 INTERACTIVE)."""
+    return _current.get()[1]
+
+
+class LLMUnavailable(Exception):
+    """마감 시간 안에 LLM 호출을 실행할 수 없을 때 발생합니다. reason은 'user_rate' 또는 'queue_timeout'입니다."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷입니다.
+    reserve()는 토큰을 미리 예약(잔량이 음수가 될 수 있음)하고 그 토큰을 쓸 수 있을 때까지의 대기 시간을 반환합니다.
+    예약한 요청이 실행되지 못하면 refund()로 토큰을 돌려줍니다.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def reserve(self, now: float) -> float:
+        wait = self.wait_time(now)
+        self.tokens -= 1
+        return wait
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def is_full(self, now: float) -> bool:
+        """now 시점에 토큰이 가득 찼는지 (새 버킷과 구별되지 않는지) 반환합니다."""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class LLMScheduler:
+    """
+    LLM 호출을 우선순위 큐에 넣고 전역 예산 안에서 하나씩 실행을 허가합니다.
+    요청 핸들러는 동기 함수(스레드 풀)이므로 호출한 스레드가 자기 차례가 올 때까지 대기합니다.
+    """
+
+    # 토큰이 다시 가득 찬(한동안 호출이 없던) 사용자 버킷을 정리하는 주기 (초)
+    USER_BUCKET_SWEEP_S = 60
+
+    def __init__(self, max_concurrency: int = config.LLM_MAX_CONCURRENCY, max_qps: float = config.LLM_MAX_QPS,
+                 user_qps: float = config.LLM_USER_QPS, user_burst: float = config.LLM_USER_BURST):
+        self.max_concurrency = max_concurrency
+        self.max_qps = max_qps
+        self.user_qps = user_qps
+        self.user_burst = user_burst
+
+        self._cond = threading.Condition()
+        self._queue = []  # (priority, seq)
+        self._seq = itertools.count()
+        self._running = 0
+        self._global_bucket = TokenBucket(max_qps, max(1.0, max_qps))
+        self._user_buckets = {}
+        self._last_sweep = time.monotonic()
+        self._stats = {"completed": 0, "rejected_user_rate": 0, "rejected_queue_timeout": 0, "queue_wait_s": 0.0}
+
+    def _user_bucket(self, user_id, now: float) -> TokenBucket:
+        if now - self._last_sweep >= self.USER_BUCKET_SWEEP_S:
+            # 가득 찬 버킷은 새로 만든 버킷과 같으므로 지워도 속도 제한이 달라지지 않습니다.
+            self._user_buckets = {uid: b for uid, b in self._user_buckets.items() if not b.is_full(now)}
+            self._last_sweep = now
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.user_qps, self.user_burst)
+            self._user_buckets[user_id] = bucket
+        return bucket
+
+    def _reject(self, reason: str, message: str):
+        self._stats[f"rejected_{reason}"] += 1
+        raise LLMUnavailable(reason, message)
+
+    def _acquire(self, user_id, priority: int, deadline: float):
+        enqueued = time.monotonic()
+
+        # 1. 사용자별 속도 제한: 마감 전에 토큰이 생기지 않으면 바로 실패하고, 생기면 예약한 뒤 그때까지 기다립니다.
+        #    (큐 밖에서 기다리므로 한 사용자의 대기가 다른 사용자의 요청을 막지 않습니다.)
+        bucket = None
+        if user_id is not None:
+            with self._cond:
+                now = time.monotonic()
+                bucket = self._user_bucket(user_id, now)
+                if now + bucket.wait_time(now) > deadline:
+                    self._reject("user_rate", "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+                user_wait = bucket.reserve(now)
+            if user_wait > 0:
+                time.sleep(user_wait)
+
+        with self._cond:
+            try:
+                self._acquire_global(priority, deadline, enqueued)
+            except LLMUnavailable:
+                # 실행되지 못한 요청이 사용자 토큰을 소모하지 않도록 예약한 토큰을 돌려줍니다.
+                if bucket is not None:
+                    bucket.refund()
+                raise
+
+    def _acquire_global(self, priority: int, deadline: float, enqueued: float):
+        """self._cond를 잡은 상태에서 전역 동시 실행 수/QPS 예산 안에서 차례를 기다립니다."""
+        # 2. 같은 우선순위 이상의 대기 요청이 전역 QPS로 모두 처리되기 전에 마감이 오면 바로 실패합니다.
+        now = time.monotonic()
+        ahead = sum(1 for p, _ in self._queue if p <= priority)
+        if now + ahead / self.max_qps > deadline:
+            self._reject("queue_timeout", "AI 서비스 요청이 밀려 있습니다. 잠시 후 다시 시도해주세요.")
+
+        entry = (priority, next(self._seq))
+        heapq.heappush(self._queue, entry)
+        try:
+            while True:
+                now = time.monotonic()
+                wait = None
+                if self._queue[0] == entry and self._running < self.max_concurrency:
+                    wait = self._global_bucket.wait_time(now)
+                    if wait == 0:
+                        self._global_bucket.reserve(now)
+                        break
+
+                if now >= deadline:
+                    self._reject("queue_timeout", "AI 서비스 응답 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+                remaining = deadline - now
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+        except LLMUnavailable:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+            raise
+
+        heapq.heappop(self._queue)
+        self._running += 1
+        self._stats["queue_wait_s"] += time.monotonic() - enqueued
+        # 다음 순서의 요청이 조건을 다시 확인하도록 깨웁니다.
+        self._cond.notify_all()
+
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._stats["completed"] += 1
+            self._cond.notify_all()
+
+    def run(self, fn, user_id=None, priority: int = None, queue_timeout: float = None):
+        """
+        실행 허가를 받은 뒤 fn()을 호출하여 결과를 반환합니다.
+        user_id/priority를 지정하지 않으면 llm_context()로 설정된 값을 사용합니다.
+        queue_timeout초 안에 실행을 시작할 수 없으면 LLMUnavailable을 발생시킵니다.
+        """
+        context_user, context_priority = _current.get()
+        user_id = context_user if user_id is None else user_id
+        priority = context_priority if priority is None else priority
+        deadline = time.monotonic() + (
+            DEFAULT_QUEUE_TIMEOUTS.get(priority, config.LLM_INTERACTIVE_QUEUE_TIMEOUT_S)
+            if queue_timeout is None else queue_timeout
+        )
+
+        self._acquire(user_id, priority, deadline)
+        try:
+            return fn()
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["running"] = self._running
+            stats["queued"] = len(self._queue)
+        return stats
+
+
+class ScheduledModel:
+    """genai.GenerativeModel을 감싸 generate_content 호출이 스케줄러를 거치도록 합니다."""
+
+    def __init__(self, model, scheduler: LLMScheduler = None):
+        self.model = model
+        self.scheduler = scheduler or get_scheduler()
+
+    def generate_content(self, *args, **kwargs):
+        # 응답이 없는 호출이 실행 슬롯을 계속 차지하지 않도록 요청 시간 제한을 둡니다.
+        kwargs.setdefault("request_options", {"timeout": config.GEMINI_TIMEOUT_S})
+        if kwargs.get("stream"):
+            response = self.scheduler.run(lambda: self._consume_stream(self.model.generate_content(*args, **kwargs)))
+        else:
+            response = self.scheduler.run(lambda: self.model.generate_content(*args, **kwargs))
+        record_llm_usage(response)
+        return response
+
+    @staticmethod
+    def _consume_stream(response):
+        """
+        스트리밍 응답을 실행 슬롯 안에서 끝까지 받으며 청크마다 token 이벤트를 보냅니다.
+        다 받은 응답의 .text는 전체 텍스트이므로 호출자는 스트리밍 여부와 관계없이 같은 방식으로 사용합니다.
+        """
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # 텍스트가 없는 청크 (안전 필터 등)
+                continue
+            if text:
+                events.emit("token", text=text)
+        return response
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """프로세스 전체에서 공유하는 스케줄러를 반환합니다."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
@@ -0,0 +1,110 @@
+# rag_context.py
+# RAG 검색 결과를 질문과의 관련도 순으로 다시 정렬(rerank)하고,
+# 정해진 토큰 예산 안에서 관련도가 높은 게임부터 답변 생성용 컨텍스트로 채웁니다.
+
+from . import config
+import math
+
+# 남은 예산이 이보다 적으면 설명을 넣지 않습니다 (의미 없는 짧은 조각 방지).
+MIN_SNIPPET_CHARS = 40
+
+
+def create_reranker():
+    """RERANK_ENABLED이면 로컬 cross-encoder를 로드합니다. 비활성화되어 있으면 None (Qdrant 유사도 순서 사용)."""
+    if not config.RERANK_ENABLED:
+        return None
+    import torch
+    from sentence_transformers import CrossEncoder
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return CrossEncoder(config.RERANK_MODEL_NAME, max_length=config.RERANK_MAX_LENGTH, device=device)
+
+
+def rerank_text(game: dict) -> str:
+    """cross-encoder에 넣을 게임 문서 (이름, 장르, 설명 앞부분)"""
+    genres = ", ".join(filter(None, game.get("genres") or []))
+    return f"{game.get('name', '')}. {genres}. {(game.get('about') or '')[:config.RERANK_ABOUT_CHARS]}"
+
+
+def rerank(reranker, query: str, games: list, candidate_appids: list) -> list:
+    """
+    games를 질문과의 관련도 내림차순으로 정렬하여 반환합니다.
+    reranker가 없거나 실패하면 Qdrant 후보군 순서(벡터 유사도 순)를 사용합니다.
+    """
+    order = {appid: rank for rank, appid in enumerate(candidate_appids)}
+    games = sorted(games, key=lambda game: order.get(game.get("appid"), len(order)))
+    if reranker is None or len(games) < 2:
+        return games
+
+    try:
+        scores = reranker.predict([(query, rerank_text(game)) for game in games], batch_size=len(games))
+    except Exception as e:
+        print(f"재정렬 실패, 벡터 유사도 순서를 사용합니다: {e}")
+        return games
+
+    for game, score in zip(games, scores):
+        game["relevance"] = float(score)
+    # 같은 점수면 Qdrant 순서를 유지합니다 (sorted는 안정 정렬).
+    return sorted(games, key=lambda game: game["relevance"], reverse=True)
+
+
+def estimate_tokens(text: str) -> int:
+    """LLM 토큰 수 근사값 (문자 수 / RAG_CHARS_PER_TOKEN)"""
+    return math.ceil(len(text) / config.RAG_CHARS_PER_TOKEN)
+
+
+def _trim(text: str, max_chars: int) -> str:
+    """max_chars 안에서 문장(없으면 단어) 경계로 자릅니다."""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars + 1]
+    boundary = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if boundary >= max_chars // 2:
+        return cut[:boundary + 1]
+    cut = cut[:max(0, max_chars - 3)]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > 0 else cut) + "..."
+
+
+def _game_header(game: dict) -> str:
+    lines = [f"게임명: {game.get('name', 'N/A')} (AppID: {game.get('appid', 'N/A')})"]
+    for label, key in (("개발사", "developers"), ("배급사", "publishers"), ("장르", "genres")):
+        values = [v for v in (game.get(key) or []) if v]
+        if values:
+            lines.append(f" - {label}: {', '.join(values)}")
+    return "\n".join(lines) + "\n"
+
+
+def pack_context(games: list, token_budget: int = None, max_games: int = None) -> str:
+    """
+    관련도 순으로 정렬된 games를 token_budget 토큰 안의 컨텍스트 문자열로 만듭니다.
+    1. 관련도 순으로 게임 기본 정보(이름, 개발사, 배급사, 장르)를 예산이 허락하는 만큼 넣습니다.
+       가장 관련도가 높은 게임은 예산과 관계없이 항상 포함합니다.
+    2. 남은 예산을 관련도 순으로 각 게임의 설명(최대 RAG_SNIPPET_MAX_CHARS자)에 나눠 줍니다.
+    """
+    token_budget = config.RAG_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    max_games = config.RAG_CONTEXT_MAX_GAMES if max_games is None else max_games
+
+    headers = []
+    used = 0
+    for game in games[:max_games]:
+        header = _game_header(game)
+        cost = estimate_tokens(header + "\n")  # 게임 사이 빈 줄 포함
+        if headers and used + cost > token_budget:
+            break
+        headers.append(header)
+        used += cost
+
+    blocks = []
+    for game, header in zip(games, headers):
+        about = game.get("about") or ""
+        prefix = " - 설명: "
+        remaining_chars = int((token_budget - used) * config.RAG_CHARS_PER_TOKEN) - len(prefix) - 1
+        if about and remaining_chars >= MIN_SNIPPET_CHARS:
+            line = f"{prefix}{_trim(about, min(config.RAG_SNIPPET_MAX_CHARS, remaining_chars))}\n"
+            header += line
+            used += estimate_tokens(line)
+        blocks.append(header)
+
+    return "\n".join(blocks)
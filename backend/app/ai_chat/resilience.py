@@ -0,0 +1,161 @@
+# resilience.py
+# 외부 백엔드(Qdrant, Neo4j, 정형 DB) 호출에 마감 시간, 서킷 브레이커, 헤지 재시도를 적용합니다.
+
+from . import config
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import threading
+import time
+
+# 마감 시간을 넘긴 호출은 이 풀의 스레드에서 계속 실행되더라도 요청은 바로 다음 단계로 넘어갑니다.
+_executor = ThreadPoolExecutor(max_workers=config.BACKEND_CALL_WORKERS, thread_name_prefix="backend-call")
+
+
+class BackendUnavailable(Exception):
+    """백엔드 호출이 실패하거나 마감 시간을 넘겼거나, 서킷이 열려 있어 호출하지 않았을 때 발생합니다."""
+
+    def __init__(self, backend: str, reason: str, message: str):
+        super().__init__(message)
+        self.backend = backend
+        self.reason = reason  # 'open', 'timeout', 'error'
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold번 이어지면 서킷을 열어 reset_timeout초 동안 호출을 건너뜁니다.
+    그 뒤에는 한 번의 시험 호출(half-open)을 허용하고, 성공하면 닫고 실패하면 다시 엽니다.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = config.BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = config.BREAKER_RESET_TIMEOUT_S):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    print(f"[서킷 브레이커] '{self.name}' 백엔드 호출을 {self.reset_timeout:.0f}초 동안 건너뜁니다.")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """백엔드 이름별 서킷 브레이커를 반환합니다. 요청마다 도구가 새로 만들어져도 상태는 프로세스 전체에서 공유됩니다."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_states() -> dict:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.state for breaker in breakers}
+
+
+def _first_result(fn, timeout: float, hedge_after: float = None):
+    """
+    fn()을 풀에서 실행하여 timeout초 안에 나온 결과를 반환합니다.
+    hedge_after가 주어지면 그 시간 안에 끝나지 않을 때 같은 호출을 하나 더 보내고 먼저 성공한 결과를 사용합니다.
+    (읽기 전용이라 여러 번 실행해도 안전한 호출에만 사용합니다.)
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    hedge_at = start + hedge_after if hedge_after and 0 < hedge_after < timeout else None
+    futures = [_executor.submit(fn)]
+    last_error = None
+
+    while futures:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+        done, _ = wait(futures, timeout=wake_at - now, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            futures.remove(future)
+            if future.exception() is None:
+                for other in futures:
+                    other.cancel()
+                return future.result()
+            last_error = future.exception()
+
+        # 첫 호출이 hedge_after 안에 끝나지 않았거나 먼저 실패했으면 헤지 호출을 한 번 보냅니다.
+        if hedge_at is not None and (not futures or time.monotonic() >= hedge_at):
+            futures.append(_executor.submit(fn))
+            hedge_at = None
+
+    for future in futures:
+        future.cancel()
+    if not futures and last_error is not None:
+        raise last_error
+    raise TimeoutError(f"{timeout:.1f}초 안에 응답이 없습니다.")
+
+
+def guarded_call(backend: str, fn, timeout: float, hedge_after: float = None, is_failure=None, probe: bool = False):
+    """
+    서킷 브레이커와 마감 시간을 적용하여 fn()을 호출합니다.
+    서킷이 열려 있으면 호출하지 않고, 실패/시간 초과 시 BackendUnavailable을 발생시켜 호출자가 대체 경로로 넘어가게 합니다.
+    - is_failure(error)가 False를 반환하는 예외(예: 잘못된 SQL)는 백엔드 장애가 아니므로
+      서킷 브레이커에 실패로 기록하지 않고 그대로 다시 발생시킵니다.
+    - probe이면 실패해도 되는 시험 호출로 보고, 서킷이 닫혀 있을 때만 호출하며 결과를 서킷 브레이커에 기록하지 않습니다.
+    """
+    breaker = get_breaker(backend)
+    if not (breaker.state == "closed" if probe else breaker.allow()):
+        raise BackendUnavailable(backend, "open", f"{backend} 서킷이 열려 있어 호출을 건너뜁니다.")
+
+    try:
+        result = _first_result(fn, timeout, hedge_after)
+    except TimeoutError as e:
+        if not probe:
+            breaker.record_failure()
+        raise BackendUnavailable(backend, "timeout", f"{backend} 호출 시간 초과: {e}") from e
+    except Exception as e:
+        if is_failure is not None and not is_failure(e):
+            # 백엔드는 정상적으로 응답했으므로 성공으로 기록합니다 (half-open 시험 호출도 여기서 끝납니다).
+            if not probe:
+                breaker.record_success()
+            raise
+        if not probe:
+            breaker.record_failure()
+        raise BackendUnavailable(backend, "error", f"{backend} 호출 실패: {e}") from e
+
+    if not probe:
+        breaker.record_success()
+    return result
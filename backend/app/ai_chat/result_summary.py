@@ -0,0 +1,48 @@
+# result_summary.py
+# Text-to-SQL 결과를 LLM 프롬프트에 넣을 수 있는 크기로 요약합니다.
+
+from . import config
+from collections import Counter
+import numbers
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def _column_stats(name: str, values: list) -> str:
+    """한 컬럼의 통계를 한 줄로 요약합니다. 숫자형은 최솟값/최댓값/평균, 그 외는 빈도 상위 값을 보여줍니다."""
+    present = [v for v in values if v is not None]
+    nulls = len(values) - len(present)
+    if not present:
+        return f"- {name}: 모두 NULL"
+
+    if all(_is_number(v) for v in present):
+        numeric = [float(v) for v in present]
+        return (
+            f"- {name}: 최소 {min(numeric):g}, 최대 {max(numeric):g}, "
+            f"평균 {sum(numeric) / len(numeric):.2f}, 합계 {sum(numeric):g}, NULL {nulls}개"
+        )
+
+    counts = Counter(str(v)[:50] for v in present)
+    top = ", ".join(f"{value}({count})" for value, count in counts.most_common(5))
+    return f"- {name}: 고유값 {len(counts)}개, 빈도 상위: {top}, NULL {nulls}개"
+
+
+def format_sql_result(columns: list, rows: list, truncated: bool,
+                      max_rows: int = config.SQL_PROMPT_MAX_ROWS) -> str:
+    """
+    쿼리 결과를 프롬프트용 문자열로 변환합니다.
+    결과가 max_rows 이하이면 모든 행을 그대로 보여주고,
+    그보다 많으면 컬럼별 통계와 상위 max_rows개 행만 보여줍니다.
+    """
+    header = f"컬럼: ({', '.join(columns)})" if columns else ""
+    if len(rows) <= max_rows and not truncated:
+        return "\n".join([header] + [str(tuple(row)) for row in rows]).strip()
+
+    total = f"{len(rows)}행 초과 (통계는 처음 {len(rows)}행 기준)" if truncated else f"{len(rows)}행"
+    stats = [_column_stats(name, [row[i] for row in rows]) for i, name in enumerate(columns)]
+    top_rows = [str(tuple(row)) for row in rows[:max_rows]]
+    return "\n".join(
+        [f"전체 결과: {total}", "컬럼별 통계:", *stats, header, f"상위 {len(top_rows)}개 행:", *top_rows]
+    )
@@ -0,0 +1,112 @@
+# runtime.py
+# 프로세스 전체에서 공유하는 SteamGameAgent를 백그라운드에서 미리 준비(warm-up)합니다.
+# torch / sentence_transformers / neo4j / qdrant_client / google.generativeai 같은 무거운 모듈은
+# 이 모듈을 import할 때가 아니라 warm-up 스레드에서 처음 로드됩니다.
+
+from . import config
+import threading
+import time
+
+COLD, WARMING, READY, FAILED = "cold", "warming", "ready", "failed"
+
+
+class AgentRuntime:
+    """공유 에이전트의 준비 상태를 관리합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._thread = None
+        self.agent = None
+        self.state = COLD
+        self.error = None
+        self.components = {}
+        self.warmup_seconds = None
+
+    def start_warmup(self):
+        """warm-up 스레드를 시작합니다. 이미 시작했거나 준비가 끝났으면 아무 것도 하지 않습니다."""
+        with self._lock:
+            if self.state in (WARMING, READY):
+                return
+            self.state = WARMING
+            self.error = None
+            self._finished.clear()
+            self._thread = threading.Thread(target=self._warmup, name="agent-warmup", daemon=True)
+            self._thread.start()
+
+    def _warmup(self):
+        start = time.perf_counter()
+        try:
+            from .agent import SteamGameAgent
+
+            agent = SteamGameAgent()
+            components = self._check_components(agent.tools)
+        except Exception as e:
+            with self._lock:
+                self.state = FAILED
+                self.error = str(e)
+            self._finished.set()
+            print(f"에이전트 warm-up 실패: {e}")
+            return
+
+        with self._lock:
+            self.agent = agent
+            self.components = components
+            self.warmup_seconds = time.perf_counter() - start
+            self.state = READY
+        self._finished.set()
+        print(f"에이전트 warm-up 완료 ({self.warmup_seconds:.1f}초): {components}")
+
+    @staticmethod
+    def _check_components(tools) -> dict:
+        """임베딩 모델을 한 번 실행하고 각 백엔드 연결을 확인합니다. 연결 실패는 기록만 하고 준비 상태를 막지 않습니다."""
+        components = {}
+        checks = {
+            # 첫 encode 호출에서 발생하는 지연(커널 초기화 등)을 요청이 아닌 warm-up에서 치르도록 합니다.
+            # (EMBEDDING_BACKEND=server이면 임베딩 서버 연결 확인)
+            "embedding_model": lambda: tools.embedding_model.encode("warm-up"),
+            "reranker": lambda: tools.reranker and tools.reranker.predict([("warm-up", "warm-up")]),
+            "neo4j": lambda: tools.neo4j_driver.verify_connectivity(),
+            "qdrant": lambda: tools.qdrant_client.get_collection(config.QDRANT_COLLECTION_NAME),
+            "structured": lambda: tools.structured_backend.execute("SELECT 1", max_rows=1),
+        }
+        for name, check in checks.items():
+            try:
+                check()
+                components[name] = "ok"
+            except Exception as e:
+                components[name] = f"error: {e}"
+        return components
+
+    def get_agent(self, timeout: float = config.AGENT_READY_TIMEOUT_S):
+        """
+        준비된 공유 에이전트를 반환합니다. warm-up 중이면 timeout초까지 기다리고,
+        이전 warm-up이 실패했으면 다시 시도합니다.
+        """
+        if self.state != READY:
+            self.start_warmup()
+            self._finished.wait(timeout)
+        with self._lock:
+            if self.state != READY:
+                raise RuntimeError(f"Steam 에이전트가 아직 준비되지 않았습니다 (상태: {self.state}, {self.error or ''})")
+            return self.agent
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "status": self.state,
+                "error": self.error,
+                "components": dict(self.components),
+                "warmup_seconds": self.warmup_seconds,
+            }
+
+    def close(self):
+        with self._lock:
+            agent, self.agent = self.agent, None
+            self.state = COLD
+            self._finished.clear()
+        if agent is not None:
+            agent.close_connections()
+
+
+runtime = AgentRuntime()
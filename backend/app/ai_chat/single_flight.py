@@ -0,0 +1,93 @@
+# single_flight.py
+# 같은 키의 작업이 동시에 여러 번 요청되면 한 번만 실행하고 결과를 공유합니다.
+
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # 합류한 요청(follower)들의 진행 상황 수신자
+        self.listeners = []
+
+
+def _ignore(_event):
+    pass
+
+
+class SingleFlight:
+    """
+    키별로 진행 중인 작업을 하나만 유지합니다.
+    먼저 도착한 요청(leader)이 작업을 실행하고, 그동안 같은 키로 들어온 요청(follower)은
+    작업이 끝나기를 기다렸다가 같은 결과를 받습니다.
+    share_errors가 False이면 leader의 작업이 실패했을 때 follower는 실패를 공유하지 않고 각자 다시 실행합니다.
+    timeout이 주어지면 follower는 그 시간까지만 기다리고, 그때까지 끝나지 않으면 합류를 풀고 직접 실행합니다.
+    작업이 끝나면 키가 제거되므로 결과를 캐시하지는 않습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "retried": 0, "timed_out": 0}
+
+    def do(self, key, fn, listener=None, share_errors=True, timeout=None):
+        """
+        key에 대해 fn(publish)을 실행하거나, 이미 실행 중이면 그 결과를 기다려 반환합니다.
+        fn은 진행 상황을 follower들에게 전달하는 publish(event) 함수를 인자로 받으며,
+        follower의 listener가 주어지면 합류한 시점 이후에 publish된 이벤트를 받습니다.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                if listener is not None:
+                    call.listeners.append(listener)
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self._stats["timed_out"] += 1
+                    if listener is not None and listener in call.listeners:
+                        call.listeners.remove(listener)
+                return fn(_ignore)
+            if call.error is not None and not share_errors:
+                with self._lock:
+                    self._stats["retried"] += 1
+                # 이 요청이 직접 실행하므로 진행 상황은 호출자의 컨텍스트로 바로 전달됩니다.
+                return fn(_ignore)
+        else:
+            try:
+                call.result = fn(lambda event: self._publish(call, event))
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _publish(self, call: _Call, event):
+        with self._lock:
+            listeners = list(call.listeners)
+        for listener in listeners:
+            listener(event)
+
+    def stats(self) -> dict:
+        """호출 수, 실제 실행 수, 합류(coalesced) 수, 실패 후 재실행 수, 대기 시간 초과로 직접 실행한 수와 합류 비율을 반환합니다."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["coalescing_ratio"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -0,0 +1,266 @@
+# sql_guard.py
+# LLM이 생성한 SQL을 실행하기 전에 검사하는 가드
+# - 단일 읽기 전용 SELECT 문만 허용하고, FROM/JOIN 대상은 허용된 테이블(과 CTE, 서브쿼리)로 제한
+# - EXPLAIN 실행 계획의 예상 행 수/비용이 임계값을 넘으면 거부
+# - 검사 결과별 수와 예상 비용은 /metrics로 노출됩니다.
+
+from . import config
+from .aggregate_tables import table_names as aggregate_table_names
+from .resilience import guarded_call
+from ..telemetry import SQL_GUARD_CHECKS, SQL_GUARD_PLAN_COST
+import re
+import threading
+
+# 큰따옴표를 식별자로, 백슬래시를 일반 문자로 읽는 방언 (MySQL 외)
+_ANSI_DIALECTS = {"duckdb", "sqlite"}
+# DuckDB/PostgreSQL 달러 인용 문자열 시작 ($$ 또는 $tag$)
+_DOLLAR_QUOTE = re.compile(r"\$([A-Za-z_]\w*)?\$")
+_WORD = re.compile(r"[A-Za-z_]+")
+# 테이블 참조 검사용 토큰: 식별자, 숫자, 그 외 기호 한 글자 (인용 식별자는 _normalize에서 벗겨집니다)
+_TOKEN = re.compile(r"[A-Za-z_][\w$]*|\d+(?:\.\d+)?|\S")
+# WITH 절의 CTE 이름 ("name AS (" 또는 "name(col, ...) AS (")
+_CTE_NAME = re.compile(r"\b([A-Za-z_]\w*)\s*(?:\([^()]*\)\s*)?AS\s*\(", re.IGNORECASE)
+# FROM 절 목록이 끝나는 키워드
+_FROM_LIST_END = {
+    "WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "WINDOW", "QUALIFY",
+    "UNION", "INTERSECT", "EXCEPT", "FETCH",
+}
+# 스키마를 붙여 써도 되는 이름 (MySQL 데이터베이스, DuckDB 기본 스키마)
+_ALLOWED_QUALIFIERS = {config.DB_NAME.lower(), "main"}
+
+# 읽기 전용 SELECT에 나타나면 안 되는 키워드/함수
+FORBIDDEN_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "MERGE", "UPSERT",
+    "CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME",
+    "GRANT", "REVOKE", "SET", "CALL", "DO", "HANDLER", "LOCK", "UNLOCK",
+    "LOAD", "INTO", "OUTFILE", "DUMPFILE", "ATTACH", "DETACH", "COPY", "EXPORT", "IMPORT", "PRAGMA", "INSTALL",
+    "SLEEP", "BENCHMARK", "GET_LOCK", "LOAD_FILE",
+    # DuckDB의 파일/메타데이터/임의 SQL 실행 테이블 함수
+    "GLOB", "SNIFF_CSV", "QUERY", "QUERY_TABLE", "ICEBERG_SCAN", "DELTA_SCAN",
+}
+# DuckDB의 파일 읽기 함수(read_csv, read_parquet, parquet_scan, parquet_metadata 등)와 FROM '파일경로' 형태의 직접 파일 조회
+_FILE_FUNCTION_PREFIXES = ("READ_", "PARQUET_", "SCAN_")
+_FILE_IN_FROM = re.compile(r"\b(FROM|JOIN)\s*(\(\s*)?'", re.IGNORECASE)
+
+
+class SQLRejected(Exception):
+    """가드가 SQL 실행을 거부했을 때 발생합니다. reason은 'statement' 또는 'cost'입니다."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _normalize(sql: str, dialect: str) -> str:
+    """
+    방언의 어휘 규칙대로 SQL을 한 번 훑어 문자열 리터럴은 '', 주석은 공백으로 바꾸고,
+    인용 식별자("name", `name`)는 따옴표를 벗긴 이름으로 바꿉니다.
+    MySQL은 백슬래시 이스케이프와 # 주석을 쓰고 큰따옴표가 문자열이지만,
+    DuckDB는 '' 이스케이프만 쓰고(E'...' 제외) 큰따옴표가 식별자이며 블록 주석이 중첩됩니다.
+    """
+    ansi = dialect.lower() in _ANSI_DIALECTS
+    duckdb = dialect.lower() == "duckdb"
+    out = []
+    i, n = 0, len(sql)
+
+    def skip_quoted(start: int, quote: str, backslash: bool) -> int:
+        # 닫는 따옴표 다음 위치를 반환합니다. 따옴표 두 번은 이스케이프입니다.
+        j = start + 1
+        while j < n:
+            if backslash and sql[j] == "\\":
+                j += 2
+            elif sql[j] == quote:
+                if j + 1 < n and sql[j + 1] == quote:
+                    j += 2
+                else:
+                    return j + 1
+            else:
+                j += 1
+        raise SQLRejected("statement", "닫히지 않은 문자열 또는 식별자가 있습니다.")
+
+    def identifier(name: str) -> str:
+        # 인용 식별자도 이름 그대로 검사되도록 단어 문자만 남깁니다 ("read_csv"(...) 등).
+        name = re.sub(r"\W", "_", name) or "_"
+        return name if not name[0].isdigit() else "_" + name
+
+    while i < n:
+        ch = sql[i]
+        if sql.startswith("/*", i):
+            if not ansi and sql.startswith("/*!", i):
+                raise SQLRejected("statement", "MySQL 실행 주석(/*! ... */)은 허용되지 않습니다.")
+            depth, i = 1, i + 2
+            while i < n and depth:
+                if duckdb and sql.startswith("/*", i):
+                    depth, i = depth + 1, i + 2
+                elif sql.startswith("*/", i):
+                    depth, i = depth - 1, i + 2
+                else:
+                    i += 1
+            if depth:
+                raise SQLRejected("statement", "닫히지 않은 주석이 있습니다.")
+            out.append(" ")
+        elif (sql.startswith("--", i) and (ansi or i + 2 >= n or sql[i + 2].isspace())) or (ch == "#" and not ansi):
+            # MySQL의 --는 뒤에 공백이 있어야 주석입니다 (1--1은 1 - -1).
+            end = sql.find("\n", i)
+            i = n if end < 0 else end
+            out.append(" ")
+        elif ch == "'" or (not ansi and ch == '"'):
+            i = skip_quoted(i, ch, backslash=not ansi)
+            out.append("''")
+        elif duckdb and ch in "Ee" and sql.startswith("'", i + 1) and not (i and (sql[i - 1].isalnum() or sql[i - 1] == "_")):
+            # DuckDB의 E'...' 문자열은 백슬래시 이스케이프를 씁니다.
+            i = skip_quoted(i + 1, "'", backslash=True)
+            out.append("''")
+        elif (ansi and ch == '"') or (not ansi and ch == "`"):
+            end = skip_quoted(i, ch, backslash=False)
+            out.append(identifier(sql[i + 1:end - 1].replace(ch * 2, ch)))
+            i = end
+        elif duckdb and ch == "$" and _DOLLAR_QUOTE.match(sql, i):
+            tag = _DOLLAR_QUOTE.match(sql, i).group(0)
+            end = sql.find(tag, i + len(tag))
+            if end < 0:
+                raise SQLRejected("statement", "닫히지 않은 문자열 또는 식별자가 있습니다.")
+            i = end + len(tag)
+            out.append("''")
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _check_table_references(statement: str, allowed_tables: set):
+    """
+    FROM/JOIN 뒤(쉼표로 이어진 FROM 목록 포함)에 오는 대상이 allowed_tables, 같은 문장의 CTE,
+    또는 괄호로 감싼 서브쿼리인지 검사합니다. 테이블 함수 호출(glob(...) 등)은 허용하지 않습니다.
+    EXTRACT(YEAR FROM ...)처럼 함수 인자 안의 FROM은 테이블 참조가 아니므로 건너뜁니다.
+    """
+    allowed = {name.lower() for name in allowed_tables}
+    allowed.update(name.lower() for name in _CTE_NAME.findall(statement))
+    tokens = [token.upper() for token in _TOKEN.findall(statement)]
+
+    # 괄호 스택: True이면 서브쿼리 괄호, False이면 함수 호출/식 괄호
+    stack = []
+    # FROM 목록을 읽는 중인 괄호 깊이 (없으면 None)
+    from_depth = None
+
+    def in_query() -> bool:
+        return not stack or stack[-1]
+
+    def check_reference(i: int):
+        if i >= len(tokens):
+            raise SQLRejected("statement", "FROM 절의 대상이 없습니다.")
+        if tokens[i] == "(":
+            # 서브쿼리만 허용합니다 (괄호 안은 이후 토큰 검사에서 다시 확인됩니다).
+            if i + 1 >= len(tokens) or tokens[i + 1] not in ("SELECT", "WITH", "("):
+                raise SQLRejected("statement", "FROM 절에는 테이블 또는 서브쿼리만 사용할 수 있습니다.")
+            return
+        parts = [tokens[i]]
+        while i + 2 < len(tokens) and tokens[i + 1] == ".":
+            parts.append(tokens[i + 2])
+            i += 2
+        if i + 1 < len(tokens) and tokens[i + 1] == "(":
+            raise SQLRejected("statement", f"테이블 함수는 허용되지 않습니다: {'.'.join(parts).lower()}")
+        name = parts[-1].lower()
+        qualifiers = [part.lower() for part in parts[:-1]]
+        if name not in allowed or any(q not in _ALLOWED_QUALIFIERS for q in qualifiers):
+            raise SQLRejected("statement", f"조회할 수 없는 테이블입니다: {'.'.join(parts).lower()}")
+
+    for i, token in enumerate(tokens):
+        if token == "(":
+            stack.append(i + 1 < len(tokens) and tokens[i + 1] in ("SELECT", "WITH"))
+        elif token == ")":
+            if from_depth is not None and from_depth == len(stack):
+                from_depth = None
+            if stack:
+                stack.pop()
+        elif token in ("FROM", "JOIN") and in_query():
+            from_depth = len(stack)
+            check_reference(i + 1)
+        elif token == "," and from_depth == len(stack):
+            check_reference(i + 1)
+        elif token in _FROM_LIST_END and from_depth == len(stack):
+            from_depth = None
+
+
+def validate_read_only_select(sql: str, allowed_tables=None, dialect: str = "MySQL") -> str:
+    """
+    SQL이 단일 읽기 전용 SELECT(또는 WITH ... SELECT) 문인지 검사하고,
+    끝의 세미콜론을 제거한 문장을 반환합니다. 허용되지 않으면 SQLRejected를 발생시킵니다.
+    allowed_tables가 주어지면 FROM/JOIN 대상도 그 테이블로 제한합니다.
+    dialect는 문자열/주석/인용 식별자를 읽는 규칙을 정합니다 (backend.dialect).
+    """
+    stripped = _normalize(sql, dialect).strip()
+    if _FILE_IN_FROM.search(stripped):
+        raise SQLRejected("statement", "파일을 직접 조회하는 쿼리는 허용되지 않습니다.")
+    statement = stripped.rstrip(";").strip()
+    if not statement:
+        raise SQLRejected("statement", "빈 SQL 문입니다.")
+    if ";" in statement:
+        raise SQLRejected("statement", "여러 개의 SQL 문은 허용되지 않습니다.")
+
+    words = [w.upper() for w in _WORD.findall(statement)]
+    if not words or words[0] not in ("SELECT", "WITH"):
+        raise SQLRejected("statement", "SELECT 문만 실행할 수 있습니다.")
+
+    forbidden = FORBIDDEN_KEYWORDS.intersection(words)
+    forbidden.update(w for w in words if w.startswith(_FILE_FUNCTION_PREFIXES))
+    if forbidden:
+        raise SQLRejected("statement", f"허용되지 않는 키워드가 포함되어 있습니다: {', '.join(sorted(forbidden))}")
+    if allowed_tables is not None:
+        _check_table_references(statement, allowed_tables)
+
+    return sql.strip().rstrip(";").strip()
+
+
+class SQLGuard:
+    """
+    구문 검사와 EXPLAIN 기반 비용 검사를 수행하고, 통과/거부 횟수를 집계합니다.
+    backend가 explain()을 제공하지 않으면(예: DuckDB) 구문 검사만 수행합니다.
+    allowed_tables를 주지 않으면 원본 테이블과 요약 테이블만 조회할 수 있습니다.
+    """
+
+    def __init__(self, backend, max_rows: int = config.SQL_GUARD_MAX_ROWS, max_cost: float = config.SQL_GUARD_MAX_COST,
+                 allowed_tables=None):
+        self.backend = backend
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.allowed_tables = set(allowed_tables or [config.STRUCTURED_TABLE_NAME, *aggregate_table_names()])
+        self._lock = threading.Lock()
+        self._counts = {"accepted": 0, "rejected_statement": 0, "rejected_cost": 0}
+
+    def _count(self, key: str):
+        SQL_GUARD_CHECKS.labels(key).inc()
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def check(self, sql: str, probe: bool = False) -> str:
+        """
+        SQL을 검사하여 실행 가능한 문장을 반환합니다. 거부되면 SQLRejected를 발생시킵니다.
+        probe이면 EXPLAIN 실패를 서킷 브레이커에 기록하지 않습니다 (요약 테이블 재작성 시도용).
+        """
+        try:
+            statement = validate_read_only_select(
+                sql, self.allowed_tables, dialect=getattr(self.backend, "dialect", "MySQL"),
+            )
+            explain = getattr(self.backend, "explain", None)
+            if explain is not None:
+                # EXPLAIN도 DB 호출이므로 실행과 같은 마감 시간과 서킷 브레이커를 적용합니다.
+                estimated_rows, cost = guarded_call(
+                    "structured", lambda: explain(statement), timeout=config.SQL_STATEMENT_TIMEOUT_MS / 1000 + 2,
+                    is_failure=getattr(self.backend, "is_unavailable", None), probe=probe,
+                )
+                SQL_GUARD_PLAN_COST.observe(cost)
+                if estimated_rows > self.max_rows or cost > self.max_cost:
+                    raise SQLRejected(
+                        "cost",
+                        f"예상 실행 비용이 너무 큽니다 (예상 행 수 {estimated_rows:,.0f}, 비용 {cost:,.0f}).",
+                    )
+        except SQLRejected as e:
+            self._count(f"rejected_{e.reason}")
+            raise
+        self._count("accepted")
+        return statement
@@ -2,14 +2,29 @@
 # MySQL(Text-to-SQL) 및 RAG(Qdrant+Neo4j) 쿼리를 실행하는 도구 모음
 
 from . import config
+from .structured_backend import create_structured_backend
+from .result_summary import format_sql_result
+from .answer_templates import format_answer
+from .sql_guard import SQLGuard, SQLRejected
+from . import aggregate_tables
+from . import events
+from .llm_scheduler import ScheduledModel, LLMUnavailable
+from .resilience import guarded_call, BackendUnavailable
+from .embedding_service import create_embedding_model
+from .rag_context import create_reranker, rerank, pack_context
+from ..telemetry import span, traced
 import google.generativeai as genai
-from sqlalchemy import create_engine, text
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, Query
 from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
-import torch
+import math
 import re
 import json
+import time
+
+
+class ToolError(Exception):
+    """도구 실행이 실패했을 때 사용자에게 보여줄 메시지와 함께 발생합니다."""
+
 
 class SteamToolbelt:
     """
@@ -17,32 +32,48 @@ class SteamToolbelt:
     """
 
     def __init__(self):
-        self.llm = genai.GenerativeModel(config.GEMINI_MODEL_NAME)
+        # 모든 Gemini 호출은 중앙 스케줄러의 예산/우선순위에 따라 실행됩니다.
+        self.llm = ScheduledModel(genai.GenerativeModel(config.GEMINI_MODEL_NAME))
         
-        # MySQL 연결
-        db_uri = f"mysql+pymysql://{config.DB_USER}:{config.DB_PASSWORD}@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
-        self.db_engine = create_engine(db_uri)
+        # 정형 데이터 백엔드 (MySQL 또는 DuckDB, config.STRUCTURED_BACKEND로 선택)
+        self.structured_backend = create_structured_backend()
+        # LLM이 생성한 SQL은 가드를 통과한 경우에만 실행합니다.
+        self.sql_guard = SQLGuard(self.structured_backend)
+        # 요약 테이블에 실제 적재된 지표별 상위 N과 조회 시각 (_aggregate_top_n 참고)
+        self._top_n = {}
+        self._top_n_checked = None
         
         # Neo4j 연결
         self.neo4j_driver = GraphDatabase.driver(
             config.NEO4J_URI, 
-            auth=(config.NEO4J_USER, config.NEO4J_PASSWORD)
+            auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
+            connection_timeout=config.NEO4J_TIMEOUT_S,
         )
         
         # Qdrant 연결
-        self.qdrant_client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
+        self.qdrant_client = QdrantClient(
+            host=config.QDRANT_HOST, port=config.QDRANT_PORT, timeout=math.ceil(config.QDRANT_TIMEOUT_S)
+        )
         
-        # 임베딩 모델
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.embedding_model = SentenceTransformer(config.EMBEDDING_MODEL_NAME, device=device)
+        # 임베딩 모델 (EMBEDDING_BACKEND=server이면 호스트 공유 임베딩 서버의 클라이언트)
+        self.embedding_model = create_embedding_model()
+        # 후보군 재정렬용 cross-encoder (RERANK_ENABLED=false이면 None)
+        self.reranker = create_reranker()
         
     # TEXT-TO-SQL 관련 메서드
-    def _create_final_sql_answer(self, original_query: str, db_result: list) -> str:
+    @traced("sql_answer")
+    def _create_final_sql_answer(self, original_query: str, columns: list, db_result: list, truncated: bool = False) -> str:
         """DB 결과를 바탕으로 LLM을 통해 자연스러운 최종 답변을 생성합니다."""
         if not db_result:
             return "해당 조건에 맞는 데이터를 찾을 수 없습니다."
         
-        result_str = "\n".join([str(row) for row in db_result])
+        # 값 하나/한 행/작은 표처럼 문장으로 옮기기만 하면 되는 결과는 LLM을 호출하지 않습니다.
+        templated = format_answer(original_query, columns, db_result, truncated)
+        if templated is not None:
+            return templated
+        
+        # 결과가 크면 컬럼 통계와 상위 행만 전달하여 프롬프트 크기를 제한합니다.
+        result_str = format_sql_result(columns, db_result, truncated)
         
         prompt = f"""
         당신의 유일한 임무는 주어진 데이터베이스 결과를 바탕으로 사용자의 질문에 대한 사실 기반의 답변을 '완전한 문장'으로 만드는 것입니다.
@@ -68,15 +99,22 @@ class SteamToolbelt:
         """
         
         try:
-            response = self.llm.generate_content(prompt)
+            events.status("sql_answer", "조회 결과로 답변 작성 중")
+            response = self.llm.generate_content(prompt, stream=events.streaming())
             return response.text.strip()
+        except LLMUnavailable:
+            raise
         except Exception as e:
             return f"답변 생성 중 오류 발생: {e}\n원본 데이터: {result_str}"
 
     def query_structured_data(self, query: str) -> str:
-        """사용자의 질문을 SQL로 변환, 실행하고, 그 결과를 자연스러운 문장으로 변환합니다."""
+        """
+        사용자의 질문을 SQL로 변환, 실행하고, 그 결과를 자연스러운 문장으로 변환합니다.
+        실패하면 ToolError를, LLM 예산 초과나 DB 장애처럼 잠시 후 다시 시도할 수 있는 경우에는
+        LLMUnavailable/BackendUnavailable을 그대로 발생시킵니다.
+        """
         prompt = f"""
-        당신은 MySQL 전문가입니다. 사용자의 질문을 `{config.STRUCTURED_TABLE_NAME}` 테이블에 대한 단일 SQL 쿼리로 변환하세요.
+        당신은 {self.structured_backend.dialect} 전문가입니다. 사용자의 질문을 `{config.STRUCTURED_TABLE_NAME}` 테이블에 대한 단일 SQL 쿼리로 변환하세요.
 
         - 테이블 스키마 정보: 이 테이블은 appid, name, peak_ccu, required_age, price, windows, mac, linux, metacritic_score, positive, negative, achievements, recommendations, average_playtime_forever 등의 컬럼을 포함합니다.
 
@@ -88,7 +126,9 @@ class SteamToolbelt:
         """
         
         try:
-            response = self.llm.generate_content(prompt)
+            events.status("sql_generation", "질문을 SQL로 변환 중")
+            with span("sql_generation"):
+                response = self.llm.generate_content(prompt)
             sql_query = response.text.strip()
             
             match = re.search(r"```sql\n(.*?)\n```", sql_query, re.DOTALL)
@@ -97,19 +137,72 @@ class SteamToolbelt:
             if not clean_sql.endswith(';'):
                 clean_sql += ';'            
             
-            with self.db_engine.connect() as connection:
-                result = connection.execute(text(clean_sql))
-                rows = result.fetchall()
+            events.status("sql_execution", "데이터베이스 조회 중")
+            with span("sql_execution"):
+                columns, rows, truncated = self._execute_sql(clean_sql)
             
-            return self._create_final_sql_answer(query, rows)
+            return self._create_final_sql_answer(query, columns, rows, truncated)
         
+        except SQLRejected as e:
+            raise ToolError(f"생성된 쿼리를 안전하게 실행할 수 없어 처리하지 않았습니다: {e}") from e
+        except (LLMUnavailable, BackendUnavailable):
+            raise
         except Exception as e:
-            return f"Text-to-SQL 처리 중 오류 발생: {e}"
+            raise ToolError(f"Text-to-SQL 처리 중 오류 발생: {e}") from e
+
+    def _execute_sql(self, sql: str):
+        """
+        SQL을 실행합니다. 요약 테이블로 답할 수 있는 쿼리는 요약 테이블을 읽도록 바꾸어 실행하고,
+        요약 테이블이 없거나 조회에 실패하면 원래 쿼리를 가드 검사 후 실행합니다.
+        """
+        rewritten = aggregate_tables.rewrite(sql, self._aggregate_top_n()) if config.AGGREGATE_REWRITE_ENABLED else None
+        if rewritten:
+            # 요약 테이블이 없는 DB일 수 있으므로 시험 호출로 실행하여 실패해도 서킷 브레이커에 반영하지 않습니다.
+            try:
+                return self._run_sql(self.sql_guard.check(rewritten, probe=True), probe=True)
+            except Exception as e:
+                print(f"요약 테이블 조회 실패, 원본 테이블을 조회합니다: {e}")
+
+        return self._run_sql(self.sql_guard.check(sql))
+
+    def _aggregate_top_n(self) -> dict:
+        """
+        상위 N개 요약 테이블에 실제 적재된 지표별 N을 DB에서 읽어 AGGREGATE_TOP_N_REFRESH_S 동안 재사용합니다.
+        요약 테이블이 없으면 빈 dict를 반환하여 상위 N개 질문은 원본 테이블을 조회하게 합니다.
+        """
+        now = time.monotonic()
+        if self._top_n_checked is None or now - self._top_n_checked >= config.AGGREGATE_TOP_N_REFRESH_S:
+            try:
+                _, rows, _ = self._run_sql(aggregate_tables.top_n_query(), probe=True)
+                self._top_n = {metric: int(top_n) for metric, top_n in rows if top_n is not None}
+            except Exception as e:
+                print(f"요약 테이블 상위 N 조회 실패: {e}")
+                self._top_n = {}
+            self._top_n_checked = now
+        return self._top_n
+
+    def _run_sql(self, sql: str, probe: bool = False):
+        """
+        정형 DB 호출에 서킷 브레이커를 적용합니다. DB가 계속 실패하면 바로 오류 응답으로 넘어갑니다.
+        잘못된 SQL이나 실행 시간 초과처럼 쿼리 자체의 오류는 서킷 브레이커에 반영하지 않고 그대로 발생시킵니다.
+        """
+        return guarded_call(
+            "structured",
+            lambda: self.structured_backend.execute(sql),
+            # 문장 실행 시간 제한은 DB가 적용하고, 여기서는 연결 지연까지 포함한 여유를 둡니다.
+            timeout=config.SQL_STATEMENT_TIMEOUT_MS / 1000 + 2,
+            is_failure=getattr(self.structured_backend, "is_unavailable", None),
+            probe=probe,
+        )
 
     # RAG 관련 메서드 
     def query_unstructured_data(self, query: str) -> str:
-        """RAG 파이프라인을 실행하여 비정형 데이터를 조회합니다 (Neo4j 포함)."""
+        """
+        RAG 파이프라인을 실행하여 비정형 데이터를 조회합니다 (Neo4j 포함).
+        실패하면 ToolError를, LLM 예산 초과 시에는 LLMUnavailable을 발생시킵니다.
+        """
         try:
+            events.status("rag_decompose", "질문 분석 중")
             decomposed_str = self._decompose_query_for_rag(query)
             decomposed_json = {}
             
@@ -122,6 +215,7 @@ class SteamToolbelt:
                 # 쿼리 분해 실패. 원본 쿼리를 시맨틱 검색에 사용
                 decomposed_json = {'entities': [], 'semantic_query': query}            
             
+            events.status("retrieval", "관련 게임 검색 중")
             retrieved_data = self._hybrid_retrieval_with_neo4j(decomposed_json)
             
             if not retrieved_data:
@@ -130,12 +224,16 @@ class SteamToolbelt:
             for game in retrieved_data:
                 game['about'] = game.get('about', '설명 정보 없음')
             
+            events.status("final_answer", f"검색된 게임 {len(retrieved_data)}개로 답변 작성 중")
             final_answer = self._generate_final_answer(query, retrieved_data)
             return final_answer
         
+        except LLMUnavailable:
+            raise
         except Exception as e:
-            return f"RAG 처리 중 오류 발생: {e}"
+            raise ToolError(f"RAG 처리 중 오류 발생: {e}") from e
 
+    @traced("rag_decompose")
     def _decompose_query_for_rag(self, query: str) -> str:
         """LLM을 사용하여 쿼리를 엔티티와 시맨틱 쿼리로 분해합니다."""
         prompt = f"""
@@ -157,6 +255,7 @@ class SteamToolbelt:
         response = self.llm.generate_content(prompt)
         return response.text
 
+    @traced("retrieval")
     def _hybrid_retrieval_with_neo4j(self, decomposed_json: dict) -> list:
         """
         Qdrant으로 벡터 유사도 검색을 통해 후보군을 찾고,
@@ -166,13 +265,26 @@ class SteamToolbelt:
         entities = decomposed_json.get('entities', [])
         
         # Qdrant 벡터 검색 (의미 유사도 기반 후보군 생성)
-        query_vector = self.embedding_model.encode(semantic_query).tolist()
+        with span("embedding"):
+            query_vector = self.embedding_model.encode(semantic_query).tolist()
         
-        qdrant_hits = self.qdrant_client.search(
-            collection_name=config.QDRANT_COLLECTION_NAME,
-            query_vector=query_vector,
-            limit=20  # 초기 후보군 수
-        )
+        # 읽기 전용 검색이므로 느린 응답에는 헤지 요청을 보낼 수 있습니다.
+        try:
+            with span("qdrant_search"):
+                qdrant_hits = guarded_call(
+                    "qdrant",
+                    lambda: self.qdrant_client.search(
+                        collection_name=config.QDRANT_COLLECTION_NAME,
+                        query_vector=query_vector,
+                        limit=config.RAG_CANDIDATE_LIMIT  # 초기 후보군 수
+                    ),
+                    timeout=config.QDRANT_TIMEOUT_S,
+                    hedge_after=config.QDRANT_HEDGE_AFTER_S,
+                )
+        except BackendUnavailable as e:
+            # 후보군을 만들 수 없으므로 검색 결과 없음으로 처리합니다.
+            print(f"Qdrant 검색 실패: {e}")
+            return []
         
         if not qdrant_hits:
             # Qdrant 검색 결과가 없음
@@ -182,89 +294,96 @@ class SteamToolbelt:
         
         # Neo4j 그래프 필터링 및 컨텍스트 강화        
         try:
-            with self.neo4j_driver.session() as session:
-                # 엔티티 기반 매치 조건 생성
-                match_clauses = []
-                params = {"appids": candidate_appids}
+            # 엔티티 기반 매치 조건 생성
+            match_clauses = []
+            # 재정렬할 수 있도록 후보군 전체의 정보를 가져옵니다.
+            params = {"appids": candidate_appids, "limit": len(candidate_appids)}
+            
+            for i, entity in enumerate(entities):
+                etype = entity.get("type", "").lower()
+                evalue = entity.get("value", "")
                 
-                for i, entity in enumerate(entities):
-                    etype = entity.get("type", "").lower()
-                    evalue = entity.get("value", "")
+                if etype and evalue:
+                    node_label = etype.capitalize()
+                    param_name = f"value{i}"
                     
-                    if etype and evalue:
-                        node_label = etype.capitalize()
-                        param_name = f"value{i}"
-                        
-                        # Game 노드는 양쪽 방향 연결 가능
-                        if node_label.lower() == "game":
-                            match_clauses.append(
-                                f"MATCH (g:Game {{name: ${param_name}}})"
-                            )
-                        else:
-                            # Developer, Publisher, Genre, Category 등은 단방향
-                            match_clauses.append(
-                                f"MATCH (g:Game)-->(:{node_label} {{name: ${param_name}}})"
-                            )
-                        
-                        params[param_name] = evalue
-                
-                # Qdrant 후보군으로 필터링
-                where_clause = "WHERE g.appid IN $appids"
-                
-                # 관계 정보 수집을 위한 옵션널 매치
-                optional_matches = [
-                    "OPTIONAL MATCH (g)-->(d:Developer)",
-                    "OPTIONAL MATCH (g)-->(p:Publisher)",
-                    "OPTIONAL MATCH (g)-->(gn:Genre)",
-                    "OPTIONAL MATCH (g)-->(c:Category)"
-                ]
-                
-                # 반환 절
-                return_clause = """
-                RETURN 
-                    g.appid AS appid, 
-                    g.name AS name, 
-                    g.about AS about,
-                    COLLECT(DISTINCT d.name) AS developers,
-                    COLLECT(DISTINCT p.name) AS publishers,
-                    COLLECT(DISTINCT gn.name) AS genres,
-                    COLLECT(DISTINCT c.name) AS categories
-                LIMIT 5
-                """
-                
-                # 최종 Neo4j Cypher 쿼리 구성
-                if match_clauses:
-                    # 엔티티 조건이 있는 경우
-                    full_query = (
-                        "MATCH (g:Game)\n" +
-                        where_clause + "\n" +
-                        "\n".join(match_clauses) + "\n" +
-                        "\n".join(optional_matches) + "\n" +
-                        return_clause
-                    )
+                    # Game 노드는 양쪽 방향 연결 가능
+                    if node_label.lower() == "game":
+                        match_clauses.append(
+                            f"MATCH (g:Game {{name: ${param_name}}})"
+                        )
+                    else:
+                        # Developer, Publisher, Genre, Category 등은 단방향
+                        match_clauses.append(
+                            f"MATCH (g:Game)-->(:{node_label} {{name: ${param_name}}})"
+                        )
                     
-                else:
-                    # 엔티티 조건이 없는 경우 (순수 의미 검색)
-                    full_query = (
-                        "MATCH (g:Game)\n" +
-                        where_clause + "\n" +
-                        "\n".join(optional_matches) + "\n" +
-                        return_clause
-                    )
-                
-                # Neo4j 쿼리 실행
-                results = session.run(full_query, params)
-                retrieved_games = [record.data() for record in results]
+                    params[param_name] = evalue
+            
+            # Qdrant 후보군으로 필터링
+            where_clause = "WHERE g.appid IN $appids"
+            
+            # 관계 정보 수집을 위한 옵션널 매치
+            optional_matches = [
+                "OPTIONAL MATCH (g)-->(d:Developer)",
+                "OPTIONAL MATCH (g)-->(p:Publisher)",
+                "OPTIONAL MATCH (g)-->(gn:Genre)",
+                "OPTIONAL MATCH (g)-->(c:Category)"
+            ]
+            
+            # 반환 절
+            return_clause = """
+            RETURN 
+                g.appid AS appid, 
+                g.name AS name, 
+                g.about AS about,
+                COLLECT(DISTINCT d.name) AS developers,
+                COLLECT(DISTINCT p.name) AS publishers,
+                COLLECT(DISTINCT gn.name) AS genres,
+                COLLECT(DISTINCT c.name) AS categories
+            LIMIT $limit
+            """
+            
+            # 최종 Neo4j Cypher 쿼리 구성
+            if match_clauses:
+                # 엔티티 조건이 있는 경우
+                full_query = (
+                    "MATCH (g:Game)\n" +
+                    where_clause + "\n" +
+                    "\n".join(match_clauses) + "\n" +
+                    "\n".join(optional_matches) + "\n" +
+                    return_clause
+                )
                 
-                return retrieved_games
+            else:
+                # 엔티티 조건이 없는 경우 (순수 의미 검색)
+                full_query = (
+                    "MATCH (g:Game)\n" +
+                    where_clause + "\n" +
+                    "\n".join(optional_matches) + "\n" +
+                    return_clause
+                )
+            
+            # Neo4j 쿼리 실행 (서버 측 트랜잭션 시간 제한 + 클라이언트 마감 시간)
+            def run_enrichment():
+                with self.neo4j_driver.session() as session:
+                    results = session.run(Query(full_query, timeout=config.NEO4J_TIMEOUT_S), params)
+                    return [record.data() for record in results]
+
+            with span("neo4j_enrichment"):
+                games = guarded_call(
+                    "neo4j", run_enrichment,
+                    timeout=config.NEO4J_TIMEOUT_S,
+                    hedge_after=config.NEO4J_HEDGE_AFTER_S,
+                )
         
         except Exception as e:
             print(f"Neo4j 쿼리 실행 중 오류: {e}")
             
             # Fallback: Neo4j 실패 시 Qdrant 결과만 반환
-            fallback_games = []
-            for hit in qdrant_hits[:5]:
-                fallback_games.append({
+            games = []
+            for hit in qdrant_hits:
+                games.append({
                     'appid': hit.payload['appid'],
                     'name': hit.payload.get('name', 'N/A'),
                     'about': hit.payload.get('about', '정보 없음'),
@@ -273,29 +392,16 @@ class SteamToolbelt:
                     'genres': hit.payload.get('genres', []),
                     'categories': []
                 })
-            return fallback_games
 
+        # 질문과의 관련도 순으로 재정렬
+        with span("rerank"):
+            return rerank(self.reranker, semantic_query, games, candidate_appids)
+
+    @traced("final_answer")
     def _generate_final_answer(self, query: str, retrieved_data: list) -> str:
         """검색된 데이터를 바탕으로 LLM이 최종 답변을 생성합니다."""
-        context = "--- 검색된 게임 정보 (Neo4j + Qdrant) ---\n\n"
-        
-        for game in retrieved_data:
-            context += f"게임명: {game.get('name', 'N/A')} (AppID: {game.get('appid', 'N/A')})\n"
-            context += f" - 설명: {game.get('about', '정보 없음')[:200]}...\n"
-            
-            developers = game.get('developers', [])
-            if developers and developers[0]:
-                context += f" - 개발사: {', '.join(filter(None, developers))}\n"
-            
-            publishers = game.get('publishers', [])
-            if publishers and publishers[0]:
-                context += f" - 배급사: {', '.join(filter(None, publishers))}\n"
-            
-            genres = game.get('genres', [])
-            if genres and genres[0]:
-                context += f" - 장르: {', '.join(filter(None, genres))}\n"
-                        
-            context += "\n"
+        # 관련도 순으로 정렬된 게임을 토큰 예산(RAG_CONTEXT_TOKEN_BUDGET) 안에서 채웁니다.
+        context = "--- 검색된 게임 정보 (Neo4j + Qdrant) ---\n\n" + pack_context(retrieved_data)
         
         prompt = f"""
         당신은 친절한 Steam 게임 전문가입니다. 주어진 검색된 정보를 바탕으로 사용자의 질문에 답변해주세요.
@@ -308,7 +414,7 @@ class SteamToolbelt:
 
         답변 (자연스러운 문장으로):
         """        
-        response = self.llm.generate_content(prompt)
+        response = self.llm.generate_content(prompt, stream=events.streaming())
         return response.text.strip()
 
     # 종료 메서드
@@ -316,6 +422,6 @@ class SteamToolbelt:
         """모든 DB 연결을 종료합니다."""
         if self.neo4j_driver:
             self.neo4j_driver.close()
-        if self.db_engine:
-            self.db_engine.dispose()
+        if self.structured_backend:
+            self.structured_backend.close()
         print("모든 DB 연결이 종료되었습니다.")
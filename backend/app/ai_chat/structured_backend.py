@@ -0,0 +1,192 @@
+# structured_backend.py
+# Text-to-SQL로 생성된 쿼리를 실행하는 정형 데이터 백엔드 (MySQL / DuckDB)
+
+from . import config
+from .aggregate_tables import build_statements
+from sqlalchemy import create_engine, event, exc, text
+import json
+import os
+import threading
+
+
+# 서버/연결 장애로 볼 MySQL 서버 오류 코드 (클라이언트 오류 2000번대는 모두 연결 장애로 봅니다)
+# 1040 연결 수 초과, 1045 인증 실패, 1053 서버 종료 중, 1129/1130 호스트 차단/불허,
+# 1152~1161 통신 오류, 1203 사용자 연결 수 초과
+# 문법 오류, 없는 컬럼, MAX_EXECUTION_TIME 초과(3024) 같은 쿼리 자체의 오류는 포함하지 않습니다.
+_MYSQL_UNAVAILABLE_CODES = {1040, 1045, 1053, 1129, 1130, 1203, *range(1152, 1162)}
+
+
+class MySQLBackend:
+    """
+    MySQL 서버의 `steam_structured_data` 테이블에 쿼리를 실행합니다.
+    LLM이 생성한 SQL만 실행하는 전용 읽기 전용 커넥션 풀을 사용하며,
+    모든 커넥션은 READ ONLY 트랜잭션과 문장별 실행 시간 제한(MAX_EXECUTION_TIME)이 걸린 세션으로 열립니다.
+    """
+
+    dialect = "MySQL"
+
+    def __init__(self):
+        db_uri = (
+            f"mysql+pymysql://{config.SQL_READONLY_DB_USER}:{config.SQL_READONLY_DB_PASSWORD}"
+            f"@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
+        )
+        timeout_seconds = max(1, config.SQL_STATEMENT_TIMEOUT_MS // 1000)
+        self.engine = create_engine(
+            db_uri,
+            pool_size=config.SQL_POOL_SIZE,
+            max_overflow=0,
+            pool_timeout=timeout_seconds,
+            pool_pre_ping=True,
+            # 서버가 응답하지 않는 경우에도 클라이언트가 무한히 기다리지 않도록 합니다.
+            connect_args={"read_timeout": timeout_seconds + 5, "connect_timeout": 5},
+        )
+
+        @event.listens_for(self.engine, "connect")
+        def _configure_session(dbapi_connection, _):
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute("SET SESSION TRANSACTION READ ONLY")
+                cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(config.SQL_STATEMENT_TIMEOUT_MS)}")
+
+    def is_unavailable(self, error: Exception) -> bool:
+        """error가 서버/연결 장애(서킷 브레이커에 반영할 오류)인지, 쿼리 자체의 오류인지 판별합니다."""
+        if isinstance(error, (exc.DisconnectionError, exc.TimeoutError)):
+            return True
+        if isinstance(error, exc.DBAPIError):
+            if error.connection_invalidated:
+                return True
+            args = getattr(error.orig, "args", None)
+            code = args[0] if args else None
+            return isinstance(code, int) and (2000 <= code < 3000 or code in _MYSQL_UNAVAILABLE_CODES)
+        return isinstance(error, OSError)
+
+    def explain(self, sql: str) -> tuple[float, float]:
+        """
+        EXPLAIN FORMAT=JSON으로 (예상 최대 행 수, 예상 쿼리 비용)을 반환합니다.
+        예상 행 수는 실행 계획에 나타나는 테이블별 스캔/조인 행 수 중 가장 큰 값입니다.
+        """
+        with self.engine.connect() as connection:
+            plan_json = connection.execute(text(f"EXPLAIN FORMAT=JSON {sql}")).scalar()
+        plan = json.loads(plan_json)
+
+        estimated_rows = 0.0
+        stack = [plan]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                for key in ("rows_examined_per_scan", "rows_produced_per_join"):
+                    if key in node:
+                        estimated_rows = max(estimated_rows, float(node[key]))
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+
+        cost = float(plan.get("query_block", {}).get("cost_info", {}).get("query_cost", 0))
+        return estimated_rows, cost
+
+    def execute(self, sql: str, max_rows: int = config.SQL_MAX_ROWS) -> tuple[list, list, bool]:
+        """
+        SQL을 실행하고 (컬럼명 목록, 최대 max_rows개의 행, 잘림 여부)를 반환합니다.
+        서버 측 커서로 결과를 스트리밍하므로 결과 전체를 클라이언트 메모리에 올리지 않습니다.
+        """
+        with self.engine.connect() as connection:
+            # LIMIT가 없는 SELECT는 서버에서 max_rows + 1행까지만 만들도록 제한합니다.
+            connection.execute(text("SET SESSION sql_select_limit = :limit"), {"limit": max_rows + 1})
+            try:
+                result = connection.execution_options(stream_results=True).execute(text(sql))
+                columns = list(result.keys())
+                rows = result.fetchmany(max_rows + 1)
+                result.close()
+            finally:
+                connection.execute(text("SET SESSION sql_select_limit = DEFAULT"))
+        return columns, rows[:max_rows], len(rows) > max_rows
+
+    def close(self):
+        self.engine.dispose()
+
+
+class DuckDBBackend:
+    """
+    정형 데이터 Parquet 파일을 프로세스 내 컬럼형 엔진(DuckDB)으로 조회합니다.
+    집계 쿼리는 필요한 컬럼만 읽어 벡터화 실행되므로 서버 왕복 없이 처리됩니다.
+    """
+
+    dialect = "DuckDB"
+
+    def __init__(self, parquet_path: str = config.STRUCTURED_PARQUET_PATH):
+        import duckdb
+
+        self.conn = duckdb.connect(database=":memory:")
+        # 테이블 이름은 MySQL과 동일하게 유지하여 같은 프롬프트/SQL을 사용할 수 있도록 합니다.
+        if config.DUCKDB_LOAD_IN_MEMORY:
+            self.conn.execute(
+                f"CREATE TABLE {config.STRUCTURED_TABLE_NAME} AS SELECT * FROM read_parquet(?)",
+                [parquet_path],
+            )
+            self._build_aggregate_tables()
+            # 데이터를 모두 메모리에 올렸으므로 이후 쿼리에서는 파일 시스템 접근과 설정 변경을 막습니다.
+            self.conn.execute("SET enable_external_access = false")
+            self.conn.execute("SET lock_configuration = true")
+        else:
+            escaped_path = os.path.abspath(parquet_path).replace("'", "''")
+            self.conn.execute(
+                f"CREATE VIEW {config.STRUCTURED_TABLE_NAME} AS SELECT * FROM read_parquet('{escaped_path}')"
+            )
+            self._build_aggregate_tables()
+            # 뷰가 읽는 Parquet 파일만 허용하고 그 밖의 파일 시스템 접근은 막습니다.
+            try:
+                self.conn.execute(f"SET allowed_paths = ['{escaped_path}']")
+                self.conn.execute("SET enable_external_access = false")
+                self.conn.execute("SET lock_configuration = true")
+            except duckdb.Error as e:
+                # allowed_paths를 지원하지 않는 DuckDB(1.2 미만)에서는 SQL 가드의 테이블 허용 목록으로만 제한됩니다.
+                print(f"DuckDB 파일 접근 제한을 설정하지 못했습니다: {e}")
+        self._local = threading.local()
+        # Parquet 파일을 읽지 못하는 경우만 장애로 봅니다 (문법 오류, 실행 시간 초과 중단 등은 쿼리 자체의 오류).
+        self._unavailable_errors = (duckdb.IOException, duckdb.ConnectionException)
+
+    def is_unavailable(self, error: Exception) -> bool:
+        """error가 서킷 브레이커에 반영할 장애인지 판별합니다."""
+        return isinstance(error, self._unavailable_errors)
+
+    def _build_aggregate_tables(self):
+        # DuckDB 백엔드는 시작 시점이 곧 적재 시점이므로 여기서 요약 테이블을 만듭니다.
+        if config.AGGREGATE_REWRITE_ENABLED:
+            for statement in build_statements():
+                self.conn.execute(statement)
+
+    def _cursor(self):
+        # DuckDB 연결은 스레드 간에 공유할 수 없으므로 스레드마다 cursor를 하나씩 둡니다.
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def execute(self, sql: str, max_rows: int = config.SQL_MAX_ROWS) -> tuple[list, list, bool]:
+        """
+        SQL을 실행하고 (컬럼명 목록, 최대 max_rows개의 행, 잘림 여부)를 반환합니다.
+        SQL_STATEMENT_TIMEOUT_MS를 넘기면 실행을 중단시킵니다.
+        """
+        cursor = self._cursor()
+        timer = threading.Timer(config.SQL_STATEMENT_TIMEOUT_MS / 1000, cursor.interrupt)
+        timer.start()
+        try:
+            cursor.execute(sql)
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchmany(max_rows + 1)
+        finally:
+            timer.cancel()
+        return columns, rows[:max_rows], len(rows) > max_rows
+
+    def close(self):
+        self.conn.close()
+
+
+def create_structured_backend():
+    """config.STRUCTURED_BACKEND 설정에 맞는 백엔드를 생성합니다."""
+    backend = config.STRUCTURED_BACKEND.lower()
+    if backend == "duckdb":
+        return DuckDBBackend()
+    if backend == "mysql":
+        return MySQLBackend()
+    raise ValueError(f"지원하지 않는 STRUCTURED_BACKEND 값입니다: {config.STRUCTURED_BACKEND}")
@@ -0,0 +1,231 @@
+# batch_jobs.py
+# 대량 질문(배치 작업)을 백그라운드 작업자 스레드에서 SteamGameAgent로 처리합니다.
+# - 질문마다 batch_items 행 하나를 두고 상태(pending -> running -> done/error)를 DB에 기록하므로,
+#   서버가 재시작되면 recover()가 처리 중이던 질문을 다시 대기 상태로 돌려 이어서 처리합니다.
+# - LLM 호출은 BATCH 우선순위로 스케줄링되어 대화형 요청보다 뒤에 실행됩니다.
+# - 사용자별 호출 한도나 백엔드 장애처럼 일시적인 실패는 답변으로 저장하지 않고, 백오프 후 다시 처리합니다.
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, or_, update
+
+from app.ai_chat.llm_scheduler import BATCH, LLMUnavailable, llm_context
+from app.ai_chat.resilience import BackendUnavailable
+from app.ai_chat.runtime import runtime
+from app.database import SessionLocal
+from app.models.batch import BatchItem, BatchJob
+
+# 동시에 질문을 처리할 작업자 스레드 수 (0이면 배치 처리 비활성화)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "2"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "10000"))
+# 처리할 질문이 없을 때 새 작업을 확인하는 간격
+BATCH_POLL_INTERVAL_S = float(os.getenv("BATCH_POLL_INTERVAL_S", "5"))
+# 일시적인 실패 후 다시 처리하기까지의 대기 시간 (실패할 때마다 두 배, 최대 BATCH_RETRY_MAX_S)
+BATCH_RETRY_BASE_S = float(os.getenv("BATCH_RETRY_BASE_S", "30"))
+BATCH_RETRY_MAX_S = float(os.getenv("BATCH_RETRY_MAX_S", "900"))
+# 이 횟수만큼 일시적인 실패가 이어지면 오류로 기록합니다.
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "20"))
+
+# 아직 끝나지 않은 질문 상태
+OPEN_STATUSES = ("pending", "running")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def submit(db, user_id: int, questions: list) -> BatchJob:
+    """질문 목록으로 배치 작업을 만들고 작업자를 깨웁니다."""
+    job = BatchJob(user_id=user_id, status="queued", total=len(questions))
+    job.items = [BatchItem(position=i, question=q, status="pending") for i, q in enumerate(questions)]
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    pool.notify()
+    return job
+
+
+def status_counts(db, job_id: int) -> dict:
+    rows = db.query(BatchItem.status, func.count()).filter(BatchItem.job_id == job_id).group_by(BatchItem.status).all()
+    return {status: count for status, count in rows}
+
+
+def cancel(db, job: BatchJob):
+    """대기 중인 질문을 취소합니다. 이미 처리 중인 질문은 끝까지 처리됩니다."""
+    db.execute(
+        update(BatchItem)
+        .where(BatchItem.job_id == job.id, BatchItem.status == "pending")
+        .values(status="cancelled", finished_at=_now())
+    )
+    if job.status in ("queued", "running"):
+        job.status = "cancelled"
+        job.finished_at = _now()
+    db.commit()
+
+
+def recover():
+    """재시작 전에 처리 중이던 질문을 다시 대기 상태로 돌립니다."""
+    db = SessionLocal()
+    try:
+        result = db.execute(update(BatchItem).where(BatchItem.status == "running").values(status="pending"))
+        db.commit()
+        if result.rowcount:
+            print(f"배치 작업: 중단되었던 질문 {result.rowcount}개를 다시 처리합니다.")
+    finally:
+        db.close()
+
+
+def _claim_next(db):
+    """가장 오래된 작업의 다음 질문을 running으로 바꾸고 (질문, 사용자 ID)를 반환합니다. 없으면 None."""
+    while True:
+        row = (
+            db.query(BatchItem.id, BatchItem.job_id, BatchJob.user_id)
+            .join(BatchJob, BatchJob.id == BatchItem.job_id)
+            .filter(
+                BatchItem.status == "pending",
+                or_(BatchItem.available_at == None, BatchItem.available_at <= _now()),
+                BatchJob.status.in_(("queued", "running")),
+            )
+            .order_by(BatchItem.job_id, BatchItem.position)
+            .first()
+        )
+        if row is None:
+            return None
+
+        # 다른 작업자(다른 프로세스 포함)가 먼저 가져간 질문이면 다음 질문을 찾습니다.
+        claimed = db.execute(
+            update(BatchItem).where(BatchItem.id == row.id, BatchItem.status == "pending").values(status="running")
+        ).rowcount
+        if claimed:
+            db.execute(update(BatchJob).where(BatchJob.id == row.job_id, BatchJob.status == "queued").values(status="running"))
+            db.commit()
+            return db.get(BatchItem, row.id), row.user_id
+        db.rollback()
+
+
+def _finish(db, item: BatchItem, status: str, tool=None, answer=None, error=None):
+    item.status = status
+    item.tool = tool
+    item.answer = answer
+    item.error = error
+    item.finished_at = _now()
+    db.commit()
+
+    # 각 작업자는 자기 결과를 커밋한 뒤 확인하므로, 마지막 질문을 끝낸 작업자가 작업을 완료 처리합니다.
+    remaining = db.query(BatchItem.id).filter(BatchItem.job_id == item.job_id, BatchItem.status.in_(OPEN_STATUSES)).first()
+    if remaining is None:
+        db.execute(
+            update(BatchJob)
+            .where(BatchJob.id == item.job_id, BatchJob.status == "running")
+            .values(status="completed", finished_at=_now())
+        )
+        db.commit()
+
+
+def _defer(db, item: BatchItem, reason: str):
+    """일시적인 실패로 처리하지 못한 질문을 백오프 뒤에 다시 처리하도록 대기 상태로 돌려놓습니다."""
+    item.attempts = (item.attempts or 0) + 1
+    job_status = db.query(BatchJob.status).filter(BatchJob.id == item.job_id).scalar()
+    if job_status == "cancelled":
+        _finish(db, item, "cancelled", error=reason)
+        return
+    if item.attempts >= BATCH_MAX_ATTEMPTS:
+        _finish(db, item, "error", error=f"{item.attempts}회 시도 후에도 처리하지 못했습니다: {reason}")
+        return
+
+    delay = min(BATCH_RETRY_MAX_S, BATCH_RETRY_BASE_S * 2 ** (item.attempts - 1))
+    item.status = "pending"
+    item.error = reason
+    item.available_at = _now() + timedelta(seconds=delay)
+    db.commit()
+
+
+def process_one(stopping: threading.Event = None) -> bool:
+    """
+    질문 하나를 처리합니다. 처리할 질문이 없거나 에이전트가 준비되지 않았으면 False를 반환합니다.
+    처리 도중 stopping이 설정되면(서버 종료 중 연결이 닫혀 실패했을 수 있으므로) 결과를 기록하지 않고
+    running 상태로 남겨 다음 시작 때 다시 처리합니다.
+    """
+    db = SessionLocal()
+    try:
+        claimed = _claim_next(db)
+        if claimed is None:
+            return False
+        item, user_id = claimed
+
+        try:
+            agent = runtime.get_agent()
+        except RuntimeError as e:
+            # 에이전트가 준비되면 다시 처리하도록 질문을 돌려놓습니다.
+            item.status = "pending"
+            db.commit()
+            print(f"배치 작업 대기: {e}")
+            return False
+
+        try:
+            with llm_context(user_id=user_id, priority=BATCH):
+                answer, tool = agent.route_query(item.question, raise_unavailable=True)
+            status, error = ("error" if tool == "Error" else "done"), None
+        except (LLMUnavailable, BackendUnavailable) as e:
+            # 호출 한도 초과/대기 마감/백엔드 장애는 답변으로 저장하지 않고 나중에 다시 처리합니다.
+            if stopping is None or not stopping.is_set():
+                _defer(db, item, str(e))
+            return True
+        except Exception as e:
+            answer, tool, status, error = None, None, "error", str(e)
+
+        if stopping is None or not stopping.is_set():
+            _finish(db, item, status, tool=tool, answer=answer, error=error)
+        return True
+    finally:
+        db.close()
+
+
+class BatchWorkerPool:
+    """배치 질문을 처리하는 작업자 스레드 묶음"""
+
+    def __init__(self, workers: int = BATCH_WORKERS):
+        self.workers = workers
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads or self.workers <= 0:
+            return
+        recover()
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"batch-worker-{i}", daemon=True) for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def notify(self):
+        """새 작업이 들어왔음을 대기 중인 작업자에게 알립니다."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                worked = process_one(self._stop)
+            except Exception as e:
+                print(f"배치 작업자 오류: {e}")
+                worked = False
+            if not worked:
+                self._wakeup.wait(BATCH_POLL_INTERVAL_S)
+                self._wakeup.clear()
+
+    def stop(self):
+        """새 질문을 가져가지 않도록 멈춥니다. 처리 중인 질문은 다음 시작 시 recover()로 다시 처리됩니다."""
+        self._stop.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + 10
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+
+pool = BatchWorkerPool()
@@ -0,0 +1,194 @@
+# chat_archive.py
+# 삭제(is_active=False)되었거나 오래 사용하지 않은 채팅의 메시지를 압축하여 chat_archives 테이블로 옮기고,
+# messages 테이블(hot table)에서는 실제로 삭제합니다. 채팅에 다시 접근하면 보관된 메시지를 복원합니다.
+#
+# 서버 실행 중에는 백그라운드 스레드가 CHAT_ARCHIVE_INTERVAL_S마다 정리 작업을 수행합니다.
+# 수동 실행: cd backend && python -m app.chat_archive --once
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.chat import Chat, ChatArchive, Message
+
+CHAT_ARCHIVE_ENABLED = os.getenv("CHAT_ARCHIVE_ENABLED", "true").lower() == "true"
+# 마지막 메시지 이후 이 기간 동안 사용하지 않은 채팅을 보관합니다.
+CHAT_ARCHIVE_IDLE_DAYS = float(os.getenv("CHAT_ARCHIVE_IDLE_DAYS", "30"))
+CHAT_ARCHIVE_INTERVAL_S = float(os.getenv("CHAT_ARCHIVE_INTERVAL_S", "3600"))
+# 정리 작업 한 번에 보관할 최대 채팅 수 (트랜잭션은 채팅 단위)
+CHAT_ARCHIVE_BATCH_SIZE = int(os.getenv("CHAT_ARCHIVE_BATCH_SIZE", "200"))
+# 채팅 목록 미리보기로 저장할 마지막 메시지 길이
+PREVIEW_CHARS = 200
+
+
+def _serialize(messages) -> list:
+    return [{
+        "content": m.content,
+        "role": m.role,
+        "user_id": m.user_id,
+        "created_at": m.created_at.isoformat() if m.created_at else None,
+    } for m in messages]
+
+
+def _compress(rows: list) -> bytes:
+    return zlib.compress(json.dumps(rows, ensure_ascii=False).encode("utf-8"))
+
+
+def _decompress(payload: bytes) -> list:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def archive_chat(db: Session, chat: Chat) -> int:
+    """채팅의 메시지를 압축 보관하고 messages 테이블에서 삭제합니다. 보관한 메시지 수를 반환합니다."""
+    messages = db.query(Message).filter(Message.chat_id == chat.id).order_by(Message.created_at, Message.id).all()
+    if not messages:
+        return 0
+
+    archive = db.query(ChatArchive).filter(ChatArchive.chat_id == chat.id).first()
+    if archive is None:
+        archive = ChatArchive(chat_id=chat.id)
+        db.add(archive)
+        rows = []
+    else:
+        # 보관된 뒤 복원 없이 새 메시지가 쌓인 경우 기존 보관분 뒤에 이어 붙입니다.
+        rows = _decompress(archive.payload)
+
+    rows.extend(_serialize(messages))
+    archive.payload = _compress(rows)
+    archive.message_count = len(rows)
+    archive.last_message = rows[-1]["content"][:PREVIEW_CHARS]
+    archive.archived_at = datetime.now(timezone.utc)
+
+    # 조회한 메시지만 삭제하여, 그 사이에 추가된 메시지가 보관 없이 지워지지 않도록 합니다.
+    ids = [m.id for m in messages]
+    db.query(Message).filter(Message.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
+
+
+def restore_chat(db: Session, chat: Chat) -> int:
+    """
+    보관된 메시지를 messages 테이블로 되돌리고 보관본을 삭제합니다. 복원한 메시지 수를 반환합니다.
+    복원 시각을 chat.updated_at에 기록하여, 메시지가 오래되었더라도 복원 직후 다시 보관되지 않게 합니다.
+    """
+    archive = db.query(ChatArchive).filter(ChatArchive.chat_id == chat.id).first()
+    if archive is None:
+        return 0
+
+    rows = _decompress(archive.payload)
+    db.add_all([
+        Message(
+            content=row["content"],
+            role=row["role"],
+            chat_id=chat.id,
+            user_id=row["user_id"],
+            created_at=datetime.fromisoformat(row["created_at"]) if row["created_at"] else None,
+        )
+        for row in rows
+    ])
+    db.delete(archive)
+    chat.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    return len(rows)
+
+
+def compact(db: Session, idle_days: float = CHAT_ARCHIVE_IDLE_DAYS, batch_size: int = CHAT_ARCHIVE_BATCH_SIZE) -> dict:
+    """
+    삭제된 채팅과 idle_days 동안 사용하지 않은 채팅을 최대 batch_size개 보관합니다.
+    마지막 메시지와 마지막 변경/복원 시각(updated_at)이 모두 cutoff 이전이어야 사용하지 않은 채팅으로 봅니다.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=idle_days)
+    last_message = (
+        db.query(Message.chat_id, func.max(Message.created_at).label("last_at"))
+        .group_by(Message.chat_id)
+        .subquery()
+    )
+    chats = (
+        db.query(Chat)
+        .join(last_message, last_message.c.chat_id == Chat.id)
+        .filter(or_(
+            Chat.is_active == False,
+            and_(last_message.c.last_at < cutoff, or_(Chat.updated_at == None, Chat.updated_at < cutoff)),
+        ))
+        .order_by(last_message.c.last_at)
+        .limit(batch_size)
+        .all()
+    )
+
+    archived_chats = archived_messages = 0
+    for chat in chats:
+        try:
+            archived_messages += archive_chat(db, chat)
+            archived_chats += 1
+        except Exception as e:
+            db.rollback()
+            print(f"채팅 {chat.id} 보관 실패: {e}")
+    return {"chats": archived_chats, "messages": archived_messages}
+
+
+class ArchiveWorker:
+    """일정 간격으로 compact()를 실행하는 백그라운드 스레드"""
+
+    def __init__(self, interval_s: float = CHAT_ARCHIVE_INTERVAL_S):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="chat-archive", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            run_once()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+
+def run_once() -> dict:
+    """보관할 채팅이 남지 않을 때까지 배치 단위로 정리합니다."""
+    totals = {"chats": 0, "messages": 0}
+    db = SessionLocal()
+    try:
+        while True:
+            result = compact(db)
+            totals["chats"] += result["chats"]
+            totals["messages"] += result["messages"]
+            if result["chats"] < CHAT_ARCHIVE_BATCH_SIZE:
+                break
+    except Exception as e:
+        print(f"채팅 보관 작업 중 오류: {e}")
+    finally:
+        db.close()
+    if totals["chats"]:
+        print(f"채팅 {totals['chats']}개의 메시지 {totals['messages']}개를 보관했습니다.")
+    return totals
+
+
+worker = ArchiveWorker()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="삭제되었거나 오래 사용하지 않은 채팅의 메시지를 보관합니다.")
+    parser.add_argument("--once", action="store_true", help="한 번만 실행하고 종료 (기본: 주기적으로 반복)")
+    args = parser.parse_args()
+
+    if args.once:
+        run_once()
+    else:
+        while True:
+            run_once()
+            time.sleep(CHAT_ARCHIVE_INTERVAL_S)
@@ -2,7 +2,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from app.telemetry import STAGE_LATENCY, instrument_engine
 import os
+import time
 
 # SQLite를 사용하여 간단하게 설정 (프로덕션에서는 PostgreSQL 권장)
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chat_app.db")
@@ -16,13 +18,18 @@ if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
 else:
     engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 def get_db():
     db = SessionLocal()
+    start = time.perf_counter()
     try:
         yield db
     finally:
         db.close()
+        # 요청 하나가 DB 세션을 열고 닫기까지의 시간
+        STAGE_LATENCY.labels("db_session").observe(time.perf_counter() - start)
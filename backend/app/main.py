@@ -1,16 +1,38 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import engine
 from app.models import Base
-from app.routes import auth, chat
+from app.routes import auth, chat, chat_ws, batch
+from app.ai_chat import config as ai_config
+from app.ai_chat.runtime import runtime
+from app import chat_archive, batch_jobs
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # 데이터베이스 테이블 생성
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 요청을 막지 않도록 Steam 에이전트(모델, DB 연결)는 백그라운드 스레드에서 준비합니다.
+    if ai_config.AGENT_WARMUP_ENABLED:
+        runtime.start_warmup()
+    # 삭제되었거나 오래 사용하지 않은 채팅의 메시지를 주기적으로 보관 테이블로 옮깁니다.
+    if chat_archive.CHAT_ARCHIVE_ENABLED:
+        chat_archive.worker.start()
+    # 배치 질문 작업자 (재시작 전에 처리 중이던 질문부터 이어서 처리)
+    batch_jobs.pool.start()
+    yield
+    batch_jobs.pool.stop()
+    chat_archive.worker.stop()
+    runtime.close()
+
 app = FastAPI(
     title="LLM Chat API",
     description="A simple LLM chat application with FastAPI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS 설정
@@ -25,6 +47,8 @@ app.add_middleware(
 # 라우터 등록
 app.include_router(auth.router)
 app.include_router(chat.router)
+app.include_router(chat_ws.router)
+app.include_router(batch.router)
 
 @app.get("/")
 def read_root():
@@ -33,3 +57,14 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+def readiness_check():
+    """Steam 에이전트(임베딩 모델, DB 연결)가 준비되었으면 200, 아니면 503을 반환합니다."""
+    status = runtime.status()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus 형식의 지표 (단계별 지연 시간, 오류/토큰 수 등)"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
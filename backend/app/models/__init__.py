@@ -1,5 +1,6 @@
 from .user import User
-from .chat import Chat, Message
+from .chat import Chat, Message, ChatArchive
+from .batch import BatchJob, BatchItem
 from app.database import Base
 
-__all__ = ["User", "Chat", "Message", "Base"]
+__all__ = ["User", "Chat", "Message", "ChatArchive", "BatchJob", "BatchItem", "Base"]
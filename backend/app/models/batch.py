@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # 'queued', 'running', 'completed', 'cancelled'
+    total = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # 관계 설정
+    items = relationship("BatchItem", back_populates="job", cascade="all, delete-orphan")
+
+class BatchItem(Base):
+    __tablename__ = "batch_items"
+    # 작업자가 다음에 처리할 질문을 찾는 조회 (status='pending', job_id/position 순)
+    __table_args__ = (Index("ix_batch_items_status_job_position", "status", "job_id", "position"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("batch_jobs.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    question = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # 'pending', 'running', 'done', 'error', 'cancelled'
+    tool = Column(String, nullable=True)
+    answer = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    # 일시적인 실패(호출 한도, 백엔드 장애)로 다시 대기시킨 횟수와, 다시 처리할 수 있는 시각
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # 관계 설정
+    job = relationship("BatchJob", back_populates="items")
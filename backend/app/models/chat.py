@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -30,3 +30,16 @@ class Message(Base):
     # 관계 설정
     chat = relationship("Chat", back_populates="messages")
     user = relationship("User", back_populates="messages")
+
+class ChatArchive(Base):
+    """오래 사용하지 않았거나 삭제된 채팅의 메시지를 압축하여 보관합니다 (messages 테이블에서는 삭제됨)."""
+    __tablename__ = "chat_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False, unique=True, index=True)
+    message_count = Column(Integer, nullable=False)
+    # 채팅 목록에 보여줄 마지막 메시지 미리보기 (압축을 풀지 않고 조회)
+    last_message = Column(Text)
+    # zlib으로 압축한 메시지 목록 JSON
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
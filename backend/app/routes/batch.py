@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List
+import json
+from app.database import get_db, SessionLocal
+from app.models.user import User
+from app.models.batch import BatchJob, BatchItem
+from app.schemas.batch import BatchJobCreate, BatchJob as BatchJobSchema, BatchJobStatus
+from app.auth import get_current_active_user
+from app import batch_jobs
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+# 결과 JSONL을 내려보낼 때 한 번에 읽는 행 수
+RESULT_PAGE_SIZE = 500
+
+def _get_user_job(db: Session, job_id: int, user_id: int) -> BatchJob:
+    job = db.query(BatchJob).filter(BatchJob.id == job_id, BatchJob.user_id == user_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job
+
+def _job_status(db: Session, job: BatchJob) -> BatchJobStatus:
+    counts = {status: 0 for status in ("pending", "running", "done", "error", "cancelled")}
+    counts.update(batch_jobs.status_counts(db, job.id))
+    return BatchJobStatus(**BatchJobSchema.model_validate(job).model_dump(), counts=counts)
+
+@router.post("/jobs", response_model=BatchJobSchema)
+def create_job(job: BatchJobCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    """
+    질문 목록을 배치 작업으로 등록하고 작업 ID를 반환합니다.
+    질문은 백그라운드 작업자가 SteamGameAgent로 처리하며 ('계산'/'설명' 키워드 규칙은 채팅과 동일),
+    LLM 호출은 대화형 요청보다 낮은 우선순위로 실행됩니다.
+    """
+    questions = [q.strip() for q in job.questions if q.strip()]
+    if not questions:
+        raise HTTPException(status_code=400, detail="No questions")
+    if len(questions) > batch_jobs.BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"Too many questions (max {batch_jobs.BATCH_MAX_QUESTIONS})")
+    if batch_jobs.pool.workers <= 0:
+        raise HTTPException(status_code=503, detail="Batch processing is disabled")
+    return batch_jobs.submit(db, current_user.id, questions)
+
+@router.get("/jobs", response_model=List[BatchJobSchema])
+def get_user_jobs(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    return db.query(BatchJob).filter(BatchJob.user_id == current_user.id).order_by(BatchJob.id.desc()).all()
+
+@router.get("/jobs/{job_id}", response_model=BatchJobStatus)
+def get_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    job = _get_user_job(db, job_id, current_user.id)
+    return _job_status(db, job)
+
+@router.post("/jobs/{job_id}/cancel", response_model=BatchJobStatus)
+def cancel_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    job = _get_user_job(db, job_id, current_user.id)
+    batch_jobs.cancel(db, job)
+    db.refresh(job)
+    return _job_status(db, job)
+
+@router.get("/jobs/{job_id}/results")
+def get_job_results(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    """
+    처리가 끝난 질문의 결과를 JSON Lines로 반환합니다 (질문 순서대로, 작업 진행 중에도 조회 가능).
+    각 줄: {"position", "question", "status", "tool", "answer", "error", "finished_at"}
+    """
+    _get_user_job(db, job_id, current_user.id)
+
+    def lines():
+        # 결과가 클 수 있으므로 요청 세션과 별도로 페이지 단위로 읽어 바로 내보냅니다.
+        session = SessionLocal()
+        try:
+            last_position = -1
+            while True:
+                items = (
+                    session.query(BatchItem)
+                    .filter(BatchItem.job_id == job_id, BatchItem.position > last_position,
+                            BatchItem.status.in_(("done", "error")))
+                    .order_by(BatchItem.position)
+                    .limit(RESULT_PAGE_SIZE)
+                    .all()
+                )
+                if not items:
+                    break
+                for item in items:
+                    yield json.dumps({
+                        "position": item.position,
+                        "question": item.question,
+                        "status": item.status,
+                        "tool": item.tool,
+                        "answer": item.answer,
+                        "error": item.error,
+                        "finished_at": item.finished_at.isoformat() if item.finished_at else None,
+                    }, ensure_ascii=False) + "\n"
+                last_position = items[-1].position
+        finally:
+            session.close()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="batch_{job_id}.jsonl"'},
+    )
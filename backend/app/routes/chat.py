@@ -4,14 +4,19 @@ from typing import List
 import logging
 from app.database import get_db
 from app.models.user import User
-from app.models.chat import Chat, Message
+from app.models.chat import Chat, ChatArchive, Message
 from app.schemas.chat import ChatCreate, Chat as ChatSchema, ChatUpdate, MessageCreate, Message as MessageSchema, SendMessageRequest, SendMessageResponse
 from app.auth import get_current_active_user
+from app.chat_archive import restore_chat
 
 # --- [수정 1] 스팀 에이전트와 Gemini 관련 모듈 임포트 ---
-import google.generativeai as genai
+# torch, sentence_transformers, google.generativeai 등 무거운 모듈은 여기서 import하지 않습니다.
+# Steam 에이전트는 서버 시작 시 runtime의 백그라운드 warm-up에서 로드됩니다.
 from app.ai_chat import config
-from app.ai_chat.agent import SteamGameAgent
+from app.ai_chat.runtime import runtime
+from app.ai_chat.llm_scheduler import ScheduledModel, LLMUnavailable, llm_context
+from app.ai_chat import events
+from app.telemetry import span, traced
 
 
 # 로깅 설정
@@ -19,6 +24,16 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+def get_user_chat(db: Session, chat_id: int, user_id: int) -> Chat:
+    """사용자 소유의 채팅을 조회합니다. 메시지가 보관(archive)되어 있으면 먼저 복원합니다."""
+    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == user_id).first()
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    restored = restore_chat(db, chat)
+    if restored:
+        logger.info(f"채팅 {chat_id}의 보관된 메시지 {restored}개를 복원했습니다.")
+    return chat
+
 @router.post("/", response_model=ChatSchema)
 def create_chat(chat: ChatCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     db_chat = Chat(
@@ -32,15 +47,29 @@ def create_chat(chat: ChatCreate, db: Session = Depends(get_db), current_user: U
 
 @router.get("/", response_model=List[ChatSchema])
 def get_user_chats(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    chats = db.query(Chat).filter(Chat.user_id == current_user.id, Chat.is_active == True).all()
+    """
+    채팅 목록. 목록 조회만으로는 보관된 채팅을 복원하지 않고,
+    보관된 채팅은 archived=True와 마지막 메시지 미리보기(last_message)로 반환합니다.
+    """
+    rows = (
+        db.query(Chat, ChatArchive.last_message)
+        .outerjoin(ChatArchive, ChatArchive.chat_id == Chat.id)
+        .filter(Chat.user_id == current_user.id, Chat.is_active == True)
+        .all()
+    )
+    chats = []
+    for chat, last_message in rows:
+        chat_schema = ChatSchema.model_validate(chat)
+        if last_message is not None:
+            chat_schema.archived = True
+            chat_schema.last_message = last_message
+        chats.append(chat_schema)
     return chats
 
 @router.get("/{chat_id}", response_model=ChatSchema)
 def get_chat(chat_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    return chat
+    # 채팅을 열면 보관된 메시지를 복원하여 함께 반환합니다.
+    return get_user_chat(db, chat_id, current_user.id)
 
 @router.put("/{chat_id}", response_model=ChatSchema)
 def update_chat(chat_id: int, chat_update: ChatUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
@@ -65,12 +94,19 @@ def delete_chat(chat_id: int, db: Session = Depends(get_db), current_user: User
     db.commit()
     return {"message": "Chat deleted successfully"}
 
+@router.post("/{chat_id}/restore", response_model=ChatSchema)
+def restore_archived_chat(chat_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    """삭제되었거나 보관된 채팅을 메시지와 함께 다시 활성화합니다."""
+    chat = get_user_chat(db, chat_id, current_user.id)
+    chat.is_active = True
+    db.commit()
+    db.refresh(chat)
+    return chat
+
 @router.post("/{chat_id}/messages", response_model=MessageSchema)
 def create_message(chat_id: int, message: MessageCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    # 채팅이 존재하고 사용자 소유인지 확인
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    # 채팅이 존재하고 사용자 소유인지 확인 (보관된 메시지는 복원)
+    chat = get_user_chat(db, chat_id, current_user.id)
     
     db_message = Message(
         content=message.content,
@@ -85,10 +121,8 @@ def create_message(chat_id: int, message: MessageCreate, db: Session = Depends(g
 
 @router.get("/{chat_id}/messages", response_model=List[MessageSchema])
 def get_chat_messages(chat_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    # 채팅이 존재하고 사용자 소유인지 확인
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    # 채팅이 존재하고 사용자 소유인지 확인 (보관된 메시지는 복원)
+    chat = get_user_chat(db, chat_id, current_user.id)
     
     messages = db.query(Message).filter(Message.chat_id == chat_id).order_by(Message.created_at).all()
     return messages
@@ -98,10 +132,8 @@ def send_message(chat_id: int, message_request: SendMessageRequest, db: Session
     """
     사용자 메시지를 전송하고 AI 응답을 생성하여 둘 다 저장합니다.
     """
-    # 채팅이 존재하고 사용자 소유인지 확인
-    chat = db.query(Chat).filter(Chat.id == chat_id, Chat.user_id == current_user.id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    # 채팅이 존재하고 사용자 소유인지 확인 (보관된 메시지는 복원)
+    chat = get_user_chat(db, chat_id, current_user.id)
     
     # 1. 사용자 메시지 저장
     user_message = Message(
@@ -115,7 +147,9 @@ def send_message(chat_id: int, message_request: SendMessageRequest, db: Session
     db.refresh(user_message)
     
     # 2. AI 응답 생성 (임시적으로 간단한 응답)
-    ai_response_content = generate_ai_response(message_request.content)
+    # 이 요청에서 발생하는 LLM 호출은 현재 사용자의 대화형 요청으로 스케줄링됩니다.
+    with llm_context(user_id=current_user.id):
+        ai_response_content = generate_ai_response(message_request.content)
     
     # 3. AI 응답 메시지 저장
     assistant_message = Message(
@@ -133,6 +167,7 @@ def send_message(chat_id: int, message_request: SendMessageRequest, db: Session
         assistant_message=assistant_message
     )
 
+@traced("generate_ai_response")
 def generate_ai_response(user_message: str) -> str:
     """
     AI 응답 생성 함수
@@ -156,12 +191,15 @@ def generate_ai_response(user_message: str) -> str:
 def _generate_steam_response(user_message: str) -> str:
     """Steam 관련 질문에 대한 응답 생성"""
     try:
-        # SteamGameAgent 초기화 및 실행 (이미 상단에서 import됨)
-        steam_agent = SteamGameAgent()
+        # warm-up된 공유 SteamGameAgent 사용 (준비 중이면 완료될 때까지 대기)
+        steam_agent = runtime.get_agent()
         response, tool_name = steam_agent.route_query(user_message)
-        steam_agent.close_connections()  # 연결 정리
         
-        logger.info(f"SteamGameAgent 응답 생성 완료 (도구: {tool_name})")
+        stats = steam_agent.coalescing_stats()
+        logger.info(
+            f"SteamGameAgent 응답 생성 완료 (도구: {tool_name}, "
+            f"동일 질문 합류 비율: {stats['coalescing_ratio']:.2%} = {stats['coalesced']}/{stats['calls']})"
+        )
         return response
         
     except Exception as e:
@@ -171,20 +209,27 @@ def _generate_steam_response(user_message: str) -> str:
 def _generate_general_response(user_message: str) -> str:
     """일반 대화에 대한 응답 생성 (Gemini API 사용)"""
     try:
+        import google.generativeai as genai
+
         # Gemini API 설정
         genai.configure(api_key=config.GOOGLE_API_KEY)
-        model = genai.GenerativeModel(config.GEMINI_MODEL_NAME)
+        model = ScheduledModel(genai.GenerativeModel(config.GEMINI_MODEL_NAME))
         
         logger.info(f"Gemini API에 메시지 전송: {user_message[:50]}...")
         
-        # Gemini API로 채팅 요청
-        response = model.generate_content(user_message)
+        # Gemini API로 채팅 요청 (WebSocket 채널에서는 토큰 단위로 스트리밍)
+        events.status("general_response", "답변 작성 중")
+        with span("general_response"):
+            response = model.generate_content(user_message, stream=events.streaming())
         
         ai_response = response.text
         logger.info(f"Gemini API 응답 수신: {ai_response[:50]}...")
         
         return ai_response
         
+    except LLMUnavailable as e:
+        logger.warning(f"LLM 스케줄러가 요청을 거부했습니다 ({e.reason})")
+        return str(e)
     except Exception as e:
         logger.error(f"Gemini API 연결 실패: {e}")
         return f"죄송합니다. 현재 AI 서비스에 연결할 수 없습니다. 사용자님의 메시지: '{user_message}'"
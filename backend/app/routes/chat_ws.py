@@ -0,0 +1,208 @@
+# chat_ws.py
+# 채팅별 WebSocket 채널: 연결할 때 한 번만 인증/소유권 확인을 하고, 이후 메시지마다
+# 도구 실행 상태(status)와 AI 응답 토큰(token)을 실시간으로 보냅니다.
+#
+# 연결: ws://<host>/chat/{chat_id}/ws?token=<JWT>
+#       (URL에 토큰을 넣지 않으려면 연결 직후 {"type": "auth", "token": "<JWT>"}를 먼저 보냅니다.)
+#
+# 클라이언트 -> 서버
+#   {"type": "message", "content": "..."}   질문 전송
+#   {"type": "ping"} / {"type": "pong"}      하트비트
+# 서버 -> 클라이언트
+#   {"type": "ready", "chat_id": ...}                 인증 완료
+#   {"type": "message", "message": {...}}             저장된 사용자 메시지
+#   {"type": "status", "stage": "...", "message": "..."}  도구 실행 상태 (예: "Text-to-SQL 실행 중")
+#   {"type": "token", "text": "..."}                  AI 응답 조각
+#   {"type": "done", "message": {...}}                저장된 AI 응답 메시지 (전체 텍스트)
+#   {"type": "error", "detail": "..."}
+#   {"type": "ping"} / {"type": "pong"}
+#
+# 흐름 제어
+# - 질문은 한 번에 하나씩 처리하며, 처리를 기다리는 질문이 WS_MAX_PENDING_MESSAGES개를 넘으면 거절합니다.
+# - 보낼 이벤트 큐(WS_SEND_QUEUE_SIZE)가 가득 차면 응답 생성 스레드가 WS_SEND_TIMEOUT_S까지 기다리고,
+#   그래도 비지 않으면 그 뒤의 token/status 이벤트는 버립니다. done 이벤트에 전체 응답이 들어 있으므로
+#   느린 클라이언트도 최종 결과는 빠짐없이 받습니다.
+# - WS_IDLE_TIMEOUT_S 동안 클라이언트로부터 아무 프레임도 받지 못하면 연결을 닫습니다.
+import asyncio
+import json
+import os
+import time
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+from app.ai_chat.events import event_sink
+from app.ai_chat.llm_scheduler import llm_context
+from app.auth import verify_token
+from app.database import SessionLocal
+from app.models.chat import Message
+from app.models.user import User
+from app.routes.chat import get_user_chat, generate_ai_response
+from app.schemas.chat import Message as MessageSchema
+
+WS_HEARTBEAT_INTERVAL_S = float(os.getenv("WS_HEARTBEAT_INTERVAL_S", "20"))
+WS_IDLE_TIMEOUT_S = float(os.getenv("WS_IDLE_TIMEOUT_S", "60"))
+WS_AUTH_TIMEOUT_S = float(os.getenv("WS_AUTH_TIMEOUT_S", "10"))
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+WS_SEND_TIMEOUT_S = float(os.getenv("WS_SEND_TIMEOUT_S", "5"))
+WS_MAX_PENDING_MESSAGES = int(os.getenv("WS_MAX_PENDING_MESSAGES", "4"))
+
+# 애플리케이션 정의 종료 코드
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+CLOSE_IDLE_TIMEOUT = 4408
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+
+def _authenticate(token: str, chat_id: int) -> int:
+    """토큰과 채팅 소유권을 확인하고 사용자 ID를 반환합니다. 보관된 채팅은 복원합니다."""
+    token_data = verify_token(token) if token else None
+    if token_data is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == token_data.username).first()
+        if user is None or not user.is_active:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        get_user_chat(db, chat_id, user.id)
+        return user.id
+    finally:
+        db.close()
+
+
+def _save_message(chat_id: int, user_id: int, role: str, content: str) -> dict:
+    db = SessionLocal()
+    try:
+        message = Message(content=content, role=role, chat_id=chat_id, user_id=user_id)
+        db.add(message)
+        db.commit()
+        db.refresh(message)
+        return MessageSchema.model_validate(message).model_dump(mode="json")
+    finally:
+        db.close()
+
+
+class ChatConnection:
+    """인증된 WebSocket 연결 하나의 상태 (사용자, 채팅, 송수신 큐)"""
+
+    def __init__(self, websocket: WebSocket, user_id: int, chat_id: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.loop = asyncio.get_running_loop()
+        self.outbox = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.inbox = asyncio.Queue(maxsize=WS_MAX_PENDING_MESSAGES)
+        self.last_received = time.monotonic()
+        self.lagging = False
+        self.dropped_events = 0
+
+    def push_from_thread(self, event: dict):
+        """응답 생성 스레드에서 호출하는 이벤트 수신자. 클라이언트가 느리면 진행 이벤트를 버립니다."""
+        if self.lagging and self.outbox.full():
+            self.dropped_events += 1
+            return
+        future = asyncio.run_coroutine_threadsafe(self.outbox.put(event), self.loop)
+        try:
+            future.result(timeout=WS_SEND_TIMEOUT_S)
+            self.lagging = False
+        except Exception:
+            future.cancel()
+            self.lagging = True
+            self.dropped_events += 1
+
+    def _answer(self, content: str) -> dict:
+        # 스레드 풀에서 실행됩니다. LLM 호출은 이 사용자의 대화형 요청으로 스케줄링되고,
+        # 진행 이벤트는 이 연결로 전달됩니다. 도중에 연결이 끊겨도 응답은 끝까지 만들어 저장합니다.
+        with event_sink(self.push_from_thread), llm_context(user_id=self.user_id):
+            answer = generate_ai_response(content)
+        return _save_message(self.chat_id, self.user_id, "assistant", answer)
+
+    async def receive_loop(self):
+        while True:
+            text = await self.websocket.receive_text()
+            self.last_received = time.monotonic()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            kind = data.get("type") if isinstance(data, dict) else None
+
+            if kind == "ping":
+                await self.outbox.put({"type": "pong"})
+            elif kind == "pong":
+                continue
+            elif kind == "message" and str(data.get("content", "")).strip():
+                try:
+                    self.inbox.put_nowait(str(data["content"]))
+                except asyncio.QueueFull:
+                    await self.outbox.put({"type": "error", "detail": "이전 질문을 처리 중입니다. 잠시 후 다시 보내주세요."})
+            else:
+                await self.outbox.put({"type": "error", "detail": "알 수 없는 메시지 형식입니다."})
+
+    async def send_loop(self):
+        while True:
+            event = await self.outbox.get()
+            await self.websocket.send_json(event)
+
+    async def answer_loop(self):
+        while True:
+            content = await self.inbox.get()
+            user_message = await asyncio.to_thread(_save_message, self.chat_id, self.user_id, "user", content)
+            await self.outbox.put({"type": "message", "message": user_message})
+
+            self.lagging = False
+            assistant_message = await asyncio.to_thread(self._answer, content)
+            await self.outbox.put({"type": "done", "message": assistant_message})
+
+    async def heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(WS_HEARTBEAT_INTERVAL_S)
+            if time.monotonic() - self.last_received > WS_IDLE_TIMEOUT_S:
+                await self.websocket.close(code=CLOSE_IDLE_TIMEOUT, reason="idle timeout")
+                return
+            await self.outbox.put({"type": "ping"})
+
+
+@router.websocket("/{chat_id}/ws")
+async def chat_websocket(websocket: WebSocket, chat_id: int):
+    await websocket.accept()
+
+    token = websocket.query_params.get("token")
+    try:
+        if not token:
+            data = await asyncio.wait_for(websocket.receive_json(), WS_AUTH_TIMEOUT_S)
+            token = data.get("token") if isinstance(data, dict) and data.get("type") == "auth" else None
+        user_id = await asyncio.to_thread(_authenticate, token, chat_id)
+    except HTTPException as e:
+        code = CLOSE_NOT_FOUND if e.status_code == 404 else CLOSE_UNAUTHORIZED
+        await websocket.close(code=code, reason=e.detail)
+        return
+    except (asyncio.TimeoutError, ValueError):
+        await websocket.close(code=CLOSE_UNAUTHORIZED, reason="authentication required")
+        return
+    except WebSocketDisconnect:
+        return
+
+    connection = ChatConnection(websocket, user_id, chat_id)
+    await websocket.send_json({"type": "ready", "chat_id": chat_id})
+
+    tasks = [
+        asyncio.create_task(loop())
+        for loop in (connection.receive_loop, connection.send_loop, connection.answer_loop, connection.heartbeat_loop)
+    ]
+    try:
+        # 어느 하나라도 끝나면(연결 종료, 유휴 시간 초과, 오류) 나머지도 정리합니다.
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"WebSocket 채널 오류 (chat {chat_id}): {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if connection.dropped_events:
+            print(f"WebSocket 채널 (chat {chat_id}): 느린 클라이언트로 진행 이벤트 {connection.dropped_events}개를 버렸습니다.")
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
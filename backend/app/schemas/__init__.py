@@ -1,7 +1,9 @@
 from .user import User, UserCreate, UserUpdate, UserLogin, Token, TokenData
 from .chat import Chat, ChatCreate, ChatUpdate, ChatWithMessages, Message, MessageCreate
+from .batch import BatchJob, BatchJobCreate, BatchJobStatus
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserLogin", "Token", "TokenData",
-    "Chat", "ChatCreate", "ChatUpdate", "ChatWithMessages", "Message", "MessageCreate"
+    "Chat", "ChatCreate", "ChatUpdate", "ChatWithMessages", "Message", "MessageCreate",
+    "BatchJob", "BatchJobCreate", "BatchJobStatus"
 ]
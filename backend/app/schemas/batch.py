@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+class BatchJobCreate(BaseModel):
+    questions: List[str] = Field(..., min_length=1)
+
+class BatchJob(BaseModel):
+    id: int
+    status: str
+    total: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class BatchJobStatus(BatchJob):
+    # 질문 상태별 개수 (pending, running, done, error, cancelled)
+    counts: dict
@@ -44,6 +44,9 @@ class Chat(ChatBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     messages: List[Message] = []
+    # 메시지가 보관(archive)된 채팅이면 True이며, messages 대신 last_message로 미리보기를 보여줍니다.
+    archived: bool = False
+    last_message: Optional[str] = None
 
     class Config:
         from_attributes = True
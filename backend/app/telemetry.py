@@ -0,0 +1,129 @@
+# telemetry.py
+# 요청 처리 단계별 지연 시간(히스토그램), 호출/오류/토큰 수(카운터)와 트레이스 span
+# - 지표는 prometheus_client 기본 레지스트리에 기록되며 main.py의 /metrics 엔드포인트로 노출됩니다.
+# - opentelemetry가 설치되어 있으면 같은 이름의 span도 함께 만듭니다. (없으면 지표만 기록)
+
+from contextlib import contextmanager
+from functools import wraps
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+import contextvars
+import logging
+import time
+
+try:
+    from opentelemetry import trace as _otel_trace
+    _tracer = _otel_trace.get_tracer("llm-chat-backend")
+except ImportError:
+    _tracer = None
+
+logger = logging.getLogger(__name__)
+
+# LLM 호출과 외부 DB 조회가 섞여 있으므로 수 ms ~ 수십 초 구간을 모두 나눌 수 있는 버킷을 사용합니다.
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+STAGE_LATENCY = Histogram(
+    "chat_stage_duration_seconds", "요청 처리 단계별 소요 시간", ["stage"], buckets=_LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter("chat_stage_errors_total", "예외로 끝난 처리 단계 수", ["stage"])
+TOOL_REQUESTS = Counter("steam_agent_requests_total", "SteamGameAgent가 선택한 도구별 요청 수", ["tool"])
+LLM_CALLS = Counter("llm_calls_total", "LLM 호출 수", ["stage"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM 프롬프트/응답 토큰 수", ["stage", "kind"])
+SQL_GUARD_CHECKS = Counter("sql_guard_checks_total", "LLM 생성 SQL 가드 검사 결과별 수", ["result"])
+SQL_GUARD_PLAN_COST = Histogram(
+    "sql_guard_plan_cost", "SQL 가드가 EXPLAIN으로 얻은 예상 쿼리 비용",
+    buckets=(10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+DB_QUERY_LATENCY = Histogram(
+    "app_db_query_duration_seconds", "애플리케이션 DB(채팅/사용자) 쿼리 소요 시간", buckets=_LATENCY_BUCKETS
+)
+
+# 현재 실행 중인 가장 안쪽 단계 이름 (LLM 토큰 수를 어느 단계에서 썼는지 기록하는 데 사용)
+_current_stage = contextvars.ContextVar("telemetry_stage", default="unknown")
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """stage 단계의 소요 시간과 오류를 기록하는 트레이스 span입니다."""
+    token = _current_stage.set(stage)
+    otel_span = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer else None
+    if otel_span is not None:
+        otel_span.__enter__()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        if otel_span is not None:
+            otel_span.__exit__(type(error) if error else None, error, error.__traceback__ if error else None)
+        _current_stage.reset(token)
+        logger.debug(f"[span] {stage} {elapsed * 1000:.1f}ms")
+
+
+def traced(stage: str):
+    """함수 전체를 stage 단계의 span으로 기록하는 데코레이터입니다."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(response):
+    """Gemini 응답의 usage_metadata에서 프롬프트/응답 토큰 수를 현재 단계 이름으로 기록합니다."""
+    stage = _current_stage.get()
+    LLM_CALLS.labels(stage).inc()
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(stage, "prompt").inc(getattr(usage, "prompt_token_count", 0) or 0)
+    LLM_TOKENS.labels(stage, "response").inc(getattr(usage, "candidates_token_count", 0) or 0)
+
+
+class _StatsCollector:
+    """구성 요소가 직접 집계하는 stats() 값을 /metrics 수집 시점에 읽어 내보냅니다."""
+
+    def __init__(self, prefix: str, documentation: str, stats_fn, counters, gauges):
+        self.prefix = prefix
+        self.documentation = documentation
+        self.stats_fn = stats_fn
+        self.counters = counters
+        self.gauges = gauges
+
+    def collect(self):
+        stats = self.stats_fn()
+        for key in self.counters:
+            yield CounterMetricFamily(f"{self.prefix}_{key}", f"{self.documentation}: {key}", value=stats[key])
+        for key in self.gauges:
+            yield GaugeMetricFamily(f"{self.prefix}_{key}", f"{self.documentation}: {key}", value=stats[key])
+
+
+def register_stats(prefix: str, documentation: str, stats_fn, counters=(), gauges=()):
+    """stats_fn()이 반환하는 dict의 counters/gauges 키를 prefix_<키> 지표로 등록합니다."""
+    REGISTRY.register(_StatsCollector(prefix, documentation, stats_fn, counters, gauges))
+
+
+def instrument_engine(engine):
+    """SQLAlchemy 엔진의 쿼리 실행 시간을 기록합니다."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERY_LATENCY.observe(time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
@@ -0,0 +1 @@
+# 성능 측정 스크립트 모음 (backend 디렉토리에서 python -m benchmarks.<모듈명> 으로 실행)
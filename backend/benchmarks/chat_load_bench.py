@@ -0,0 +1,166 @@
+# chat_load_bench.py
+# FastAPI 앱 전체를 로컬 대역(가짜 LLM, SQLite 정형 테이블, QdrantClient(":memory:"), 그래프 스텁)과 함께 띄우고,
+# 여러 가상 사용자가 동시에 채팅하는 부하를 걸어 경로별 p50/p95/p99 지연 시간과 초당 처리량을 측정합니다.
+#
+# 실행: cd backend && python -m benchmarks.chat_load_bench --users 20 --duration 30 --llm-latency-ms 200
+#       결과 저장/비교: --save baseline.json / --compare baseline.json
+#
+# 부하 테스트가 사용자별 LLM 속도 제한에 먼저 걸리지 않도록 LLM_USER_QPS/LLM_USER_BURST 기본값을 크게 잡습니다.
+# (실제 제한을 포함해 측정하려면 환경 변수로 직접 지정하세요.)
+import os
+import tempfile
+
+os.environ.setdefault("LLM_USER_QPS", "1000")
+os.environ.setdefault("LLM_USER_BURST", "1000")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_app_'), 'chat_app.db')}")
+
+import argparse
+import socket
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+import uvicorn
+
+from benchmarks import standins
+from benchmarks.report import load_json, print_table, save_json, summarize
+
+# (질문 종류, 질문) - '계산'은 Text-to-SQL, '설명'은 RAG, 스팀 키워드가 없으면 일반 대화로 처리됩니다.
+QUESTION_MIX = [
+    ("sql", "스팀에서 가장 비싼 게임 계산"),
+    ("sql", "스팀에서 리눅스를 지원하는 게임 수 계산"),
+    ("rag", "스팀에서 어두운 분위기의 소울라이크 게임 설명"),
+    ("rag", "스팀에서 귀여운 퍼즐 게임 설명"),
+    ("general", "오늘 저녁 메뉴 추천해줘"),
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port):
+    """앱을 백그라운드 스레드의 uvicorn에서 실행하고, 시작될 때까지 기다립니다."""
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+class Recorder:
+    """경로별 지연 시간(ms)과 오류 수를 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def timed(self, route, request):
+        start = time.perf_counter()
+        try:
+            response = request()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            if ok:
+                self.samples[route].append(elapsed_ms)
+            else:
+                self.errors[route] += 1
+        return response
+
+
+def run_user(base_url, index, stop_at, recorder, think_time_s, run_id):
+    """가상 사용자 한 명: 가입/로그인 -> 채팅 생성 -> 종료 시각까지 질문 전송과 메시지 조회를 반복합니다."""
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        username = f"bench_{run_id}_{index}"
+        recorder.timed("POST /auth/register", lambda: client.post("/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": "benchmark-password",
+        }))
+        response = recorder.timed("POST /auth/login", lambda: client.post("/auth/login", json={
+            "username": username, "password": "benchmark-password",
+        }))
+        if response is None or response.status_code != 200:
+            return
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        response = recorder.timed("POST /chat/", lambda: client.post("/chat/", json={"title": "benchmark", "user_id": 0}))
+        if response is None or response.status_code != 200:
+            return
+        chat_id = response.json()["id"]
+
+        turn = index  # 사용자마다 시작 질문을 다르게 하여 같은 순간에 같은 질문이 몰리지 않도록 합니다.
+        while time.monotonic() < stop_at:
+            kind, question = QUESTION_MIX[turn % len(QUESTION_MIX)]
+            recorder.timed(f"POST /chat/{{id}}/send-message ({kind})",
+                           lambda: client.post(f"/chat/{chat_id}/send-message", json={"content": question}))
+            if turn % 3 == 0:
+                recorder.timed("GET /chat/{id}/messages", lambda: client.get(f"/chat/{chat_id}/messages"))
+            turn += 1
+            if think_time_s:
+                time.sleep(think_time_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 대역을 사용한 채팅 API 부하 테스트")
+    parser.add_argument("--users", type=int, default=10, help="동시 가상 사용자 수")
+    parser.add_argument("--duration", type=float, default=20.0, help="측정 시간 (초)")
+    parser.add_argument("--think-time-ms", type=float, default=0.0, help="사용자별 요청 사이 대기 시간")
+    parser.add_argument("--games", type=int, default=5000, help="대역 데이터에 넣을 게임 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=100.0, help="가짜 LLM 호출당 지연 시간")
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0, help="프롬프트별로 더해지는 최대 추가 지연 시간")
+    parser.add_argument("--graph-latency-ms", type=float, default=5.0, help="그래프 스텁 쿼리당 지연 시간")
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과(JSON) 경로")
+    args = parser.parse_args()
+
+    print(f"대역 준비 중 (게임 {args.games}개)...")
+    standins.install_standins(
+        standins.synthetic_games(args.games),
+        llm_latency_ms=args.llm_latency_ms, llm_jitter_ms=args.llm_jitter_ms, graph_latency_ms=args.graph_latency_ms,
+    )
+
+    port = _free_port()
+    server, thread = start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    recorder = Recorder()
+    run_id = int(time.time())
+    start = time.perf_counter()
+    stop_at = time.monotonic() + args.duration
+    users = [
+        threading.Thread(target=run_user, args=(base_url, i, stop_at, recorder, args.think_time_ms / 1000, run_id))
+        for i in range(args.users)
+    ]
+    print(f"가상 사용자 {args.users}명으로 {args.duration:.0f}초 동안 측정합니다...")
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - start
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+    routes = sorted(set(recorder.samples) | set(recorder.errors))
+    summaries = {route: summarize(recorder.samples[route], elapsed, recorder.errors[route]) for route in routes}
+    baseline = load_json(args.compare)["routes"] if args.compare else None
+
+    print(f"\n사용자 {args.users}명, {elapsed:.1f}초, LLM 지연 {args.llm_latency_ms:.0f}ms(+{args.llm_jitter_ms:.0f}ms)")
+    print_table("경로", summaries, baseline)
+
+    if args.save:
+        save_json(args.save, {"settings": vars(args), "elapsed_s": elapsed, "routes": summaries})
+        print(f"\n결과를 '{args.save}'에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# report.py
+# 벤치마크 결과 집계/출력 공통 함수
+
+import json
+import statistics
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_ms, elapsed_s=None, errors=0):
+    """지연 시간(ms) 목록을 p50/p95/p99(와 elapsed_s가 주어지면 초당 처리량)로 요약합니다."""
+    summary = {
+        "count": len(samples_ms),
+        "errors": errors,
+        "p50_ms": statistics.median(samples_ms) if samples_ms else 0.0,
+        "p95_ms": percentile(samples_ms, 95) if samples_ms else 0.0,
+        "p99_ms": percentile(samples_ms, 99) if samples_ms else 0.0,
+    }
+    if elapsed_s:
+        summary["rps"] = len(samples_ms) / elapsed_s
+    return summary
+
+
+def print_table(title, summaries, baseline=None):
+    """
+    {이름: summarize() 결과}를 markdown 표로 출력합니다.
+    baseline(같은 형태의 이전 결과)이 주어지면 p95와 처리량의 변화율을 함께 보여줍니다.
+    """
+    columns = ["count", "errors", "p50_ms", "p95_ms", "p99_ms"]
+    if any("rps" in s for s in summaries.values()):
+        columns.append("rps")
+    header = [title, *columns] + (["p95 변화", "rps 변화"] if baseline else [])
+    print(f"| {' | '.join(header)} |")
+    print("|---" * len(header) + "|")
+    for name, summary in summaries.items():
+        cells = [name] + [
+            str(summary.get(c, "")) if c in ("count", "errors") else f"{summary.get(c, 0.0):.2f}" for c in columns
+        ]
+        if baseline:
+            before = baseline.get(name)
+            cells += [_change(before, summary, "p95_ms"), _change(before, summary, "rps")] if before else ["-", "-"]
+        print(f"| {' | '.join(cells)} |")
+
+
+def _change(before, after, key):
+    if not before.get(key) or key not in after:
+        return "-"
+    return f"{(after[key] - before[key]) / before[key] * 100:+.1f}%"
+
+
+def save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,240 @@
+# retrieval_eval.py
+# LLM 없이 RAG 검색 단계(_hybrid_retrieval_with_neo4j)만 오프라인으로 평가합니다.
+# 적재용 JSON에서 고정된 표본을 뽑아 QdrantClient(":memory:")와 그래프 스텁에 색인하고,
+# 정답이 표시된 질의 집합을 실행하여 recall@k, MRR과 단계별 지연 시간 백분위를 출력합니다.
+#
+# 실행: cd backend && python -m benchmarks.retrieval_eval ../data_etl/.../steam_games_unstructured_data.json \
+#           --sample 3000 --candidate-limit 20 [--rerank]
+#       질의 파일을 주지 않으면 표본에서 질의를 자동으로 만듭니다 (게임 이름 / 설명 첫 문장 / 개발사+장르).
+#       질의 파일(JSON Lines) 형식:
+#           {"semantic_query": "...", "entities": [{"type": "developer", "value": "..."}], "relevant": [appid, ...]}
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+
+from benchmarks import standins
+from benchmarks.report import load_json, print_table, save_json, summarize
+
+from app.ai_chat import config, rag_context
+from app.ai_chat.steam_tools import SteamToolbelt
+
+RECALL_KS = (1, 3, 5)
+
+
+def split_to_list(value):
+    """'A, B' 형태의 문자열 또는 리스트를 리스트로 변환합니다. (data_etl ingest_data.split_string_to_list와 동일)"""
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    if not value:
+        return []
+    return [item.strip() for item in str(value).split(",") if item.strip()]
+
+
+def semantic_text(game):
+    """적재 시 임베딩하는 텍스트 (data_etl ingest_data.build_semantic_text와 동일한 형태)"""
+    return f"Game: {game['name']}. Genres: {', '.join(game['genres'])}. About: {game['about']}"
+
+
+def load_sample(path, size, seed):
+    """JSON 배열 또는 JSON Lines에서 seed로 고정된 size개 표본을 뽑습니다 (저수지 표집)."""
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        f.seek(0)
+        records = json.load(f) if first == "[" else (json.loads(line) for line in f if line.strip())
+
+        rng = random.Random(seed)
+        sample = []
+        for i, record in enumerate(records):
+            if not record.get("appid") or not record.get("name"):
+                continue
+            if len(sample) < size:
+                sample.append(record)
+            else:
+                j = rng.randint(0, i)
+                if j < size:
+                    sample[j] = record
+
+    return [{
+        "appid": int(r["appid"]),
+        "name": r["name"],
+        "about": r.get("about_the_game") or "",
+        "developers": split_to_list(r.get("developers")),
+        "publishers": split_to_list(r.get("publishers")),
+        "genres": split_to_list(r.get("genres")),
+        "categories": split_to_list(r.get("categories")),
+    } for r in sorted(sample, key=lambda r: int(r["appid"]))]
+
+
+def generate_queries(games, count, seed):
+    """표본에서 정답이 정해진 질의를 만듭니다."""
+    rng = random.Random(seed)
+    queries = []
+    for game in rng.sample(games, min(count, len(games))):
+        kind = rng.choice(["name", "about", "developer_genre"])
+        if kind == "about" and game["about"]:
+            sentence = game["about"].split(".")[0][:200]
+            queries.append({"kind": kind, "semantic_query": sentence, "entities": [], "relevant": [game["appid"]]})
+        elif kind == "developer_genre" and game["developers"] and game["genres"]:
+            developer, genre = game["developers"][0], game["genres"][0]
+            relevant = [g["appid"] for g in games if developer in g["developers"] and genre in g["genres"]]
+            queries.append({
+                "kind": kind,
+                "semantic_query": f"{developer}가 만든 {genre} 게임",
+                "entities": [{"type": "developer", "value": developer}],
+                "relevant": relevant,
+            })
+        else:
+            queries.append({
+                "kind": "name",
+                "semantic_query": game["name"],
+                "entities": [],
+                "relevant": [game["appid"]],
+            })
+    return queries
+
+
+class _Timed:
+    """객체의 메서드 하나를 감싸 호출 시간(ms)을 기록하고, 마지막 반환값을 보관합니다."""
+
+    def __init__(self, target, method, samples):
+        self._target = target
+        self._method = method
+        self._samples = samples
+        self.last_result = None
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name != self._method:
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = attr(*args, **kwargs)
+            self._samples.append((time.perf_counter() - start) * 1000)
+            self.last_result = result
+            return result
+        return timed
+
+
+class _TimedGraph(standins.GraphStub):
+    """그래프 스텁의 쿼리 실행 시간(ms)을 기록합니다."""
+
+    def __init__(self, games, samples):
+        super().__init__(games)
+        self._samples = samples
+
+    def run(self, query, params=None):
+        start = time.perf_counter()
+        records = super().run(query, params)
+        self._samples.append((time.perf_counter() - start) * 1000)
+        return records
+
+
+def build_toolbelt(games, embedder, stage_samples, reranker=None):
+    """외부 연결 없이 검색 단계만 실행할 수 있는 SteamToolbelt를 만듭니다. (LLM은 만들지 않습니다)"""
+    qdrant = standins.build_memory_qdrant(games, embedder, text_fn=semantic_text)
+    tools = SteamToolbelt.__new__(SteamToolbelt)
+    tools.embedding_model = _Timed(embedder, "encode", stage_samples["embedding"])
+    tools.qdrant_client = _Timed(qdrant, "search", stage_samples["qdrant_search"])
+    tools.neo4j_driver = _TimedGraph(games, stage_samples["graph_query"])
+    tools.reranker = _Timed(reranker, "predict", stage_samples["rerank"]) if reranker else None
+    return tools
+
+
+def evaluate(tools, queries, stage_samples):
+    totals = defaultdict(float)
+    per_kind = defaultdict(lambda: defaultdict(float))
+    for query in queries:
+        relevant = set(query["relevant"])
+        start = time.perf_counter()
+        results = tools._hybrid_retrieval_with_neo4j({
+            "semantic_query": query["semantic_query"], "entities": query.get("entities", []),
+        })
+        stage_samples["retrieval_total"].append((time.perf_counter() - start) * 1000)
+
+        returned = [r["appid"] for r in results]
+        candidates = [hit.payload["appid"] for hit in (tools.qdrant_client.last_result or [])]
+        scores = {f"recall@{k}": len(relevant.intersection(returned[:k])) / len(relevant) for k in RECALL_KS}
+        scores["candidate_recall"] = len(relevant.intersection(candidates)) / len(relevant)
+        scores["mrr"] = next((1 / rank for rank, appid in enumerate(returned, 1) if appid in relevant), 0.0)
+
+        for name, value in scores.items():
+            totals[name] += value
+            per_kind[query.get("kind", "custom")][name] += value
+        per_kind[query.get("kind", "custom")]["count"] += 1
+
+    metrics = {name: value / len(queries) for name, value in totals.items()}
+    by_kind = {kind: {name: v / values["count"] for name, v in values.items() if name != "count"}
+               for kind, values in per_kind.items()}
+    return metrics, by_kind
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG 검색 단계 오프라인 평가 (recall@k, MRR, 단계별 지연 시간)")
+    parser.add_argument("path", help="적재용 JSON (배열 또는 JSON Lines) 경로")
+    parser.add_argument("--sample", type=int, default=3000, help="색인할 게임 수")
+    parser.add_argument("--queries", help="정답이 표시된 질의 파일 (JSON Lines). 없으면 표본에서 자동 생성")
+    parser.add_argument("--num-queries", type=int, default=300, help="자동 생성할 질의 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--candidate-limit", type=int, default=config.RAG_CANDIDATE_LIMIT, help="Qdrant 초기 후보군 수")
+    parser.add_argument("--embedding-model", default=config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--rerank", action="store_true", help="cross-encoder로 후보군 재정렬 (RERANK_MODEL_NAME)")
+    parser.add_argument("--rerank-model", default=config.RERANK_MODEL_NAME)
+    parser.add_argument("--hash-embedder", action="store_true", help="모델 대신 해시 임베딩 사용 (파이프라인 점검용)")
+    parser.add_argument("--save", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과(JSON) 경로")
+    args = parser.parse_args()
+
+    games = load_sample(args.path, args.sample, args.seed)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [json.loads(line) for line in f if line.strip()]
+    else:
+        queries = generate_queries(games, args.num_queries, args.seed)
+    queries = [q for q in queries if q.get("relevant")]
+    print(f"표본 {len(games)}개, 질의 {len(queries)}개, 후보군 {args.candidate_limit}개, 재정렬 {'사용' if args.rerank else '없음'}")
+
+    if args.hash_embedder:
+        embedder = standins.HashEmbedder()
+    else:
+        from sentence_transformers import SentenceTransformer
+        embedder = SentenceTransformer(args.embedding_model)
+
+    reranker = None
+    if args.rerank:
+        config.RERANK_ENABLED, config.RERANK_MODEL_NAME = True, args.rerank_model
+        reranker = rag_context.create_reranker()
+
+    config.RAG_CANDIDATE_LIMIT = args.candidate_limit
+    stage_samples = defaultdict(list)
+    start = time.perf_counter()
+    tools = build_toolbelt(games, embedder, stage_samples, reranker)
+    print(f"색인 완료 ({time.perf_counter() - start:.1f}초)")
+
+    metrics, by_kind = evaluate(tools, queries, stage_samples)
+
+    print("\n| 지표 | 전체 | " + " | ".join(by_kind) + " |")
+    print("|---" * (2 + len(by_kind)) + "|")
+    for name in metrics:
+        print(f"| {name} | {metrics[name]:.3f} | " + " | ".join(f"{by_kind[k][name]:.3f}" for k in by_kind) + " |")
+
+    baseline = load_json(args.compare) if args.compare else None
+    if baseline:
+        print("\n| 지표 | 이전 | 현재 |")
+        print("|---|---|---|")
+        for name, value in metrics.items():
+            print(f"| {name} | {baseline['metrics'].get(name, 0.0):.3f} | {value:.3f} |")
+
+    print()
+    summaries = {stage: summarize(samples) for stage, samples in stage_samples.items()}
+    print_table("단계", summaries, baseline["stages"] if baseline else None)
+
+    if args.save:
+        save_json(args.save, {"settings": vars(args), "metrics": metrics, "by_kind": by_kind, "stages": summaries})
+        print(f"\n결과를 '{args.save}'에 저장했습니다.")
+
+
+if __name__ == "__main__":
+    main()
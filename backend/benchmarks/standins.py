@@ -0,0 +1,322 @@
+# standins.py
+# 외부 서비스(Gemini, MySQL, Qdrant, Neo4j, 임베딩 모델) 없이 백엔드를 실행하기 위한 로컬 대역(stand-in)
+# - FakeGenerativeModel: 프롬프트 종류에 따라 정해진 응답을 돌려주는 지연 시간 조절 가능한 가짜 LLM
+# - SQLiteStructuredBackend: 정형 테이블(과 요약 테이블)을 적재한 SQLite
+# - HashEmbedder: 문자열 해시 기반의 결정적 임베딩
+# - GraphStub: Neo4j 드라이버 인터페이스를 흉내 내는 프로세스 내 그래프
+# - in-memory Qdrant: QdrantClient(":memory:")
+import os
+
+# app.ai_chat.config는 GOOGLE_API_KEY가 없으면 import 시 예외를 발생시킵니다.
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-fake-key")
+
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.ai_chat import config, aggregate_tables
+
+T = config.STRUCTURED_TABLE_NAME
+
+DEVELOPERS = ["FromSoftware", "Valve", "CD PROJEKT RED", "Nexon", "Krafton", "Team Cherry", "Supergiant Games", "Capcom"]
+GENRES = ["Action", "RPG", "Strategy", "Indie", "Adventure", "Simulation", "Casual", "Sports"]
+CATEGORIES = ["Single-player", "Multi-player", "Co-op", "Steam Achievements", "Full controller support"]
+ADJECTIVES = ["어두운", "귀여운", "빠른", "전략적인", "감성적인", "도전적인", "느긋한", "무서운"]
+NOUNS = ["소울라이크", "플랫포머", "로그라이크", "오픈월드", "퍼즐", "생존", "레이싱", "카드 게임"]
+
+
+def synthetic_games(count, seed=42):
+    """정형/비정형 필드를 모두 가진 결정적인 가짜 게임 목록을 만듭니다."""
+    rng = random.Random(seed)
+    games = []
+    for i in range(count):
+        adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+        games.append({
+            "appid": 100000 + i,
+            "name": f"{adjective} {noun} {i}",
+            "about": f"{adjective} 분위기의 {noun} 게임입니다. 플레이어는 {rng.choice(NOUNS)} 요소를 함께 즐길 수 있습니다.",
+            "developers": [rng.choice(DEVELOPERS)],
+            "publishers": [rng.choice(DEVELOPERS)],
+            "genres": rng.sample(GENRES, 2),
+            "categories": rng.sample(CATEGORIES, 2),
+            "peak_ccu": rng.randint(0, 500_000),
+            "price": rng.choice([0, 0, 4.99, 9.99, 19.99, 29.99, 59.99]),
+            "windows": True,
+            "mac": rng.random() < 0.3,
+            "linux": rng.random() < 0.2,
+            "metacritic_score": rng.choice([0, 0, rng.randint(40, 98)]),
+            "positive": rng.randint(0, 200_000),
+            "negative": rng.randint(0, 50_000),
+            "recommendations": rng.randint(0, 100_000),
+            "average_playtime_forever": rng.randint(0, 5000),
+        })
+    return games
+
+
+# --- 가짜 LLM ---
+
+# Text-to-SQL 프롬프트에 돌려줄 SQL (질문의 해시로 하나를 고릅니다)
+FAKE_SQL = [
+    f"SELECT COUNT(*) FROM {T} WHERE linux = 1;",
+    f"SELECT name, peak_ccu FROM {T} ORDER BY peak_ccu DESC LIMIT 10;",
+    f"SELECT name, price FROM {T} ORDER BY price DESC LIMIT 1;",
+    f"SELECT AVG(metacritic_score) FROM {T} WHERE metacritic_score > 0;",
+    f"SELECT name, positive, negative FROM {T} WHERE price = 0 ORDER BY positive DESC LIMIT 5;",
+    f"SELECT COUNT(*), SUM(recommendations) FROM {T} WHERE mac = 1 AND price < 10;",
+]
+
+_QUESTION = re.compile(r'질문:\s*"(.*?)"', re.DOTALL)
+
+
+class FakeGenerativeModel:
+    """
+    genai.GenerativeModel 대역입니다. latency_ms(+ 0~jitter_ms) 동안 잠든 뒤 프롬프트 종류에 맞는 응답을 돌려줍니다.
+    같은 프롬프트에는 항상 같은 응답(과 지연 시간)을 돌려주므로 실행 간 결과를 비교할 수 있습니다.
+    """
+
+    latency_ms = 50.0
+    jitter_ms = 0.0
+
+    def __init__(self, model_name=None, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, **kwargs):
+        digest = zlib.crc32(str(prompt).encode("utf-8"))
+        time.sleep((self.latency_ms + (digest % 1000) / 1000 * self.jitter_ms) / 1000)
+
+        match = _QUESTION.search(str(prompt))
+        question = match.group(1) if match else str(prompt)[:100]
+        if "SQL 쿼리:" in prompt:
+            text = FAKE_SQL[digest % len(FAKE_SQL)]
+        elif prompt.rstrip().endswith("JSON:"):
+            text = json.dumps({"entities": [], "semantic_query": question}, ensure_ascii=False)
+        else:
+            text = f"'{question}'에 대한 답변입니다. " + "관련 정보를 정리하면 다음과 같습니다. " * 4
+
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        if kwargs.get("stream"):
+            # 스트리밍 응답: 단어 단위 청크로 나눠 돌려주고, 다 받은 뒤의 .text는 전체 텍스트입니다.
+            return _FakeStream(text, usage)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class _FakeStream:
+    def __init__(self, text, usage):
+        self.text = text
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        for word in self.text.split(" "):
+            yield SimpleNamespace(text=word + " ")
+
+
+def install_fake_llm(latency_ms, jitter_ms=0.0):
+    """google.generativeai의 GenerativeModel/configure를 가짜로 바꿉니다."""
+    import google.generativeai as genai
+
+    FakeGenerativeModel.latency_ms = latency_ms
+    FakeGenerativeModel.jitter_ms = jitter_ms
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.configure = lambda **kwargs: None
+
+
+# --- 정형 데이터 (SQLite) ---
+
+STRUCTURED_COLUMNS = [
+    ("appid", "INTEGER"), ("name", "TEXT"), ("peak_ccu", "INTEGER"), ("price", "REAL"),
+    ("windows", "INTEGER"), ("mac", "INTEGER"), ("linux", "INTEGER"), ("metacritic_score", "INTEGER"),
+    ("positive", "INTEGER"), ("negative", "INTEGER"), ("recommendations", "INTEGER"),
+    ("average_playtime_forever", "INTEGER"),
+]
+
+
+class SQLiteStructuredBackend:
+    """structured_backend의 백엔드 인터페이스(dialect, execute, is_unavailable, close)를 구현한 SQLite 대역입니다."""
+
+    dialect = "SQLite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    @classmethod
+    def build(cls, games, db_path=None):
+        """games로 정형 테이블과 요약 테이블을 만든 SQLite 파일을 준비합니다."""
+        if db_path is None:
+            db_path = os.path.join(tempfile.mkdtemp(prefix="bench_structured_"), "structured.sqlite3")
+        conn = sqlite3.connect(db_path)
+        conn.execute(f"DROP TABLE IF EXISTS {T}")
+        conn.execute(f"CREATE TABLE {T} ({', '.join(f'{name} {sql_type}' for name, sql_type in STRUCTURED_COLUMNS)})")
+        conn.executemany(
+            f"INSERT INTO {T} VALUES ({', '.join('?' for _ in STRUCTURED_COLUMNS)})",
+            [tuple(int(g[name]) if isinstance(g[name], bool) else g[name] for name, _ in STRUCTURED_COLUMNS)
+             for g in games],
+        )
+        for statement in aggregate_tables.build_statements(T):
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+        return cls(db_path)
+
+    def execute(self, sql, max_rows=config.SQL_MAX_ROWS):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        cursor = conn.execute(sql)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchmany(max_rows + 1)
+        return columns, rows[:max_rows], len(rows) > max_rows
+
+    def is_unavailable(self, error):
+        # 로컬 파일이므로 SQLite 오류는 모두 쿼리 자체의 오류로 봅니다.
+        return not isinstance(error, sqlite3.Error)
+
+    def close(self):
+        # 요청마다 도구가 새로 만들어지고 닫히므로 공유 연결은 닫지 않습니다.
+        pass
+
+
+# --- 임베딩 ---
+
+class HashEmbedder:
+    """SentenceTransformer 대역. 토큰별 해시 벡터의 합을 정규화한 결정적 임베딩을 만듭니다."""
+
+    def __init__(self, model_name=None, dim=64, **kwargs):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _encode_one(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in str(text).lower().split():
+            seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector += np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.stack([self._encode_one(s) for s in sentences]) if sentences else np.zeros((0, self.dim))
+
+
+# --- 그래프 (Neo4j 드라이버 대역) ---
+
+class _Record:
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return dict(self._data)
+
+
+class GraphStub:
+    """
+    _hybrid_retrieval_with_neo4j가 사용하는 드라이버 인터페이스(session().run(query, params))만 구현합니다.
+    Cypher를 해석하지 않고, 후보 appid 중 엔티티 값(value0, value1, ...)과 모두 연결된 게임을 최대 limit개 돌려줍니다.
+    """
+
+    def __init__(self, games, latency_ms=0.0):
+        self.games = {g["appid"]: g for g in games}
+        self.latency_ms = latency_ms
+
+    # GraphDatabase.driver(...)와 같은 형태로 호출할 수 있도록 합니다.
+    def driver(self, *args, **kwargs):
+        return self
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params=None):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        params = params or {}
+        values = [v for k, v in params.items() if k.startswith("value")]
+        records = []
+        for appid in params.get("appids", []):
+            game = self.games.get(appid)
+            if game is None:
+                continue
+            linked = {game["name"], *game["developers"], *game["publishers"], *game["genres"], *game["categories"]}
+            if all(v in linked for v in values):
+                records.append(_Record({
+                    "appid": game["appid"], "name": game["name"], "about": game["about"],
+                    "developers": game["developers"], "publishers": game["publishers"],
+                    "genres": game["genres"], "categories": game["categories"],
+                }))
+            if len(records) == params.get("limit", 5):
+                break
+        return records
+
+    def close(self):
+        pass
+
+
+# --- 벡터 DB ---
+
+def _default_text(game):
+    return f"{game['name']}. {game['about']} {' '.join(game['genres'])}"
+
+
+def build_memory_qdrant(games, embedder, collection_name=config.QDRANT_COLLECTION_NAME, batch_size=256,
+                        text_fn=_default_text):
+    """QdrantClient(":memory:")에 games를 text_fn(game) 텍스트로 임베딩하여 적재합니다."""
+    from qdrant_client import QdrantClient, models
+
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=embedder.get_sentence_embedding_dimension(),
+                                           distance=models.Distance.COSINE),
+    )
+    for start in range(0, len(games), batch_size):
+        batch = games[start:start + batch_size]
+        vectors = embedder.encode([text_fn(g) for g in batch])
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                models.PointStruct(id=g["appid"], vector=vector.tolist(), payload={
+                    "appid": g["appid"], "name": g["name"], "about": g["about"], "genres": g["genres"],
+                })
+                for g, vector in zip(batch, vectors)
+            ],
+        )
+    return client
+
+
+def install_standins(games, llm_latency_ms=50.0, llm_jitter_ms=0.0, graph_latency_ms=0.0):
+    """
+    SteamToolbelt가 만드는 모든 외부 연결을 대역으로 바꿉니다.
+    (요청마다 도구가 새로 만들어지므로 대역은 한 번 만들어 공유합니다.)
+    """
+    from app.ai_chat import steam_tools
+
+    install_fake_llm(llm_latency_ms, llm_jitter_ms)
+    embedder = HashEmbedder()
+    qdrant = build_memory_qdrant(games, embedder)
+    structured = SQLiteStructuredBackend.build(games)
+    graph = GraphStub(games, latency_ms=graph_latency_ms)
+
+    steam_tools.create_structured_backend = lambda: structured
+    steam_tools.GraphDatabase = graph
+    steam_tools.QdrantClient = lambda *args, **kwargs: qdrant
+    steam_tools.create_embedding_model = lambda: embedder
+    steam_tools.create_reranker = lambda: None
+    return SimpleNamespace(embedder=embedder, qdrant=qdrant, structured=structured, graph=graph)
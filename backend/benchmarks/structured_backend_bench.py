@@ -0,0 +1,68 @@
+# structured_backend_bench.py
+# Text-to-SQL에서 자주 나오는 집계 쿼리를 MySQL과 DuckDB 백엔드에서 실행하여 지연 시간을 비교합니다.
+#
+# 실행: cd backend && python -m benchmarks.structured_backend_bench --rounds 20
+import argparse
+import statistics
+import time
+
+from app.ai_chat import config
+from app.ai_chat.structured_backend import MySQLBackend, DuckDBBackend
+from benchmarks.report import percentile
+
+T = config.STRUCTURED_TABLE_NAME
+
+# (이름, SQL) - 실제 질문 유형에서 LLM이 생성하는 형태의 쿼리
+AGGREGATION_QUERIES = [
+    ("Linux 지원 게임 수", f"SELECT COUNT(*) FROM {T} WHERE linux = 1;"),
+    ("플랫폼별 게임 수", f"SELECT SUM(windows), SUM(mac), SUM(linux) FROM {T};"),
+    ("peak_ccu 상위 10개", f"SELECT name, peak_ccu FROM {T} ORDER BY peak_ccu DESC LIMIT 10;"),
+    ("가장 비싼 게임", f"SELECT name, price FROM {T} ORDER BY price DESC LIMIT 1;"),
+    ("평균 메타크리틱 점수", f"SELECT AVG(metacritic_score) FROM {T} WHERE metacritic_score > 0;"),
+    ("무료 게임 추천 수 합계", f"SELECT COUNT(*), SUM(recommendations) FROM {T} WHERE price = 0;"),
+]
+
+
+def run(backend, rounds):
+    """쿼리마다 1회 워밍업 후 rounds회 실행한 지연 시간(ms) 목록을 반환합니다."""
+    results = {}
+    for name, sql in AGGREGATION_QUERIES:
+        backend.execute(sql)
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            backend.execute(sql)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = samples
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="정형 데이터 백엔드 집계 쿼리 벤치마크")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--backends", nargs="+", default=["mysql", "duckdb"], choices=["mysql", "duckdb"])
+    args = parser.parse_args()
+
+    factories = {"mysql": MySQLBackend, "duckdb": DuckDBBackend}
+    all_results = {}
+    for name in args.backends:
+        start = time.perf_counter()
+        backend = factories[name]()
+        print(f"[{name}] 초기화 {(time.perf_counter() - start) * 1000:.0f}ms")
+        try:
+            all_results[name] = run(backend, args.rounds)
+        finally:
+            backend.close()
+
+    print(f"\n| 쿼리 | {' | '.join(f'{b} p50 (ms) | {b} p95 (ms)' for b in all_results)} |")
+    print("|---" * (1 + 2 * len(all_results)) + "|")
+    for query_name, _ in AGGREGATION_QUERIES:
+        cells = []
+        for backend_name, results in all_results.items():
+            samples = results[query_name]
+            cells.append(f"{statistics.median(samples):.2f} | {percentile(samples, 95):.2f}")
+        print(f"| {query_name} | {' | '.join(cells)} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# conftest.py
+# ai_chat.config는 GOOGLE_API_KEY가 없으면 import 단계에서 실패하므로 테스트용 값을 넣어 둡니다.
+
+import os
+
+os.environ.setdefault("GOOGLE_API_KEY", "test")
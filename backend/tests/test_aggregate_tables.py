@@ -0,0 +1,79 @@
+# test_aggregate_tables.py
+# 요약 테이블 재작성 규칙과, 재작성된 SQL이 원본 쿼리와 같은 결과를 내는지 DuckDB로 확인합니다.
+
+import pytest
+
+from app.ai_chat import aggregate_tables
+from app.ai_chat.aggregate_tables import build_statements, rewrite, top_n_query
+
+T = aggregate_tables.T
+TOP_N = {metric: 100 for metric in aggregate_tables.TOP_METRICS}
+
+
+@pytest.mark.parametrize("sql, expected", [
+    (f"SELECT COUNT(*) FROM {T} WHERE windows = TRUE;",
+     "SELECT game_count AS game_count FROM steam_platform_counts WHERE platform = 'windows'"),
+    (f"select count(appid) as mac_games from `{T}` where mac = 1",
+     "SELECT game_count AS mac_games FROM steam_platform_counts WHERE platform = 'mac'"),
+    (f"SELECT SUM(linux) AS n FROM {T}",
+     "SELECT game_count AS n FROM steam_platform_counts WHERE platform = 'linux'"),
+    (f"SELECT name, price FROM {T} ORDER BY price DESC LIMIT 10",
+     "SELECT name, price FROM steam_top_by_price WHERE rank_no <= 10 ORDER BY rank_no"),
+    (f"SELECT AVG(metacritic_score) AS avg_score FROM {T} WHERE metacritic_score > 0",
+     "SELECT avg_value AS avg_score FROM steam_score_stats WHERE metric = 'metacritic_score' AND filter = 'nonzero'"),
+])
+def test_rewrites_known_shapes(sql, expected):
+    assert rewrite(sql, TOP_N) == expected
+
+
+@pytest.mark.parametrize("sql", [
+    f"SELECT name, price FROM {T} ORDER BY price DESC LIMIT 101",
+    f"SELECT name, price FROM {T} ORDER BY price ASC LIMIT 10",
+    f"SELECT name, genres FROM {T} ORDER BY price DESC LIMIT 10",
+    f"SELECT COUNT(*) FROM {T} WHERE windows = TRUE AND price = 0",
+    f"SELECT AVG(price) FROM {T}",
+])
+def test_leaves_other_queries(sql):
+    assert rewrite(sql, TOP_N) is None
+
+
+def test_top_n_uses_materialized_n():
+    sql = f"SELECT name FROM {T} ORDER BY peak_ccu DESC LIMIT 50"
+    assert rewrite(sql, {"peak_ccu": 50}) is not None
+    assert rewrite(sql, {"peak_ccu": 49}) is None
+    # 요약 테이블이 없거나 N을 모르면 상위 N개 질문은 재작성하지 않습니다.
+    assert rewrite(sql, {}) is None
+    assert rewrite(sql) is None
+
+
+@pytest.fixture
+def duckdb_conn():
+    duckdb = pytest.importorskip("duckdb")
+    conn = duckdb.connect()
+    conn.execute(
+        f"CREATE TABLE {T} AS SELECT i AS appid, 'game' || i AS name, i % 2 = 0 AS windows, i % 3 = 0 AS mac, "
+        f"i % 5 = 0 AS linux, (i * 37) % 101 AS price, i * 10 AS peak_ccu, i AS positive, "
+        f"NULLIF(i % 7, 0) AS recommendations, (i * 13) % 100 AS metacritic_score FROM range(1, 501) t(i)"
+    )
+    for statement in build_statements(T, top_n=30):
+        conn.execute(statement)
+    yield conn
+    conn.close()
+
+
+def test_top_n_query_reads_materialized_n(duckdb_conn):
+    assert dict(duckdb_conn.execute(top_n_query()).fetchall()) == {metric: 30 for metric in aggregate_tables.TOP_METRICS}
+
+
+@pytest.mark.parametrize("sql", [
+    f"SELECT COUNT(*) FROM {T} WHERE mac = TRUE",
+    f"SELECT SUM(windows) AS n FROM {T}",
+    f"SELECT appid, peak_ccu FROM {T} ORDER BY peak_ccu DESC LIMIT 20",
+    f"SELECT MAX(metacritic_score) FROM {T}",
+    f"SELECT AVG(metacritic_score) AS s FROM {T} WHERE metacritic_score > 0",
+])
+def test_rewritten_sql_matches_original(duckdb_conn, sql):
+    top_n = dict(duckdb_conn.execute(top_n_query()).fetchall())
+    rewritten = rewrite(sql, top_n)
+    assert rewritten is not None
+    assert duckdb_conn.execute(rewritten).fetchall() == duckdb_conn.execute(sql).fetchall()
@@ -0,0 +1,44 @@
+# test_answer_templates.py
+# 단순한 SQL 결과를 템플릿 답변으로 만드는 규칙과, LLM에 넘겨야 하는 경우를 확인합니다.
+
+from app.ai_chat import config
+from app.ai_chat.answer_templates import column_label, format_answer, format_value
+
+
+def test_column_labels():
+    assert column_label("COUNT(*)") == ("게임 수", "개")
+    assert column_label("AVG(price)") == ("평균 가격", "달러")
+    assert column_label("SUM(linux)") == ("Linux 지원 게임 수", "개")
+    assert column_label("`peak_ccu`") == ("최대 동시 접속자 수", "명")
+    assert column_label("dlc_count") == ("dlc_count", "개")
+
+
+def test_format_value():
+    assert format_value(None) == "정보 없음"
+    assert format_value(19.99, "달러") == "19.99달러"
+    assert format_value(13686, "개") == "13,686개"
+    assert format_value(1, "bool") == "지원"
+    assert format_value(2.5) == "2.50"
+
+
+def test_single_value():
+    assert format_answer("리눅스 게임 수", ["SUM(linux)"], [(13686,)]) == "Linux 지원 게임 수는 13,686개입니다."
+    assert format_answer("가장 비싼 가격", ["MAX(price)"], [(999.98,)]) == "최고 가격은 999.98달러입니다."
+
+
+def test_single_row_with_name():
+    answer = format_answer("가장 비싼 게임", ["name", "price"], [("Game A", 59.99)])
+    assert answer == "'Game A'입니다 (가격 59.99달러)."
+
+
+def test_numbered_list():
+    answer = format_answer("동접 상위 2개", ["name", "peak_ccu"], [("A", 1000), ("B", 500)])
+    assert answer.splitlines() == ["조회 결과 2건입니다.", "1. A (최대 동시 접속자 수 1,000명)", "2. B (최대 동시 접속자 수 500명)"]
+
+
+def test_falls_back_to_llm():
+    assert format_answer("두 게임 가격 비교", ["name", "price"], [("A", 1), ("B", 2)]) is None
+    assert format_answer("가장 비싼 게임", ["name"], [("A",)], truncated=True) is None
+    assert format_answer("가장 비싼 게임", ["name"], []) is None
+    rows = [(f"G{i}",) for i in range(config.SQL_TEMPLATE_MAX_ROWS + 1)]
+    assert format_answer("게임 목록", ["name"], rows) is None
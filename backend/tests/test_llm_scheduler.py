@@ -0,0 +1,49 @@
+# test_llm_scheduler.py
+# 사용자별 토큰 버킷, 대기 마감 거부 시 토큰 환불, 유휴 버킷 정리를 확인합니다.
+
+import threading
+
+import pytest
+
+from app.ai_chat.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, LLMUnavailable
+
+
+def test_user_rate_limit():
+    scheduler = LLMScheduler(max_concurrency=4, max_qps=100, user_qps=0.01, user_burst=2)
+    for _ in range(2):
+        assert scheduler.run(lambda: "ok", user_id=1, queue_timeout=0.1) == "ok"
+    with pytest.raises(LLMUnavailable) as e:
+        scheduler.run(lambda: "ok", user_id=1, queue_timeout=0.1)
+    assert e.value.reason == "user_rate"
+    # 다른 사용자는 영향을 받지 않습니다.
+    assert scheduler.run(lambda: "ok", user_id=2, queue_timeout=0.1) == "ok"
+
+
+def test_queue_timeout_refunds_user_token():
+    scheduler = LLMScheduler(max_concurrency=1, max_qps=100, user_qps=0.01, user_burst=1)
+    running, release = threading.Event(), threading.Event()
+    holder = threading.Thread(
+        target=lambda: scheduler.run(lambda: (running.set(), release.wait(5)), priority=BATCH, queue_timeout=1))
+    holder.start()
+    running.wait(5)
+
+    with pytest.raises(LLMUnavailable) as e:
+        scheduler.run(lambda: "ok", user_id=1, priority=INTERACTIVE, queue_timeout=0.05)
+    assert e.value.reason == "queue_timeout"
+    release.set()
+    holder.join()
+
+    # 실행되지 못한 요청의 토큰이 돌아왔으므로 바로 다시 호출할 수 있습니다.
+    assert scheduler.run(lambda: "ok", user_id=1, queue_timeout=0.1) == "ok"
+    assert scheduler.stats()["rejected_queue_timeout"] == 1
+
+
+def test_idle_user_buckets_are_evicted(monkeypatch):
+    scheduler = LLMScheduler(max_concurrency=4, max_qps=100, user_qps=100, user_burst=1)
+    monkeypatch.setattr(LLMScheduler, "USER_BUCKET_SWEEP_S", 0)
+    for user_id in range(50):
+        scheduler.run(lambda: None, user_id=user_id, queue_timeout=1)
+    # 다음 호출 시점에는 이전 사용자들의 버킷이 모두 다시 가득 차 정리됩니다.
+    threading.Event().wait(0.05)
+    scheduler.run(lambda: None, user_id="new", queue_timeout=1)
+    assert list(scheduler._user_buckets) == ["new"]
@@ -0,0 +1,34 @@
+# test_rag_context.py
+# RAG 컨텍스트가 토큰 예산 안에서 관련도 순으로 채워지는지 확인합니다.
+
+from app.ai_chat.rag_context import estimate_tokens, pack_context
+
+
+def _game(i, about_chars=2000):
+    return {
+        "appid": i, "name": f"Game {i}", "developers": ["Dev"], "publishers": [], "genres": ["RPG", None],
+        "about": ("설명 문장입니다. " * about_chars)[:about_chars],
+    }
+
+
+def test_headers_in_relevance_order():
+    context = pack_context([_game(1), _game(2)], token_budget=10_000, max_games=5)
+    assert context.index("Game 1") < context.index("Game 2")
+    assert " - 개발사: Dev" in context and " - 장르: RPG" in context
+    assert " - 배급사" not in context
+
+
+def test_respects_token_budget():
+    games = [_game(i) for i in range(20)]
+    for budget in (200, 800, 3000):
+        assert estimate_tokens(pack_context(games, token_budget=budget, max_games=20)) <= budget
+
+
+def test_top_game_always_included():
+    context = pack_context([_game(1), _game(2)], token_budget=1, max_games=5)
+    assert "Game 1" in context and "Game 2" not in context
+
+
+def test_max_games():
+    context = pack_context([_game(i) for i in range(5)], token_budget=10_000, max_games=2)
+    assert "Game 1" in context and "Game 2" not in context
@@ -0,0 +1,85 @@
+# test_single_flight.py
+# 동일 키 작업 합류, 실패 시 재실행, follower 대기 시간 제한을 확인합니다.
+
+import threading
+import time
+
+import pytest
+
+from app.ai_chat.single_flight import SingleFlight
+
+
+def _start_leader(flight, key, release, result="leader", error=None):
+    started = threading.Event()
+    out = {}
+
+    def fn(publish):
+        started.set()
+        release.wait(5)
+        publish("progress")
+        if error is not None:
+            raise error
+        return result
+
+    def run():
+        try:
+            out["result"] = flight.do(key, fn, share_errors=False)
+        except Exception as e:
+            out["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait(5)
+    return thread, out
+
+
+def test_follower_shares_leader_result():
+    flight, release = SingleFlight(), threading.Event()
+    leader, _ = _start_leader(flight, "q", release)
+    results = []
+    follower = threading.Thread(target=lambda: results.append(flight.do("q", lambda publish: "own")))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    assert results == ["leader"]
+    stats = flight.stats()
+    assert (stats["calls"], stats["executions"], stats["coalesced"], stats["in_flight"]) == (2, 1, 1, 0)
+
+
+def test_follower_retries_when_leader_fails():
+    flight, release = SingleFlight(), threading.Event()
+    leader, out = _start_leader(flight, "q", release, error=RuntimeError("한도 초과"))
+    results = []
+    follower = threading.Thread(
+        target=lambda: results.append(flight.do("q", lambda publish: "own", share_errors=False)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    assert isinstance(out["error"], RuntimeError)
+    assert results == ["own"]
+    assert flight.stats()["retried"] == 1
+
+
+def test_follower_runs_itself_after_timeout():
+    flight, release = SingleFlight(), threading.Event()
+    leader, _ = _start_leader(flight, "q", release)
+    events = []
+    started = time.monotonic()
+    assert flight.do("q", lambda publish: "own", listener=events.append, timeout=0.05) == "own"
+    assert time.monotonic() - started < 1
+    release.set()
+    leader.join()
+    # 합류를 푼 뒤에는 leader의 진행 이벤트를 받지 않습니다.
+    assert events == []
+    assert flight.stats()["timed_out"] == 1
+
+
+def test_leader_error_is_shared_by_default():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("q", lambda publish: (_ for _ in ()).throw(ValueError("x")))
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,118 @@
+# test_sql_guard.py
+# SQL 가드의 구문/테이블 검사를 MySQL과 DuckDB 방언별로 확인합니다.
+
+import pytest
+
+from app.ai_chat.sql_guard import SQLGuard, SQLRejected, validate_read_only_select
+
+TABLES = {"steam_structured_data", "steam_top_by_reviews"}
+
+
+@pytest.mark.parametrize("dialect", ["MySQL", "DuckDB"])
+@pytest.mark.parametrize("sql", [
+    "SELECT name FROM steam_structured_data LIMIT 5;",
+    "SELECT 'x;y' AS s, name FROM steam_structured_data",
+    "WITH t AS (SELECT name FROM steam_structured_data) SELECT name FROM t",
+    "SELECT name FROM steam_structured_data WHERE appid IN (SELECT appid FROM steam_top_by_reviews)",
+    "SELECT EXTRACT(YEAR FROM release_date) FROM steam_structured_data",
+    "SELECT name FROM steam_structured_data -- 최근 게임\nWHERE appid > 10",
+])
+def test_accepts_read_only_select(dialect, sql):
+    assert validate_read_only_select(sql, TABLES, dialect=dialect) == sql.strip().rstrip(";").strip()
+
+
+@pytest.mark.parametrize("dialect", ["MySQL", "DuckDB"])
+@pytest.mark.parametrize("sql", [
+    "",
+    "DELETE FROM steam_structured_data",
+    "SELECT 1; DROP TABLE steam_structured_data",
+    "SELECT * FROM users",
+    "SELECT * FROM other_db.steam_structured_data",
+    "SELECT * FROM read_csv('/etc/passwd')",
+    "SELECT * FROM '/etc/passwd'",
+    "SELECT * FROM steam_structured_data, glob('/etc/*')",
+    "SELECT * FROM steam_structured_data /* 닫히지 않은 주석",
+])
+def test_rejects_statement(dialect, sql):
+    with pytest.raises(SQLRejected) as e:
+        validate_read_only_select(sql, TABLES, dialect=dialect)
+    assert e.value.reason == "statement"
+
+
+@pytest.mark.parametrize("function", ["duckdb_settings()", "pragma_version()"])
+def test_duckdb_backslash_does_not_escape_quote(function):
+    # DuckDB에서 'a\'는 완결된 문자열이므로 뒤의 FROM 절이 검사되어야 합니다.
+    with pytest.raises(SQLRejected):
+        validate_read_only_select(f"SELECT 'a\\', * FROM {function} --'", TABLES, dialect="DuckDB")
+
+
+def test_mysql_backslash_escapes_quote():
+    sql = "SELECT 'a\\' FROM users' AS s FROM steam_structured_data"
+    assert validate_read_only_select(sql, TABLES, dialect="MySQL") == sql
+
+
+def test_duckdb_escape_and_dollar_strings():
+    validate_read_only_select("SELECT E'a\\' FROM users', $$ FROM users $$ FROM steam_structured_data", TABLES, dialect="DuckDB")
+    with pytest.raises(SQLRejected):
+        validate_read_only_select("SELECT $t$ x $t$, * FROM duckdb_settings()", TABLES, dialect="DuckDB")
+
+
+def test_duckdb_double_quoted_identifier():
+    sql = 'SELECT "name" FROM "steam_structured_data"'
+    assert validate_read_only_select(sql, TABLES, dialect="DuckDB") == sql
+    with pytest.raises(SQLRejected):
+        validate_read_only_select('SELECT * FROM "glob"(\'/etc/*\')', TABLES, dialect="DuckDB")
+    with pytest.raises(SQLRejected):
+        validate_read_only_select('SELECT * FROM "users"', TABLES, dialect="DuckDB")
+
+
+def test_mysql_double_quotes_are_strings():
+    with pytest.raises(SQLRejected):
+        validate_read_only_select('SELECT name FROM "steam_structured_data"', TABLES, dialect="MySQL")
+    sql = "SELECT `name` FROM `steam_structured_data`"
+    assert validate_read_only_select(sql, TABLES, dialect="MySQL") == sql
+
+
+def test_comment_rules_follow_dialect():
+    # MySQL: # 주석, 공백 없는 --는 주석이 아님, 실행 주석 거부
+    validate_read_only_select("SELECT name FROM steam_structured_data # FROM users", TABLES, dialect="MySQL")
+    with pytest.raises(SQLRejected):
+        validate_read_only_select("SELECT 1 --1 FROM users", TABLES, dialect="MySQL")
+    with pytest.raises(SQLRejected):
+        validate_read_only_select("SELECT /*!50000 1 */ FROM steam_structured_data", TABLES, dialect="MySQL")
+    # DuckDB: 블록 주석은 중첩되고 #은 주석이 아님
+    validate_read_only_select("SELECT /* a /* b */ FROM users */ name FROM steam_structured_data", TABLES, dialect="DuckDB")
+    with pytest.raises(SQLRejected):
+        validate_read_only_select("SELECT name FROM steam_structured_data # FROM users", TABLES, dialect="DuckDB")
+
+
+class _ExplainBackend:
+    dialect = "MySQL"
+
+    def __init__(self, rows, cost):
+        self.plan = (rows, cost)
+
+    def explain(self, sql):
+        return self.plan
+
+
+def test_guard_rejects_expensive_plan_and_counts():
+    guard = SQLGuard(_ExplainBackend(rows=10, cost=1.0), max_rows=100, max_cost=100.0, allowed_tables=TABLES)
+    assert guard.check("SELECT name FROM steam_structured_data") == "SELECT name FROM steam_structured_data"
+
+    guard.backend.plan = (1_000, 1.0)
+    with pytest.raises(SQLRejected) as e:
+        guard.check("SELECT name FROM steam_structured_data")
+    assert e.value.reason == "cost"
+    with pytest.raises(SQLRejected):
+        guard.check("SELECT * FROM users")
+    assert guard.stats() == {"accepted": 1, "rejected_statement": 1, "rejected_cost": 1}
+
+
+def test_guard_uses_backend_dialect():
+    backend = _ExplainBackend(rows=1, cost=1.0)
+    backend.dialect = "DuckDB"
+    guard = SQLGuard(backend, allowed_tables=TABLES)
+    assert guard.check('SELECT name FROM "steam_structured_data"')
+    with pytest.raises(SQLRejected):
+        guard.check("SELECT 'a\\', * FROM duckdb_settings() --'")
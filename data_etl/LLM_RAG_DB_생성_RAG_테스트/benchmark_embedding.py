@@ -0,0 +1,62 @@
+# benchmark_embedding.py
+# 워커 프로세스 수에 따른 임베딩 처리량(texts/sec)을 측정합니다.
+import argparse
+import itertools
+import time
+from sentence_transformers import SentenceTransformer
+import config
+from ingest_data import load_data_from_json, build_semantic_text
+from parallel_embed import ShardedEncoder
+
+
+def measure(encoder, texts, batch_size, rounds):
+    """워밍업 1회 후 rounds회 반복 측정한 평균 처리량을 반환합니다."""
+    encoder.encode(texts[:batch_size], batch_size=batch_size)
+    elapsed = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            encoder.encode(texts[i:i + batch_size], batch_size=batch_size)
+        elapsed += time.perf_counter() - start
+    return len(texts) * rounds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 수별 임베딩 처리량 벤치마크")
+    parser.add_argument("--data", default=config.JSON_DATA_PATH,
+                        help="게임 데이터 파일 경로 (.json, .jsonl 또는 .parquet)")
+    parser.add_argument("--samples", type=int, default=2000, help="측정에 사용할 게임 수")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="측정할 워커 수 목록 (1은 단일 프로세스 기준값)")
+    parser.add_argument("--batch-size", type=int, default=config.INGEST_BATCH_SIZE,
+                        help="워커 하나가 한 번에 처리할 텍스트 수")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    games = itertools.islice(load_data_from_json(args.data), args.samples)
+    texts = [build_semantic_text(game) for game in games]
+    print(f"{len(texts)}개의 텍스트로 측정합니다. 모델: {config.EMBEDDING_MODEL_NAME}")
+
+    results = []
+    for workers in args.workers:
+        if workers == 1:
+            encoder = SentenceTransformer(config.EMBEDDING_MODEL_NAME, device="cpu")
+        else:
+            encoder = ShardedEncoder(config.EMBEDDING_MODEL_NAME, workers)
+        try:
+            throughput = measure(encoder, texts, args.batch_size * workers, args.rounds)
+        finally:
+            if isinstance(encoder, ShardedEncoder):
+                encoder.close()
+        results.append((workers, throughput))
+        print(f"workers={workers:>3}  {throughput:10.1f} texts/sec")
+
+    baseline = results[0][1]
+    print("\n| workers | texts/sec | speedup |")
+    print("|--------:|----------:|--------:|")
+    for workers, throughput in results:
+        print(f"| {workers:>7} | {throughput:9.1f} | {throughput / baseline:6.2f}x |")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,11 @@ EMBEDDING_MODEL_NAME = os.getenv(
 )
 # RAG 답변 생성을 위한 Gemini 모델
 GENERATION_MODEL_NAME = "gemini-2.0-flash"
+# 검색 후보군 재정렬용 로컬 cross-encoder (다국어)
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+# 답변 생성 프롬프트에 넣을 검색 컨텍스트의 토큰 예산과 토큰 수 근사에 쓰는 토큰당 평균 문자 수
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", 1200))
+RAG_CHARS_PER_TOKEN = float(os.getenv("RAG_CHARS_PER_TOKEN", 3))
 
 # --- 데이터베이스 설정 ---
 # Neo4j
@@ -30,6 +35,30 @@ QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
 QDRANT_COLLECTION_NAME = "steam_games"
 
+# MySQL (Text-to-SQL용 정형 데이터)
+DB_USER = os.getenv("DB_USER", "test1")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "test1")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", 3306))
+DB_NAME = os.getenv("DB_NAME", "steam_structured_db")
+STRUCTURED_TABLE_NAME = "steam_structured_data"
+
+# --- 적재 설정 ---
+# 한 번에 임베딩하고 Qdrant에 업서트할 게임 수 (메모리 사용량의 상한을 결정합니다)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))
+# 증분 적재용 게임별 콘텐츠 해시와 체크포인트를 저장할 SQLite 파일
+INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH", "ingest_state.sqlite3")
+# 계산된 임베딩 벡터를 재사용하기 위한 디스크 저장소 (모델별 하위 디렉토리가 생성됩니다)
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "embedding_store")
+# 임베딩을 병렬로 계산할 워커 프로세스 수 (1이면 단일 프로세스로 계산)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", 1))
+# 적재 파이프라인에서 단계 사이 큐에 쌓아둘 최대 레코드 묶음 수
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 32))
+# MySQL 벌크 적재 시 한 번에 INSERT할 행 수
+MYSQL_LOAD_CHUNK_SIZE = int(os.getenv("MYSQL_LOAD_CHUNK_SIZE", 5000))
+
 # --- 파일 경로 ---
-# 데이터를 불러올 JSON 파일의 경로를 지정합니다.
-JSON_DATA_PATH = "steam_games_unstructured_data.json"
\ No newline at end of file
+# Neo4j/Qdrant에 적재할 비정형 데이터 파일 경로 (JSON 배열, JSON Lines 또는 .parquet)
+JSON_DATA_PATH = os.getenv("INGEST_DATA_PATH", "steam_games_unstructured_data.json")
+# MySQL에 적재할 정형 데이터 JSON 파일의 경로
+STRUCTURED_JSON_PATH = "steam_games_structured_data.json"
\ No newline at end of file
@@ -0,0 +1,157 @@
+# embedding_store.py
+# 계산된 임베딩 벡터를 디스크에 보관하고 memory-map으로 재사용하는 저장소
+import hashlib
+import os
+import sqlite3
+import numpy as np
+
+
+def text_hash(text):
+    """임베딩 입력 텍스트의 해시입니다. 같은 텍스트는 같은 벡터를 갖습니다."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    임베딩 모델별 디렉토리에 float32 벡터를 행 단위로 이어 붙여 저장합니다.
+    - vectors.f32: (행 수, 차원) 크기의 원시 float32 배열 (np.memmap으로 읽음)
+    - index.sqlite3: 텍스트 해시 -> 행 번호, 게임 id -> 행 번호 인덱스
+    저장된 벡터는 memmap 뷰로 반환되므로 다시 읽을 때 복사나 재계산이 필요 없습니다.
+    """
+
+    def __init__(self, root_dir, model_name, dim):
+        self.model_name = model_name
+        self.dim = dim
+        self.dir = os.path.join(root_dir, model_name.replace('/', '__'))
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, 'vectors.f32')
+        self.row_bytes = dim * np.dtype(np.float32).itemsize
+
+        self.conn = sqlite3.connect(os.path.join(self.dir, 'index.sqlite3'))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS text_rows (text_hash TEXT PRIMARY KEY, row INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS id_rows (id TEXT PRIMARY KEY, row INTEGER NOT NULL);
+        """)
+        self._check_meta()
+
+        # 쓰기 도중 중단되어 남은 불완전한 행은 잘라냅니다.
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, 'wb').close()
+        size = os.path.getsize(self.vectors_path)
+        if size % self.row_bytes:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(size - size % self.row_bytes)
+        self.num_rows = os.path.getsize(self.vectors_path) // self.row_bytes
+        self._mmap = None
+
+    def _check_meta(self):
+        rows = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if not rows:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    [('model_name', self.model_name), ('dim', str(self.dim))]
+                )
+        elif rows.get('model_name') != self.model_name or int(rows.get('dim', 0)) != self.dim:
+            raise ValueError(
+                f"임베딩 저장소 '{self.dir}'의 모델/차원({rows.get('model_name')}, {rows.get('dim')})이 "
+                f"요청한 값({self.model_name}, {self.dim})과 다릅니다."
+            )
+
+    def _view(self):
+        """현재 행 수에 맞는 읽기 전용 memmap을 반환합니다."""
+        if self.num_rows == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self._mmap is None or self._mmap.shape[0] != self.num_rows:
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                   shape=(self.num_rows, self.dim))
+        return self._mmap
+
+    def lookup(self, hashes):
+        """텍스트 해시 목록에 대해 저장된 행 번호를 {hash: row} 형태로 반환합니다."""
+        found = {}
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self.conn.execute(
+                f"SELECT text_hash, row FROM text_rows WHERE text_hash IN ({placeholders})", chunk
+            ).fetchall())
+        return found
+
+    def rows(self, row_numbers):
+        """행 번호 목록에 해당하는 벡터를 memmap 뷰(복사 없음)의 리스트로 반환합니다."""
+        view = self._view()
+        return [view[row] for row in row_numbers]
+
+    def append(self, hashes, vectors, ids=None):
+        """새 벡터를 파일 끝에 추가하고 해시/id 인덱스에 행 번호를 기록합니다."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = self.num_rows
+        with open(self.vectors_path, 'ab') as f:
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        row_numbers = list(range(start, start + len(vectors)))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO text_rows (text_hash, row) VALUES (?, ?)",
+                list(zip(hashes, row_numbers))
+            )
+            if ids is not None:
+                self.link_ids(ids, row_numbers, commit=False)
+        self.num_rows += len(vectors)
+        return row_numbers
+
+    def link_ids(self, ids, row_numbers, commit=True):
+        """게임 id가 가리키는 행을 갱신합니다."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO id_rows (id, row) VALUES (?, ?)",
+            [(str(i), row) for i, row in zip(ids, row_numbers)]
+        )
+        if commit:
+            self.conn.commit()
+
+    def vectors_for_ids(self, ids):
+        """게임 id 목록의 저장된 벡터를 반환합니다. 저장되지 않은 id는 None입니다."""
+        ids = [str(i) for i in ids]
+        found = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(self.conn.execute(
+                f"SELECT id, row FROM id_rows WHERE id IN ({placeholders})", chunk
+            ).fetchall())
+        view = self._view()
+        return [view[found[i]] if i in found else None for i in ids]
+
+    def encode(self, embedding_model, texts, ids=None, batch_size=32):
+        """
+        저장소에 있는 텍스트는 저장된 벡터를 그대로 사용하고,
+        없는 텍스트만 embedding_model로 계산하여 저장한 뒤 입력 순서대로 반환합니다.
+        """
+        hashes = [text_hash(t) for t in texts]
+        found = self.lookup(hashes)
+
+        missing = [i for i, h in enumerate(hashes) if h not in found]
+        if missing:
+            new_vectors = embedding_model.encode([texts[i] for i in missing], batch_size=batch_size)
+            # 같은 배치 안에 중복 텍스트가 있으면 한 번만 저장합니다.
+            new_hashes, new_rows, seen = [], [], set()
+            for i, vector in zip(missing, new_vectors):
+                if hashes[i] not in seen:
+                    seen.add(hashes[i])
+                    new_hashes.append(hashes[i])
+                    new_rows.append(vector)
+            for h, row in zip(new_hashes, self.append(new_hashes, np.stack(new_rows))):
+                found[h] = row
+
+        row_numbers = [found[h] for h in hashes]
+        if ids is not None:
+            self.link_ids(ids, row_numbers)
+        return self.rows(row_numbers)
+
+    def close(self):
+        self._mmap = None
+        self.conn.close()
@@ -5,23 +5,38 @@ from qdrant_client import QdrantClient, models
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import config
+import os
+import argparse
+import itertools
+from record_stream import iter_records, iter_batches
+from ingest_state import IngestState, content_hash
+from embedding_store import EmbeddingStore
+from parallel_embed import ShardedEncoder
+from ingest_pipeline import run_pipeline
 import torch
 
 # --- 데이터 처리 함수 ---
 
+# Neo4j와 Qdrant 적재에 사용하는 컬럼 (Parquet 입력에서는 이 컬럼만 읽습니다)
+INGEST_COLUMNS = [
+    'appid', 'name', 'release_date', 'about_the_game',
+    'developers', 'publishers', 'genres', 'categories',
+]
+
 def load_data_from_json(filepath):
-    """지정된 경로에서 JSON 파일을 로드합니다."""
+    """
+    지정된 경로의 JSON 배열, JSON Lines 또는 Parquet 파일에서 게임 데이터를 한 건씩 읽어오는 제너레이터입니다.
+    파일 전체를 한 번에 로드하지 않으므로 데이터가 커져도 메모리 사용량이 일정합니다.
+    """
+    count = 0
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print(f"'{filepath}'에서 {len(data)}개의 게임 데이터를 성공적으로 로드했습니다.")
-        return data
-    except FileNotFoundError:
-        print(f"오류: '{filepath}' 파일을 찾을 수 없습니다.")
-        return None
-    except json.JSONDecodeError:
-        print(f"오류: '{filepath}' 파일이 올바른 JSON 형식이 아닙니다.")
-        return None
+        for game in iter_records(filepath, columns=INGEST_COLUMNS):
+            count += 1
+            yield game
+    except json.JSONDecodeError as e:
+        print(f"오류: '{filepath}' 파일이 올바른 JSON 형식이 아닙니다. ({e})")
+        raise
+    print(f"'{filepath}'에서 {count}개의 게임 데이터를 읽었습니다.")
 
 def split_string_to_list(value):
     """
@@ -34,136 +49,315 @@ def split_string_to_list(value):
         return value
     return []
 
+def iter_changed_batches(game_data, state, sink, batch_size):
+    """
+    state에 저장된 콘텐츠 해시와 비교하여 신규 또는 변경된 게임만 배치로 반환합니다.
+    호출자가 배치 처리를 마치고 다음 배치를 요청하는 시점에 해시와 체크포인트를 기록하므로,
+    중단되더라도 마지막으로 완료된 배치 이후부터 다시 시작할 수 있습니다.
+    """
+    position = state.start(sink)
+    games = itertools.islice(game_data, position, None)
+
+    for scanned in iter_batches(games, batch_size):
+        known = state.known_hashes(sink, [game.get('appid') for game in scanned])
+        entries, changed = [], []
+        for game in scanned:
+            digest = content_hash(game)
+            entries.append((game.get('appid'), digest))
+            if known.get(str(game.get('appid'))) != digest:
+                changed.append(game)
+
+        position += len(scanned)
+        yield changed
+        state.commit(sink, entries, position)
+
 # --- Neo4j 데이터 저장 함수 ---
 
-def populate_neo4j(driver, game_data):
-    """게임 데이터를 Neo4j 데이터베이스에 저장합니다."""
+def write_game_neo4j(session, game, replace=False):
+    """게임 한 건의 노드와 관계를 Neo4j에 기록합니다. replace이면 기존 관계를 먼저 지웁니다."""
+    if replace:
+        session.run("""
+            MATCH (g:Game {appid: $appid})-[r]-()
+            DELETE r
+        """, appid=game.get('appid'))
+
+    # Game 노드 생성 또는 업데이트
+    session.run("""
+        MERGE (g:Game {appid: $appid})
+        ON CREATE SET g.name = $name, g.release_date = $release_date
+        ON MATCH SET g.name = $name, g.release_date = $release_date
+    """, appid=game.get('appid'), name=game.get('name'), release_date=game.get('release_date'))
+
+    # Developer, Publisher, Genre, Category 노드 및 관계 생성
+    for dev in split_string_to_list(game.get('developers', [])):
+        session.run("""
+            MERGE (d:Developer {name: $dev_name})
+            WITH d
+            MATCH (g:Game {appid: $appid})
+            MERGE (d)-[:DEVELOPED]->(g)
+        """, dev_name=dev, appid=game.get('appid'))
+
+    for pub in split_string_to_list(game.get('publishers', [])):
+        session.run("""
+            MERGE (p:Publisher {name: $pub_name})
+            WITH p
+            MATCH (g:Game {appid: $appid})
+            MERGE (p)-[:PUBLISHED]->(g)
+        """, pub_name=pub, appid=game.get('appid'))
+
+    for genre in split_string_to_list(game.get('genres', [])):
+        session.run("""
+            MERGE (gn:Genre {name: $genre_name})
+            WITH gn
+            MATCH (g:Game {appid: $appid})
+            MERGE (g)-[:HAS_GENRE]->(gn)
+        """, genre_name=genre, appid=game.get('appid'))
+
+    for cat in split_string_to_list(game.get('categories', [])):
+        session.run("""
+            MERGE (c:Category {name: $cat_name})
+            WITH c
+            MATCH (g:Game {appid: $appid})
+            MERGE (g)-[:HAS_CATEGORY]->(c)
+        """, cat_name=cat, appid=game.get('appid'))
+
+def delete_games_neo4j(session, appids):
+    """원본에서 사라진 게임 노드를 삭제합니다."""
+    session.run("""
+        MATCH (g:Game)
+        WHERE toString(g.appid) IN $appids
+        DETACH DELETE g
+    """, appids=[str(appid) for appid in appids])
+
+def delete_orphan_entities_neo4j(session):
+    """
+    연결된 게임이 하나도 없는 Developer/Publisher/Genre/Category 노드를 삭제합니다.
+    게임 삭제뿐 아니라 변경된 게임의 관계를 다시 쓸 때(replace)도 고아 노드가 생기므로 변경분 적재마다 실행합니다.
+    """
+    result = session.run("""
+        MATCH (n)
+        WHERE (n:Developer OR n:Publisher OR n:Genre OR n:Category) AND NOT (n)--()
+        DELETE n
+        RETURN count(n) AS deleted
+    """)
+    return result.single()["deleted"]
+
+def populate_neo4j(driver, game_data, state=None, full=True, batch_size=config.INGEST_BATCH_SIZE):
+    """
+    게임 데이터를 Neo4j 데이터베이스에 저장합니다.
+    state가 주어지고 full이 아니면 기존 데이터를 유지한 채 신규/변경된 게임만 다시 쓰고,
+    원본에서 삭제된 게임은 그래프에서도 제거합니다.
+    """
     print("Neo4j에 데이터 저장을 시작합니다...")
     with driver.session() as session:
-        # 기존 데이터 삭제 (중복 방지)
-        session.run("MATCH (n) DETACH DELETE n")
-        print("Neo4j의 기존 데이터를 삭제했습니다.")
-
-        for game in tqdm(game_data, desc="Neo4j 데이터 저장 중"):
-            # Game 노드 생성 또는 업데이트
-            session.run("""
-                MERGE (g:Game {appid: $appid})
-                ON CREATE SET g.name = $name, g.release_date = $release_date
-                ON MATCH SET g.name = $name, g.release_date = $release_date
-            """, appid=game.get('appid'), name=game.get('name'), release_date=game.get('release_date'))
-
-            # Developer, Publisher, Genre, Category 노드 및 관계 생성
-            for dev in split_string_to_list(game.get('developers', [])):
-                session.run("""
-                    MERGE (d:Developer {name: $dev_name})
-                    WITH d
-                    MATCH (g:Game {appid: $appid})
-                    MERGE (d)-[:DEVELOPED]->(g)
-                """, dev_name=dev, appid=game.get('appid'))
-
-            for pub in split_string_to_list(game.get('publishers', [])):
-                session.run("""
-                    MERGE (p:Publisher {name: $pub_name})
-                    WITH p
-                    MATCH (g:Game {appid: $appid})
-                    MERGE (p)-[:PUBLISHED]->(g)
-                """, pub_name=pub, appid=game.get('appid'))
-            
-            for genre in split_string_to_list(game.get('genres', [])):
-                session.run("""
-                    MERGE (gn:Genre {name: $genre_name})
-                    WITH gn
-                    MATCH (g:Game {appid: $appid})
-                    MERGE (g)-[:HAS_GENRE]->(gn)
-                """, genre_name=genre, appid=game.get('appid'))
-
-            for cat in split_string_to_list(game.get('categories', [])):
-                session.run("""
-                    MERGE (c:Category {name: $cat_name})
-                    WITH c
-                    MATCH (g:Game {appid: $appid})
-                    MERGE (g)-[:HAS_CATEGORY]->(c)
-                """, cat_name=cat, appid=game.get('appid'))
+        if full:
+            # 기존 데이터 삭제 (중복 방지)
+            session.run("MATCH (n) DETACH DELETE n")
+            print("Neo4j의 기존 데이터를 삭제했습니다.")
+            if state:
+                state.reset("neo4j")
+
+        if state is None:
+            for game in tqdm(game_data, desc="Neo4j 데이터 저장 중"):
+                write_game_neo4j(session, game)
+        else:
+            written = 0
+            with tqdm(desc="Neo4j 변경 데이터 저장 중") as pbar:
+                for changed in iter_changed_batches(game_data, state, "neo4j", batch_size):
+                    for game in changed:
+                        write_game_neo4j(session, game, replace=not full)
+                    written += len(changed)
+                    pbar.update(len(changed))
+
+            removed = state.removed_appids("neo4j")
+            if removed:
+                delete_games_neo4j(session, removed)
+            orphans = 0 if full else delete_orphan_entities_neo4j(session)
+            state.finish("neo4j", removed)
+            print(f"Neo4j: {written}개 게임을 새로 쓰고 {len(removed)}개 게임과 고아 노드 {orphans}개를 삭제했습니다.")
 
     print("Neo4j 데이터 저장을 완료했습니다.")
 
 # --- Qdrant 데이터 저장 함수 ---
 
-def populate_qdrant(client, embedding_model, game_data):
-    """게임 데이터를 임베딩하여 Qdrant에 저장합니다."""
-    print("Qdrant에 데이터 저장을 시작합니다...")
-    
-    # Qdrant 컬렉션 재생성 (기존 데이터 삭제)
-    try:
+def build_semantic_text(game):
+    """의미 검색을 위한 임베딩 입력 텍스트를 구성합니다."""
+    # Parquet 입력의 빈 값은 None으로 읽히므로 "None" 문자열이 들어가지 않도록 빈 문자열로 바꿉니다.
+    return (
+        f"Game: {game.get('name') or ''}. "
+        f"Genres: {', '.join(split_string_to_list(game.get('genres')))}. "
+        f"About: {game.get('about_the_game') or ''}"
+    )
+
+def build_payload(game):
+    """payload에는 검색 결과로 보여주고 싶은 주요 정보만 담습니다."""
+    return {
+        "appid": int(game['appid']),
+        "name": game.get('name') or '',
+        "genres": split_string_to_list(game.get('genres')),
+        "about": (game.get('about_the_game') or '')[:500] + '...' # 설명은 일부만 저장
+    }
+
+def ensure_qdrant_collection(client, embedding_model, recreate):
+    """Qdrant 컬렉션을 준비합니다. recreate이면 기존 데이터를 지우고 새로 만듭니다."""
+    vectors_config = models.VectorParams(
+        size=embedding_model.get_sentence_embedding_dimension(),
+        distance=models.Distance.COSINE
+    )
+    if recreate:
         client.recreate_collection(
             collection_name=config.QDRANT_COLLECTION_NAME,
-            vectors_config=models.VectorParams(
-                size=embedding_model.get_sentence_embedding_dimension(),
-                distance=models.Distance.COSINE
-            )
+            vectors_config=vectors_config
         )
         print(f"Qdrant 컬렉션 '{config.QDRANT_COLLECTION_NAME}'을(를) 새로 생성했습니다.")
-    except Exception as e:
-        print(f"Qdrant 컬렉션 생성 중 오류 발생: {e}")
-        return
-
-    points_to_upsert = []
-    for game in tqdm(game_data, desc="Qdrant 데이터 임베딩 및 준비 중"):
-        # 의미 검색을 위한 텍스트 구성
-        semantic_text = (
-            f"Game: {game.get('name', '')}. "
-            f"Genres: {', '.join(split_string_to_list(game.get('genres', [])))}. "
-            f"About: {game.get('about_the_game', '')}"
+    elif not client.collection_exists(config.QDRANT_COLLECTION_NAME):
+        client.create_collection(
+            collection_name=config.QDRANT_COLLECTION_NAME,
+            vectors_config=vectors_config
         )
-        
-        vector = embedding_model.encode(semantic_text).tolist()
-        
-        # payload에는 검색 결과로 보여주고 싶은 주요 정보만 담습니다.
-        payload = {
-            "appid": int(game['appid']),
-            "name": game.get('name', ''),
-            "genres": split_string_to_list(game.get('genres', [])),
-            "about": game.get('about_the_game', '')[:500] + '...' # 설명은 일부만 저장
-        }
-
-        points_to_upsert.append(
-            models.PointStruct(
-                id=int(game['appid']),
-                vector=vector,
-                payload=payload
-            )
+        print(f"Qdrant 컬렉션 '{config.QDRANT_COLLECTION_NAME}'이(가) 없어 새로 생성했습니다.")
+
+def upsert_games_qdrant(client, embedding_model, games, batch_size, store=None):
+    """
+    게임 목록을 한 번에 임베딩하여 Qdrant에 업서트합니다.
+    store가 주어지면 이미 계산된 벡터는 저장소에서 읽고, 새로 계산한 벡터는 저장소에 추가합니다.
+    """
+    semantic_texts = [build_semantic_text(game) for game in games]
+    if store is not None:
+        vectors = store.encode(embedding_model, semantic_texts,
+                               ids=[game['appid'] for game in games], batch_size=batch_size)
+    else:
+        vectors = embedding_model.encode(semantic_texts, batch_size=batch_size)
+
+    points = [
+        models.PointStruct(
+            id=int(game['appid']),
+            vector=vector.tolist(),
+            payload=build_payload(game)
         )
+        for game, vector in zip(games, vectors)
+    ]
 
-    # 데이터를 Qdrant에 일괄 업로드
     client.upsert(
         collection_name=config.QDRANT_COLLECTION_NAME,
-        points=points_to_upsert,
+        points=points,
         wait=True
     )
+
+def populate_qdrant(client, embedding_model, game_data, batch_size=config.INGEST_BATCH_SIZE, state=None, full=True,
+                    store=None):
+    """
+    게임 데이터를 batch_size 단위로 임베딩하여 Qdrant에 저장합니다.
+    각 배치는 임베딩이 끝나는 즉시 업서트되므로 전체 포인트를 메모리에 모아두지 않습니다.
+    state가 주어지고 full이 아니면 신규/변경된 게임만 다시 임베딩하고, 삭제된 게임의 포인트를 제거합니다.
+    store(EmbeddingStore)가 주어지면 이전에 계산한 벡터를 재사용합니다.
+    """
+    print("Qdrant에 데이터 저장을 시작합니다...")
+
+    try:
+        ensure_qdrant_collection(client, embedding_model, recreate=full)
+    except Exception as e:
+        print(f"Qdrant 컬렉션 생성 중 오류 발생: {e}")
+        return
+
+    if state is not None and full:
+        state.reset("qdrant")
+
+    if state is None:
+        batches = iter_batches(game_data, batch_size)
+    else:
+        batches = iter_changed_batches(game_data, state, "qdrant", batch_size)
+
+    total = len(game_data) if hasattr(game_data, '__len__') else None
+    upserted = 0
+    with tqdm(total=total, desc="Qdrant 데이터 임베딩 및 업로드 중") as pbar:
+        # 배치 단위로 임베딩한 뒤 바로 업서트하여 메모리에는 한 배치만 유지합니다.
+        for batch in batches:
+            if batch:
+                upsert_games_qdrant(client, embedding_model, batch, batch_size, store=store)
+            upserted += len(batch)
+            pbar.update(len(batch))
+
+    if state is not None:
+        removed = state.removed_appids("qdrant")
+        if removed:
+            client.delete(
+                collection_name=config.QDRANT_COLLECTION_NAME,
+                points_selector=models.PointIdsList(points=[int(appid) for appid in removed]),
+                wait=True
+            )
+        state.finish("qdrant", removed)
+        print(f"Qdrant: {len(removed)}개의 삭제된 게임 포인트를 제거했습니다.")
+
+    print(f"총 {upserted}개의 포인트를 업로드했습니다.")
     print("Qdrant 데이터 저장을 완료했습니다.")
 
 
+# --- 저장소별 적재 단계 ---
+
+def run_neo4j_sink(game_data, full, data_path=config.JSON_DATA_PATH):
+    """Neo4j 연결부터 적재까지 수행합니다. 파이프라인의 스레드 안에서 실행됩니다."""
+    # SQLite 연결은 생성한 스레드에서만 사용할 수 있으므로 단계 안에서 엽니다.
+    state = IngestState(config.INGEST_STATE_PATH, data_path)
+    neo4j_driver = GraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USER, config.NEO4J_PASSWORD))
+    try:
+        populate_neo4j(neo4j_driver, game_data, state=state, full=full)
+    finally:
+        neo4j_driver.close()
+        state.close()
+
+def run_qdrant_sink(game_data, full, workers, data_path=config.JSON_DATA_PATH):
+    """임베딩 모델 로드, 임베딩, Qdrant 적재를 수행합니다. 파이프라인의 스레드 안에서 실행됩니다."""
+    state = IngestState(config.INGEST_STATE_PATH, data_path)
+    qdrant_client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
+
+    batch_size = config.INGEST_BATCH_SIZE
+    if workers > 1:
+        # 워커마다 모델 사본을 두고 배치를 샤드로 나누어 병렬 임베딩합니다.
+        print(f"{workers}개의 워커 프로세스로 임베딩을 계산합니다.")
+        embedding_model = ShardedEncoder(config.EMBEDDING_MODEL_NAME, workers)
+        batch_size = config.INGEST_BATCH_SIZE * workers
+    else:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        print(f"사용할 디바이스: {device}")
+        embedding_model = SentenceTransformer(config.EMBEDDING_MODEL_NAME, device=device)
+
+    embedding_store = EmbeddingStore(config.EMBEDDING_STORE_DIR, config.EMBEDDING_MODEL_NAME,
+                                     embedding_model.get_sentence_embedding_dimension())
+    try:
+        populate_qdrant(qdrant_client, embedding_model, game_data,
+                        batch_size=batch_size, state=state, full=full, store=embedding_store)
+    finally:
+        embedding_store.close()
+        if isinstance(embedding_model, ShardedEncoder):
+            embedding_model.close()
+        state.close()
+
+
 # --- 메인 실행 로직 ---
 if __name__ == "__main__":
-    game_data = load_data_from_json(config.JSON_DATA_PATH)
-    
-    if game_data:
-        # --- Neo4j 연결 및 데이터 저장 ---
-        try:
-            neo4j_driver = GraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USER, config.NEO4J_PASSWORD))
-            populate_neo4j(neo4j_driver, game_data)
-            neo4j_driver.close()
-        except Exception as e:
-            print(f"Neo4j 연결 또는 데이터 저장 중 오류 발생: {e}")
-
-        # --- Qdrant 연결 및 임베딩 모델 로드 ---
-        try:
-            qdrant_client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
-            
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            print(f"사용할 디바이스: {device}")
-            embedding_model = SentenceTransformer(config.EMBEDDING_MODEL_NAME, device=device)
-            
-            populate_qdrant(qdrant_client, embedding_model, game_data)
-        except Exception as e:
-            print(f"Qdrant 연결 또는 데이터 저장 중 오류 발생: {e}")
+    parser = argparse.ArgumentParser(description="Steam 비정형 데이터를 Neo4j와 Qdrant에 적재합니다.")
+    parser.add_argument("--data", default=config.JSON_DATA_PATH,
+                        help="적재할 파일 경로 (.json, .jsonl 또는 .parquet, 기본값: INGEST_DATA_PATH)")
+    parser.add_argument("--full", action="store_true",
+                        help="기존 데이터를 모두 지우고 처음부터 다시 적재합니다 (기본값: 변경분만 적재)")
+    parser.add_argument("--workers", type=int, default=config.EMBEDDING_WORKERS,
+                        help="임베딩을 나누어 계산할 워커 프로세스 수 (CPU 전용 환경용, 기본값: 1)")
+    parser.add_argument("--queue-size", type=int, default=config.PIPELINE_QUEUE_SIZE,
+                        help="단계 사이 큐에 쌓아둘 최대 레코드 묶음 수 (backpressure 기준)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"오류: '{args.data}' 파일을 찾을 수 없습니다.")
+    else:
+        # 파일은 한 번만 읽고, Neo4j 단계와 임베딩 -> Qdrant 단계가 동시에 소비합니다.
+        errors = run_pipeline(
+            load_data_from_json(args.data),
+            {
+                "neo4j": lambda games: run_neo4j_sink(games, args.full, args.data),
+                "qdrant": lambda games: run_qdrant_sink(games, args.full, args.workers, args.data),
+            },
+            queue_size=args.queue_size,
+        )
+        for name, error in errors.items():
+            print(f"{name} 단계 연결 또는 데이터 저장 중 오류 발생: {error}")
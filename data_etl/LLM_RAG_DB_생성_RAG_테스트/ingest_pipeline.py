@@ -0,0 +1,139 @@
+# ingest_pipeline.py
+# 하나의 리더 단계가 레코드를 읽어 여러 저장소(sink) 단계로 동시에 분배하는 생산자/소비자 파이프라인
+import queue
+import threading
+import time
+
+# 큐에 넣는 레코드 묶음 크기 (레코드 단위로 넣을 때의 락 오버헤드를 줄입니다)
+CHUNK_SIZE = 64
+
+_END = object()
+
+
+class _ReaderFailed:
+    """리더 단계에서 발생한 예외를 소비자에게 전달하기 위한 표식입니다."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class StageMeter:
+    """단계별 처리 건수와 처리량을 집계합니다."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def add(self, n):
+        with self.lock:
+            self.count += n
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        state = "완료" if self.finished else "진행 중"
+        return f"[{self.name}] {state}: {self.count}건, {elapsed:.1f}초, {rate:.1f}건/초"
+
+
+def _iter_queue(q, meter):
+    """소비자 쪽에서 큐를 레코드 스트림으로 바꿔주는 제너레이터입니다."""
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        if isinstance(item, _ReaderFailed):
+            # 입력이 중간에 끊긴 채로 정상 종료되면 증분 적재가 남은 게임을 삭제된 것으로 오인하므로
+            # 반드시 예외로 전달합니다.
+            raise RuntimeError("리더 단계가 실패하여 적재를 중단합니다.") from item.error
+        meter.add(len(item))
+        yield from item
+
+
+def run_pipeline(records, sinks, queue_size=32, report_interval=10.0):
+    """
+    records를 한 번만 읽어 sinks의 각 단계로 동시에 분배합니다.
+
+    - sinks: {이름: 레코드 이터러블을 받아 적재하는 함수}
+    - queue_size: 단계별 큐에 쌓일 수 있는 최대 묶음 수. 느린 단계가 있으면 리더가 대기합니다(backpressure).
+    - report_interval: 단계별 진행 상황과 처리량을 출력하는 주기(초)
+
+    단계 이름별 예외를 {이름: 예외} 형태로 반환합니다 (성공한 단계는 포함되지 않습니다).
+    """
+    queues = {name: queue.Queue(maxsize=queue_size) for name in sinks}
+    failed = {name: threading.Event() for name in sinks}
+    meters = {"reader": StageMeter("reader")}
+    meters.update({name: StageMeter(name) for name in sinks})
+    errors = {}
+    done = threading.Event()
+
+    def put(name, item):
+        # 실패한 단계의 큐가 가득 차서 리더가 영원히 멈추지 않도록 주기적으로 확인합니다.
+        while not failed[name].is_set():
+            try:
+                queues[name].put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def reader():
+        chunk = []
+        try:
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= CHUNK_SIZE:
+                    for name in sinks:
+                        put(name, chunk)
+                    meters["reader"].add(len(chunk))
+                    chunk = []
+            if chunk:
+                for name in sinks:
+                    put(name, chunk)
+                meters["reader"].add(len(chunk))
+            end = _END
+        except Exception as e:
+            errors["reader"] = e
+            end = _ReaderFailed(e)
+        for name in sinks:
+            put(name, end)
+        meters["reader"].finish()
+
+    def consumer(name, sink):
+        try:
+            sink(_iter_queue(queues[name], meters[name]))
+        except Exception as e:
+            errors[name] = e
+            print(f"[{name}] 단계에서 오류 발생: {e}")
+        finally:
+            failed[name].set()
+            meters[name].finish()
+
+    def reporter():
+        while not done.wait(report_interval):
+            for name, meter in meters.items():
+                backlog = f", 대기 {queues[name].qsize()}묶음" if name in queues else ""
+                print(meter.summary() + backlog)
+
+    threads = [threading.Thread(target=reader, name="reader", daemon=True)]
+    threads += [
+        threading.Thread(target=consumer, args=(name, sink), name=name, daemon=True)
+        for name, sink in sinks.items()
+    ]
+    report_thread = threading.Thread(target=reporter, name="reporter", daemon=True)
+
+    for t in threads:
+        t.start()
+    report_thread.start()
+    for t in threads:
+        t.join()
+    done.set()
+    report_thread.join()
+
+    for meter in meters.values():
+        print(meter.summary())
+    return errors
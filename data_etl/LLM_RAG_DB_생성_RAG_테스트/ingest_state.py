@@ -0,0 +1,130 @@
+# ingest_state.py
+# 증분 적재를 위한 게임별 콘텐츠 해시와 적재 체크포인트를 SQLite 파일에 저장합니다.
+import hashlib
+import json
+import os
+import sqlite3
+
+
+def content_hash(game):
+    """게임 레코드의 내용을 키 순서와 무관하게 해시합니다."""
+    canonical = json.dumps(game, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def source_fingerprint(filepath):
+    """원본 파일이 바뀌었는지 판별하기 위한 크기/수정시각 기반 식별자입니다."""
+    stat = os.stat(filepath)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class IngestState:
+    """
+    저장소(sink)별로 appid -> 콘텐츠 해시와 마지막으로 확인된 실행 번호를 기록합니다.
+    실행이 중단되면 같은 원본 파일에 한해 마지막 체크포인트 위치부터 이어서 적재합니다.
+    """
+
+    def __init__(self, db_path, source_path):
+        self.conn = sqlite3.connect(db_path)
+        self.fingerprint = source_fingerprint(source_path)
+        self.run_ids = {}
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS game_hashes (
+                sink TEXT NOT NULL,
+                appid TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                last_run INTEGER NOT NULL,
+                PRIMARY KEY (sink, appid)
+            );
+            CREATE TABLE IF NOT EXISTS ingest_runs (
+                sink TEXT PRIMARY KEY,
+                run_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL
+            );
+        """)
+
+    def start(self, sink):
+        """
+        sink의 적재 실행을 시작하고, 건너뛰어도 되는 레코드 수(체크포인트 위치)를 반환합니다.
+        같은 원본으로 진행 중이던 실행이 있으면 그 실행을 이어받습니다.
+        """
+        row = self.conn.execute(
+            "SELECT run_id, status, position, fingerprint FROM ingest_runs WHERE sink = ?", (sink,)
+        ).fetchone()
+
+        if row and row[1] == 'running' and row[3] == self.fingerprint:
+            self.run_ids[sink] = row[0]
+            print(f"[{sink}] 중단된 실행 #{row[0]}을(를) {row[2]}번째 레코드부터 이어서 진행합니다.")
+            return row[2]
+
+        run_id = row[0] + 1 if row else 1
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ingest_runs (sink, run_id, status, position, fingerprint) "
+                "VALUES (?, ?, 'running', 0, ?)",
+                (sink, run_id, self.fingerprint)
+            )
+        self.run_ids[sink] = run_id
+        return 0
+
+    def known_hashes(self, sink, appids):
+        """주어진 appid들의 저장된 해시를 {appid: hash} 형태로 반환합니다."""
+        appids = [str(a) for a in appids]
+        known = {}
+        # SQLite 바인딩 변수 개수 제한을 넘지 않도록 나누어 조회합니다.
+        for i in range(0, len(appids), 500):
+            chunk = appids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT appid, content_hash FROM game_hashes WHERE sink = ? AND appid IN ({placeholders})",
+                [sink, *chunk]
+            )
+            known.update(rows.fetchall())
+        return known
+
+    def commit(self, sink, entries, position):
+        """
+        처리가 끝난 (appid, hash) 목록을 현재 실행에서 확인된 것으로 기록하고
+        체크포인트를 position으로 옮깁니다. 하나의 트랜잭션으로 처리됩니다.
+        """
+        run_id = self.run_ids[sink]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO game_hashes (sink, appid, content_hash, last_run) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sink, appid) DO UPDATE SET "
+                "content_hash = excluded.content_hash, last_run = excluded.last_run",
+                [(sink, str(appid), h, run_id) for appid, h in entries]
+            )
+            self.conn.execute(
+                "UPDATE ingest_runs SET position = ? WHERE sink = ?", (position, sink)
+            )
+
+    def removed_appids(self, sink):
+        """이번 실행에서 한 번도 확인되지 않은(원본에서 삭제된) appid 목록입니다."""
+        rows = self.conn.execute(
+            "SELECT appid FROM game_hashes WHERE sink = ? AND last_run != ?",
+            (sink, self.run_ids[sink])
+        )
+        return [r[0] for r in rows.fetchall()]
+
+    def finish(self, sink, removed):
+        """삭제된 appid를 상태에서 제거하고 실행을 완료로 표시합니다."""
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM game_hashes WHERE sink = ? AND appid = ?",
+                [(sink, appid) for appid in removed]
+            )
+            self.conn.execute(
+                "UPDATE ingest_runs SET status = 'done' WHERE sink = ?", (sink,)
+            )
+
+    def reset(self, sink):
+        """sink의 모든 해시와 체크포인트를 지웁니다 (전체 재적재 시 사용)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM game_hashes WHERE sink = ?", (sink,))
+            self.conn.execute("DELETE FROM ingest_runs WHERE sink = ?", (sink,))
+
+    def close(self):
+        self.conn.close()
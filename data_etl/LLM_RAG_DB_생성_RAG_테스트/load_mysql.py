@@ -0,0 +1,278 @@
+# load_mysql.py
+# 정형 Steam 데이터를 명시적인 스키마로 MySQL에 벌크 적재합니다.
+# 스테이징 테이블에 적재하고 인덱스를 만든 뒤 RENAME TABLE로 원자적으로 교체합니다.
+import argparse
+import os
+import tempfile
+import time
+import pymysql
+import config
+from record_stream import iter_records, iter_batches
+
+# --- 테이블 스키마 ---
+# (컬럼명, MySQL 타입, 변환 종류). 원본 JSON의 키는 소문자/언더스코어로 정규화하여 매칭합니다.
+STRUCTURED_SCHEMA = [
+    ("appid", "INT UNSIGNED NOT NULL", "int"),
+    ("name", "VARCHAR(512)", "str"),
+    ("peak_ccu", "INT", "int"),
+    ("required_age", "SMALLINT", "int"),
+    ("price", "DOUBLE", "float"),
+    ("dlc_count", "INT", "int"),
+    ("windows", "TINYINT(1)", "bool"),
+    ("mac", "TINYINT(1)", "bool"),
+    ("linux", "TINYINT(1)", "bool"),
+    ("metacritic_score", "SMALLINT", "int"),
+    ("user_score", "SMALLINT", "int"),
+    ("positive", "INT", "int"),
+    ("negative", "INT", "int"),
+    ("score_rank", "INT", "int"),
+    ("achievements", "INT", "int"),
+    ("recommendations", "INT", "int"),
+    ("average_playtime_forever", "INT", "int"),
+    ("average_playtime_two_weeks", "INT", "int"),
+    ("median_playtime_forever", "INT", "int"),
+    ("median_playtime_two_weeks", "INT", "int"),
+]
+
+# 원본 컬럼명이 스키마와 다른 경우의 별칭 (Kaggle 원본은 'DiscountDLC count' 헤더가 붙어 있습니다)
+COLUMN_ALIASES = {
+    "discountdlc_count": "dlc_count",
+}
+
+# Text-to-SQL 질의가 주로 필터/정렬하는 컬럼의 인덱스
+STRUCTURED_INDEXES = {
+    "idx_price": ["price"],
+    "idx_peak_ccu": ["peak_ccu"],
+    "idx_positive": ["positive"],
+    "idx_metacritic_score": ["metacritic_score"],
+    "idx_windows": ["windows"],
+    "idx_mac": ["mac"],
+    "idx_linux": ["linux"],
+}
+
+COLUMN_NAMES = [name for name, _, _ in STRUCTURED_SCHEMA]
+_SCHEMA_KINDS = {name: kind for name, _, kind in STRUCTURED_SCHEMA}
+
+
+def normalize_key(key):
+    """'Peak CCU' -> 'peak_ccu' 처럼 원본 키를 스키마 컬럼명 형태로 바꿉니다."""
+    normalized = "_".join(str(key).strip().lower().split())
+    return COLUMN_ALIASES.get(normalized, normalized)
+
+
+def _convert(value, kind):
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    try:
+        if kind == "int":
+            return int(float(value))
+        if kind == "float":
+            return float(value)
+        if kind == "bool":
+            if isinstance(value, str):
+                return 1 if value.strip().lower() in ("true", "1", "yes") else 0
+            return 1 if value else 0
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def to_row(record):
+    """원본 레코드를 스키마 순서의 튜플로 변환합니다. 스키마에 없는 키는 무시합니다."""
+    normalized = {normalize_key(k): v for k, v in record.items()}
+    return tuple(_convert(normalized.get(name), _SCHEMA_KINDS[name]) for name in COLUMN_NAMES)
+
+
+def create_table_sql(table):
+    columns = ",\n    ".join(f"`{name}` {sql_type}" for name, sql_type, _ in STRUCTURED_SCHEMA)
+    return (
+        f"CREATE TABLE `{table}` (\n    {columns},\n    PRIMARY KEY (`appid`)\n) "
+        "ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+    )
+
+
+def create_indexes_sql(table):
+    parts = [
+        f"ADD INDEX `{index}` ({', '.join(f'`{c}`' for c in columns)})"
+        for index, columns in STRUCTURED_INDEXES.items()
+    ]
+    return f"ALTER TABLE `{table}` " + ", ".join(parts)
+
+
+# --- 적재 방식 ---
+
+def load_with_insert(cursor, table, rows_batch):
+    """pymysql의 executemany는 INSERT ... VALUES를 여러 행짜리 단일 문장으로 묶어 전송합니다."""
+    columns = ", ".join(f"`{c}`" for c in COLUMN_NAMES)
+    placeholders = ", ".join(["%s"] * len(COLUMN_NAMES))
+    cursor.executemany(
+        f"INSERT INTO `{table}` ({columns}) VALUES ({placeholders}) "
+        f"ON DUPLICATE KEY UPDATE `appid` = `appid`",
+        rows_batch
+    )
+
+
+def _tsv_field(value):
+    """LOAD DATA의 기본 이스케이프 규칙(ESCAPED BY '\\')에 맞춰 값을 씁니다. NULL은 \\N입니다."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def load_with_infile(cursor, table, rows_batch):
+    """배치를 임시 TSV 파일로 쓴 뒤 LOAD DATA LOCAL INFILE로 적재합니다."""
+    with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', newline='', delete=False) as f:
+        for row in rows_batch:
+            f.write('\t'.join(_tsv_field(v) for v in row) + '\n')
+        tmp_path = f.name
+    try:
+        columns = ", ".join(f"`{c}`" for c in COLUMN_NAMES)
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})",
+            (tmp_path,)
+        )
+    finally:
+        os.remove(tmp_path)
+
+
+def connect(database=None, local_infile=False):
+    return pymysql.connect(
+        host=config.DB_HOST,
+        port=config.DB_PORT,
+        user=config.DB_USER,
+        password=config.DB_PASSWORD,
+        database=database,
+        charset='utf8mb4',
+        local_infile=local_infile,
+        autocommit=False,
+    )
+
+
+# --- 요약(집계) 테이블 ---
+# 백엔드(backend/app/ai_chat/aggregate_tables.py)가 자주 묻는 질문을 이 테이블들로 바꿔 조회하므로
+# 테이블 이름과 컬럼은 백엔드 정의와 같아야 합니다.
+AGGREGATE_PLATFORMS = ["windows", "mac", "linux"]
+AGGREGATE_TOP_METRICS = ["price", "peak_ccu", "positive", "recommendations"]
+AGGREGATE_STAT_METRICS = ["metacritic_score"]
+# 백엔드는 이 값 대신 적재된 테이블의 MAX(rank_no)를 읽어 LIMIT가 그 이하인 질문만 요약 테이블로 바꿉니다.
+AGGREGATE_TOP_N = int(os.getenv("AGGREGATE_TOP_N", 100))
+
+
+def aggregate_tables_sql(source, suffix=""):
+    """source 테이블에서 요약 테이블을 만드는 (테이블 이름, CREATE 문) 목록을 반환합니다."""
+    platform_selects = " UNION ALL ".join(
+        f"SELECT '{p}' AS platform, COUNT(*) AS game_count FROM `{source}` WHERE `{p}` = 1"
+        for p in AGGREGATE_PLATFORMS
+    )
+    tables = [("steam_platform_counts", platform_selects)]
+
+    for metric in AGGREGATE_TOP_METRICS:
+        tables.append((
+            f"steam_top_by_{metric}",
+            f"SELECT rank_no, appid, name, `{metric}` FROM ("
+            f"SELECT ROW_NUMBER() OVER (ORDER BY `{metric}` DESC) AS rank_no, appid, name, `{metric}` "
+            f"FROM `{source}` WHERE `{metric}` IS NOT NULL) ranked WHERE rank_no <= {AGGREGATE_TOP_N}",
+        ))
+
+    stat_selects = " UNION ALL ".join(
+        f"SELECT '{m}' AS metric, '{flt}' AS filter, AVG(`{m}`) AS avg_value, MIN(`{m}`) AS min_value, "
+        f"MAX(`{m}`) AS max_value, COUNT(`{m}`) AS game_count FROM `{source}`{where}"
+        for m in AGGREGATE_STAT_METRICS
+        for flt, where in (("all", ""), ("nonzero", f" WHERE `{m}` > 0"))
+    )
+    tables.append(("steam_score_stats", stat_selects))
+
+    return [(name, f"CREATE TABLE `{name}{suffix}` AS {select}") for name, select in tables]
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = %s AND table_name = %s",
+        (config.DB_NAME, table)
+    )
+    return bool(cursor.fetchone()[0])
+
+
+def load_structured_table(filepath, table, method="insert", chunk_size=config.MYSQL_LOAD_CHUNK_SIZE,
+                          aggregates=True):
+    """
+    filepath(JSON 배열, JSON Lines 또는 Parquet)를 chunk_size 행씩 스트리밍하여 스테이징 테이블에 적재하고,
+    인덱스와 요약 테이블을 만든 뒤 기존 테이블들과 원자적으로 교체합니다.
+    """
+    # 데이터베이스가 없는 경우를 대비해 먼저 생성합니다.
+    with connect() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"CREATE DATABASE IF NOT EXISTS `{config.DB_NAME}` "
+                "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            )
+
+    staging = f"{table}__staging"
+    old = f"{table}__old"
+    load_batch = load_with_infile if method == "infile" else load_with_insert
+
+    with connect(config.DB_NAME, local_infile=(method == "infile")) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS `{staging}`, `{old}`")
+            cursor.execute(create_table_sql(staging))
+
+            start = time.perf_counter()
+            loaded = 0
+            # Parquet 입력이면 스키마에 해당하는 컬럼만 읽습니다.
+            source = iter_records(filepath, columns=COLUMN_NAMES + list(COLUMN_ALIASES))
+            for batch in iter_batches(source, chunk_size):
+                rows_batch = [to_row(record) for record in batch]
+                load_batch(cursor, staging, rows_batch)
+                conn.commit()
+                loaded += len(rows_batch)
+                elapsed = time.perf_counter() - start
+                print(f"  {loaded}행 적재 ({loaded / elapsed:.0f}행/초)")
+
+            # 인덱스는 적재가 끝난 뒤 한 번에 만드는 편이 행마다 갱신하는 것보다 빠릅니다.
+            print("인덱스를 생성합니다...")
+            cursor.execute(create_indexes_sql(staging))
+
+            # (현재 이름, 스테이징 이름) 쌍. 본 테이블과 요약 테이블을 함께 교체합니다.
+            swaps = [(table, staging)]
+            if aggregates:
+                print("요약 테이블을 생성합니다...")
+                for name, create_sql in aggregate_tables_sql(staging, suffix="__staging"):
+                    cursor.execute(f"DROP TABLE IF EXISTS `{name}__staging`, `{name}__old`")
+                    cursor.execute(create_sql)
+                    swaps.append((name, f"{name}__staging"))
+
+            # RENAME TABLE은 여러 테이블 이름 변경을 하나의 원자적 작업으로 수행합니다.
+            renames, drops = [], []
+            for name, staged in swaps:
+                if table_exists(cursor, name):
+                    renames.append(f"`{name}` TO `{name}__old`")
+                    drops.append(f"`{name}__old`")
+                renames.append(f"`{staged}` TO `{name}`")
+            cursor.execute(f"RENAME TABLE {', '.join(renames)}")
+            if drops:
+                cursor.execute(f"DROP TABLE {', '.join(drops)}")
+
+    print(f"'{table}' 테이블에 {loaded}행을 적재하고 교체했습니다. ({time.perf_counter() - start:.1f}초)")
+    return loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="정형 Steam 데이터를 MySQL에 벌크 적재합니다.")
+    parser.add_argument("path", nargs="?", default=config.STRUCTURED_JSON_PATH,
+                        help="정형 데이터 파일 경로 (JSON 배열, JSON Lines 또는 Parquet)")
+    parser.add_argument("--table", default=config.STRUCTURED_TABLE_NAME)
+    parser.add_argument("--method", choices=["insert", "infile"], default="insert",
+                        help="insert: 다중 행 INSERT, infile: LOAD DATA LOCAL INFILE (서버의 local_infile 허용 필요)")
+    parser.add_argument("--chunk-size", type=int, default=config.MYSQL_LOAD_CHUNK_SIZE)
+    parser.add_argument("--no-aggregates", action="store_true", help="요약(집계) 테이블을 만들지 않습니다.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"오류: '{args.path}' 파일을 찾을 수 없습니다.")
+    else:
+        load_structured_table(args.path, args.table, method=args.method, chunk_size=args.chunk_size,
+                              aggregates=not args.no_aggregates)
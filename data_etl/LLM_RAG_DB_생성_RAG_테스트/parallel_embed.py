@@ -0,0 +1,69 @@
+# parallel_embed.py
+# CPU 전용 환경에서 여러 워커 프로세스로 임베딩을 나누어 계산하는 인코더
+import multiprocessing as mp
+import os
+import numpy as np
+
+# 워커 프로세스마다 하나씩 로드되는 임베딩 모델
+_worker_model = None
+
+
+def _init_worker(model_name, num_threads):
+    """워커 프로세스 초기화: 스레드 수를 제한하고 자신만의 모델 사본을 로드합니다."""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # 프로세스끼리 코어를 나눠 쓰므로 intra-op 스레드가 서로 경쟁하지 않도록 제한합니다.
+    torch.set_num_threads(num_threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_shard(args):
+    texts, batch_size = args
+    return _worker_model.encode(texts, batch_size=batch_size)
+
+
+def _embedding_dimension(_):
+    return _worker_model.get_sentence_embedding_dimension()
+
+
+class ShardedEncoder:
+    """
+    입력 텍스트를 워커 수만큼 샤드로 나누어 각 워커 프로세스의 모델로 병렬 임베딩하고,
+    결과를 입력 순서 그대로 모아 반환합니다. SentenceTransformer의 encode 인터페이스와 호환됩니다.
+    """
+
+    def __init__(self, model_name, num_workers, threads_per_worker=None):
+        self.num_workers = num_workers
+        if threads_per_worker is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+        # torch는 fork 이후 스레드 상태가 불안정할 수 있어 spawn으로 워커를 띄웁니다.
+        ctx = mp.get_context("spawn")
+        self.pool = ctx.Pool(
+            processes=num_workers,
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker)
+        )
+        self._dim = None
+
+    def get_sentence_embedding_dimension(self):
+        if self._dim is None:
+            self._dim = self.pool.apply(_embedding_dimension, (None,))
+        return self._dim
+
+    def encode(self, texts, batch_size=32):
+        """texts를 샤드로 나누어 병렬 임베딩한 뒤 (len(texts), dim) 배열로 반환합니다."""
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size=batch_size)[0]
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        shard_size = -(-len(texts) // self.num_workers)
+        shards = [(texts[i:i + shard_size], batch_size) for i in range(0, len(texts), shard_size)]
+        # Pool.map은 입력 순서대로 결과를 반환하므로 샤드를 그대로 이어 붙이면 됩니다.
+        return np.concatenate(self.pool.map(_encode_shard, shards))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
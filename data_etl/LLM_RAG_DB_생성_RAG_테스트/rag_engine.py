@@ -1,8 +1,9 @@
 # rag_engine.py
 import json
+import math
 from neo4j import GraphDatabase
 from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, CrossEncoder
 from google import genai
 import config
 
@@ -12,6 +13,7 @@ class RAGEngine:
         self.neo4j_driver = GraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USER, config.NEO4J_PASSWORD))
         self.qdrant_client = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
         self.embedding_model = SentenceTransformer(config.EMBEDDING_MODEL_NAME)
+        self.reranker = CrossEncoder(config.RERANK_MODEL_NAME, max_length=256)
         
         genai.configure(api_key=config.GOOGLE_API_KEY)
         self.llm = genai.GenerativeModel(config.GENERATION_MODEL_NAME)
@@ -73,7 +75,8 @@ class RAGEngine:
         # 2. Neo4j 그래프 강화 (필터링 및 컨텍스트 확장)
         with self.neo4j_driver.session() as session:
             match_clauses = []
-            params = {"appids": candidate_appids}
+            # 재정렬할 수 있도록 후보군 전체의 정보를 가져옵니다.
+            params = {"appids": candidate_appids, "limit": len(candidate_appids)}
             
             for i, entity in enumerate(entities):
                 etype, evalue = entity.get("type"), entity.get("value")
@@ -92,7 +95,7 @@ class RAGEngine:
                    COLLECT(DISTINCT d.name) AS developers,
                    COLLECT(DISTINCT p.name) AS publishers,
                    COLLECT(DISTINCT gn.name) AS genres,
-            LIMIT 5
+            LIMIT $limit
             """
             
             full_query = (
@@ -106,19 +109,54 @@ class RAGEngine:
             results = session.run(full_query, params)
             return [record.data() for record in results]
 
+    def _rerank(self, query: str, retrieved_data: list) -> list:
+        """cross-encoder로 검색 결과를 질문과의 관련도 내림차순으로 정렬합니다."""
+        if not retrieved_data or len(retrieved_data) < 2:
+            return retrieved_data or []
+        pairs = [
+            (query, f"{item.get('name', '')}. {', '.join(item.get('genres', []))}. {(item.get('about') or '')[:500]}")
+            for item in retrieved_data
+        ]
+        scores = self.reranker.predict(pairs)
+        ranked = sorted(zip(scores, range(len(retrieved_data))), key=lambda pair: pair[0], reverse=True)
+        return [retrieved_data[i] for _, i in ranked]
+
     def _synthesize_context(self, retrieved_data: list) -> str:
-        """검색된 데이터를 LLM이 이해하기 쉬운 형식으로 변환합니다."""
+        """
+        관련도 순으로 정렬된 검색 결과를 토큰 예산(RAG_CONTEXT_TOKEN_BUDGET) 안의 컨텍스트로 만듭니다.
+        게임 기본 정보를 관련도 순으로 먼저 넣고(첫 번째 게임은 항상 포함), 남은 예산을 관련도 순으로 설명에 씁니다.
+        """
         if not retrieved_data:
             return "관련 정보를 찾을 수 없었습니다."
 
-        context_str = "--- 검색된 정보 ---\n\n"
+        def tokens(text):
+            return math.ceil(len(text) / config.RAG_CHARS_PER_TOKEN)
+
+        budget = config.RAG_CONTEXT_TOKEN_BUDGET
+        headers = []
+        used = tokens("--- 검색된 정보 ---\n\n")
         for item in retrieved_data:
-            context_str += f"게임명: {item.get('name', 'N/A')} (AppID: {item.get('appid', 'N/A')})\n"
-            context_str += f"  - 설명: {item.get('about', 'N/A')[:300]}...\n"
-            context_str += f"  - 개발사: {', '.join(item.get('developers', []))}\n"
-            context_str += f"  - 배급사: {', '.join(item.get('publishers', []))}\n"
-            context_str += f"  - 장르: {', '.join(item.get('genres', []))}\n"
-        
+            header = (
+                f"게임명: {item.get('name', 'N/A')} (AppID: {item.get('appid', 'N/A')})\n"
+                f"  - 개발사: {', '.join(item.get('developers', []))}\n"
+                f"  - 배급사: {', '.join(item.get('publishers', []))}\n"
+                f"  - 장르: {', '.join(item.get('genres', []))}\n"
+            )
+            if headers and used + tokens(header) > budget:
+                break
+            headers.append(header)
+            used += tokens(header)
+
+        context_str = "--- 검색된 정보 ---\n\n"
+        for item, header in zip(retrieved_data, headers):
+            about = " ".join((item.get("about") or "").split())
+            max_chars = min(600, int((budget - used) * config.RAG_CHARS_PER_TOKEN) - 12)
+            if about and max_chars >= 40:
+                snippet = about if len(about) <= max_chars else about[:max_chars - 3] + "..."
+                header += f"  - 설명: {snippet}\n"
+                used += tokens(f"  - 설명: {snippet}\n")
+            context_str += header
+
         return context_str
 
     def query(self, user_query: str) -> str:
@@ -130,7 +168,8 @@ class RAGEngine:
         print("2. 하이브리드 검색 실행 중...")
         retrieved = self._hybrid_retrieval(decomposed)
 
-        print("3. 컨텍스트 종합 중...")
+        print("3. 관련도 재정렬 및 컨텍스트 종합 중...")
+        retrieved = self._rerank(decomposed.get("semantic_query") or user_query, retrieved)
         context = self._synthesize_context(retrieved)
 
         print("4. 최종 답변 생성 중...")
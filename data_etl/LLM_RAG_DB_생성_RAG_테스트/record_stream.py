@@ -0,0 +1,120 @@
+# record_stream.py
+# JSON 배열 / JSON Lines / Parquet 파일을 한 레코드씩 읽어오는 스트리밍 리더
+import json
+
+# 파일에서 한 번에 읽어올 문자 수
+READ_CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+def _skip(buf, pos, chars):
+    """buf[pos:]에서 chars에 포함된 문자를 건너뛴 위치를 반환합니다."""
+    length = len(buf)
+    while pos < length and buf[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _iter_json_array(f, buf):
+    """'[' 이후부터 배열 원소를 하나씩 디코딩하여 반환합니다."""
+    pos = 0
+    eof = False
+    while True:
+        pos = _skip(buf, pos, _WHITESPACE + ',')
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        if pos >= len(buf):
+            if eof:
+                raise json.JSONDecodeError("JSON 배열이 닫히지 않았습니다.", buf, pos)
+            chunk = f.read(READ_CHUNK_SIZE)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        try:
+            record, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+
+        # 레코드가 버퍼 끝에 걸쳐 있을 수 있으므로 더 읽어온 뒤 다시 시도합니다.
+        if end is None or (end == len(buf) and not eof):
+            chunk = f.read(READ_CHUNK_SIZE)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+
+        yield record
+        pos = end
+
+
+def _iter_json_lines(f):
+    """JSON Lines 형식에서 비어 있지 않은 각 줄을 디코딩하여 반환합니다."""
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"{line_no}번째 줄: {e.msg}", e.doc, e.pos) from e
+
+
+def iter_json_records(filepath):
+    """
+    JSON 배열 또는 JSON Lines 파일에서 레코드를 하나씩 읽어 반환하는 제너레이터입니다.
+    파일 전체를 메모리에 올리지 않으므로 데이터 크기와 무관하게 메모리 사용량이 일정합니다.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        # 첫 번째 의미 있는 문자로 형식을 판별합니다.
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            buf = chunk.lstrip(_WHITESPACE)
+            if buf:
+                break
+
+        if buf[0] == '[':
+            yield from _iter_json_array(f, buf[1:])
+        else:
+            f.seek(0)
+            yield from _iter_json_lines(f)
+
+
+def iter_parquet_records(filepath, columns=None, batch_size=10_000):
+    """
+    Parquet 파일을 batch_size 행씩 읽어 레코드(dict)를 하나씩 반환합니다.
+    columns가 주어지면 그중 파일에 있는 컬럼만 읽으므로 필요 없는 컬럼은 디스크에서 읽지도 않습니다.
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(filepath)
+    if columns is not None:
+        available = set(parquet_file.schema_arrow.names)
+        columns = [col for col in columns if col in available]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield from batch.to_pylist()
+
+
+def iter_records(filepath, columns=None):
+    """
+    파일 확장자에 따라 Parquet 또는 JSON/JSON Lines 리더를 선택합니다.
+    columns는 Parquet에서만 읽을 컬럼을 제한하는 데 사용됩니다.
+    """
+    if filepath.endswith('.parquet'):
+        return iter_parquet_records(filepath, columns=columns)
+    return iter_json_records(filepath)
+
+
+def iter_batches(iterable, batch_size):
+    """이터러블을 batch_size 크기의 리스트로 나누어 순서대로 반환합니다."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
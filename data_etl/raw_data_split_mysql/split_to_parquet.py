@@ -0,0 +1,128 @@
+# split_to_parquet.py
+# Kaggle Steam 원본 CSV를 청크 단위로 읽어 정형/비정형 컬럼으로 나누고, 각각 Parquet 파일로 저장합니다.
+# (steam_data_save_정형_비정형_나누기-github.ipynb의 스크립트 버전)
+import argparse
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- 설정 부분 ---
+
+# 1-1. 정형 데이터 컬럼 (주로 숫자형 데이터)과 읽기 dtype
+# 결측값이 있는 정수 컬럼은 pandas의 nullable 정수(Int64)로 읽습니다.
+STRUCTURED_DTYPES = {
+    'AppID': 'int64',
+    'Name': 'string',
+    'Peak CCU': 'Int64',
+    'Required age': 'Int64',
+    'Price': 'float64',
+    'DiscountDLC count': 'Int64',
+    'Windows': 'boolean',
+    'Mac': 'boolean',
+    'Linux': 'boolean',
+    'Metacritic score': 'Int64',
+    'User score': 'Int64',
+    'Positive': 'Int64',
+    'Negative': 'Int64',
+    'Score rank': 'Int64',
+    'Achievements': 'Int64',
+    'Recommendations': 'Int64',
+    'Average playtime forever': 'Int64',
+    'Average playtime two weeks': 'Int64',
+    'Median playtime forever': 'Int64',
+    'Median playtime two weeks': 'Int64',
+}
+
+# 1-2. 비정형 데이터 컬럼 (주로 텍스트 데이터). RAG의 검색 대상이 될 텍스트이므로 모두 문자열로 읽습니다.
+UNSTRUCTURED_COLUMNS = [
+    'AppID', 'Name', 'Release date', 'Estimated owners', 'About the game',
+    'Supported languages', 'Full audio languages', 'Reviews', 'Header image',
+    'Website', 'Support url', 'Support email', 'Metacritic url', 'Notes',
+    'Developers', 'Publishers', 'Categories', 'Genres', 'Tags', 'Screenshots', 'Movies'
+]
+
+READ_DTYPES = {
+    **{col: 'string' for col in UNSTRUCTURED_COLUMNS},
+    **STRUCTURED_DTYPES,
+}
+
+
+def snake_case(column):
+    """'About the game' -> 'about_the_game'. 적재 스크립트가 사용하는 컬럼명 형태입니다."""
+    return "_".join(column.strip().lower().split())
+
+
+class _PartWriter:
+    """청크마다 하나 이상의 row group을 추가하는 Parquet 출력 파일입니다."""
+
+    def __init__(self, path, columns, row_group_size, compression):
+        self.path = path
+        self.columns = columns
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.writer = None
+        self.rows = 0
+
+    def write(self, chunk):
+        available = [col for col in self.columns if col in chunk.columns]
+        df = chunk[available].rename(columns=snake_case)
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        else:
+            # 첫 청크의 스키마로 고정하여 청크마다 타입이 달라지지 않도록 합니다.
+            table = pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def split_csv_to_parquet(source_path, structured_path, unstructured_path,
+                         chunk_size=50_000, row_group_size=50_000, compression='zstd'):
+    """원본 CSV를 chunk_size 행씩 읽어 두 개의 Parquet 파일로 나누어 씁니다. 메모리에는 한 청크만 유지합니다."""
+    header = pd.read_csv(source_path, encoding='utf-8', index_col=False, nrows=0).columns
+    dtypes = {col: dtype for col, dtype in READ_DTYPES.items() if col in header}
+
+    structured = _PartWriter(structured_path, list(STRUCTURED_DTYPES), row_group_size, compression)
+    unstructured = _PartWriter(unstructured_path, UNSTRUCTURED_COLUMNS, row_group_size, compression)
+    try:
+        reader = pd.read_csv(
+            source_path,
+            encoding='utf-8',
+            index_col=False,  # CSV의 첫 번째 열을 인덱스로 사용하지 않도록 명시
+            header=0,
+            dtype=dtypes,
+            chunksize=chunk_size,
+        )
+        for chunk in reader:
+            structured.write(chunk)
+            unstructured.write(chunk)
+            print(f"  {structured.rows}행 처리")
+    finally:
+        structured.close()
+        unstructured.close()
+
+    print(f"-> 정형 데이터 {structured.rows}행이 '{structured_path}' 파일로 저장되었습니다.")
+    print(f"-> 비정형 데이터 {unstructured.rows}행이 '{unstructured_path}' 파일로 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steam 원본 CSV를 정형/비정형 Parquet 파일로 분리합니다.")
+    parser.add_argument("source", nargs="?", default="steam_games_dataset.csv", help="원본 CSV 파일 경로")
+    parser.add_argument("--structured", default="steam_games_structured_data.parquet")
+    parser.add_argument("--unstructured", default="steam_games_unstructured_data.parquet")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="한 번에 읽을 CSV 행 수")
+    parser.add_argument("--row-group-size", type=int, default=50_000, help="Parquet row group의 최대 행 수")
+    args = parser.parse_args()
+
+    try:
+        split_csv_to_parquet(args.source, args.structured, args.unstructured,
+                             chunk_size=args.chunk_size, row_group_size=args.row_group_size)
+        print("\n모든 작업이 완료되었습니다!")
+    except FileNotFoundError:
+        print(f"오류: '{args.source}' 파일을 찾을 수 없습니다. 파일 이름을 확인해주세요.")
+        sys.exit(1)
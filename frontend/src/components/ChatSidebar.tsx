@@ -64,7 +64,7 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({
                   <div className="text-xs text-gray-500 truncate">
                     {chat.messages.length > 0
                       ? chat.messages[chat.messages.length - 1]?.content
-                      : '새 채팅'}
+                      : chat.last_message || '새 채팅'}
                   </div>
                 </div>
                 
@@ -25,6 +25,8 @@ export interface Chat {
   created_at: string;
   updated_at?: string;
   messages: Message[];
+  archived?: boolean;
+  last_message?: string | null;
 }
 
 export interface ChatCreate {